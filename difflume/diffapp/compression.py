@@ -0,0 +1,151 @@
+"""
+Streaming decompression of gzip, xz, bzip2 and zstd data.
+The format is detected by magic bytes, so the file name doesn't matter.
+"""
+from __future__ import annotations
+
+import bz2
+import lzma
+import zlib
+from typing import TYPE_CHECKING, Any, Protocol
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, AsyncIterator, Generator, Iterable
+
+MAGIC_NUMBERS = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "bzip2": b"BZh",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+# bzip2 magic is followed by the block size, "1" to "9", as `file(1)` checks
+BZIP2_BLOCK_SIZES = b"123456789"
+MAGIC_SIZE = max(len(magic) for magic in MAGIC_NUMBERS.values())
+COMPRESSED_EXTENSIONS = frozenset({".gz", ".xz", ".bz2", ".zst"})
+
+
+class CompressionError(Exception):
+    pass
+
+
+class _Decompressor(Protocol):
+    @property
+    def eof(self) -> bool:
+        ...
+
+    @property
+    def unused_data(self) -> bytes:
+        ...
+
+    def decompress(self, data: bytes) -> bytes:
+        ...
+
+
+def _zstd_decompressor() -> Any:
+    try:
+        import zstandard
+    except ImportError:
+        raise CompressionError(
+            "Reading zstd requires the optional `zstandard` package,"
+            " install it with `pip install DiffLume[zstd]`"
+        ) from None
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+def _new_decompressor(compression: str) -> _Decompressor:
+    if compression == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if compression == "xz":
+        return lzma.LZMADecompressor()
+    if compression == "bzip2":
+        return bz2.BZ2Decompressor()
+    if compression == "zstd":
+        return _zstd_decompressor()
+    raise CompressionError(f"Unknown compression {compression}")
+
+
+def detect_compression(head: bytes) -> str | None:
+    """
+    Detect compression by magic bytes at the beginning of the data.
+    """
+    for compression, magic in MAGIC_NUMBERS.items():
+        if not head.startswith(magic):
+            continue
+        if compression == "bzip2" and (
+            len(head) <= len(magic) or head[len(magic)] not in BZIP2_BLOCK_SIZES
+        ):
+            return None
+        return compression
+    return None
+
+
+class StreamDecompressor:
+    """
+    Decompress data chunk by chunk. Concatenated streams (e.g. `cat a.gz b.gz`)
+    are decompressed one after another, like `gzip -d` does.
+    """
+
+    def __init__(self, compression: str) -> None:
+        self._compression = compression
+        self._decompressor = _new_decompressor(compression)
+        self._started = False
+
+    def decompress(self, chunk: bytes) -> bytes:
+        parts = []
+        try:
+            while chunk:
+                self._started = True
+                parts.append(self._decompressor.decompress(chunk))
+                if not self._decompressor.eof:
+                    break
+                chunk = self._decompressor.unused_data
+                self._decompressor = _new_decompressor(self._compression)
+                self._started = False
+        except (OSError, EOFError, lzma.LZMAError, zlib.error) as e:
+            raise CompressionError(f"Invalid {self._compression} data: {e}") from e
+        return b"".join(parts)
+
+    def finish(self) -> None:
+        """
+        Check that the last stream wasn't truncated.
+        """
+        if self._started and not self._decompressor.eof:
+            raise CompressionError(f"Truncated {self._compression} data")
+
+
+def iter_decompressed(
+    chunks: Iterable[bytes], compression: str
+) -> Generator[bytes, None, None]:
+    decompressor = StreamDecompressor(compression)
+    for chunk in chunks:
+        if data := decompressor.decompress(chunk):
+            yield data
+    decompressor.finish()
+
+
+async def aiter_decompressed(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Decompress the stream if it starts with the magic bytes of a supported
+    format, otherwise pass it through unchanged.
+    """
+    head = b""
+    iterator = aiter(chunks)
+    async for chunk in iterator:
+        head += chunk
+        if len(head) >= MAGIC_SIZE:
+            break
+    compression = detect_compression(head)
+    if compression is None:
+        if head:
+            yield head
+        async for chunk in iterator:
+            yield chunk
+        return
+
+    decompressor = StreamDecompressor(compression)
+    if data := decompressor.decompress(head):
+        yield data
+    async for chunk in iterator:
+        if data := decompressor.decompress(chunk):
+            yield data
+    decompressor.finish()
@@ -0,0 +1,169 @@
+"""
+Following CouchDB documents through the `_changes` feed.
+"""
+from __future__ import annotations
+
+import asyncio
+import weakref
+from json import JSONDecodeError
+from typing import TYPE_CHECKING
+from urllib.parse import quote, unquote
+
+from httpx import AsyncClient, HTTPError, Timeout
+
+from difflume.http import url
+from difflume.settings import env_float
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+DEFAULT_LONGPOLL_TIMEOUT = 30.0
+# extra time for the server to respond after the long poll timeout
+LONGPOLL_TIMEOUT_MARGIN = 5.0
+
+
+def split_document_url(document_url: str) -> tuple[str, str]:
+    """
+    Split the document URL into the database URL and the document id.
+    """
+    parts = url.parse(document_url)
+    path = parts.path.rstrip("/")
+    split_at = max(path.rfind("/_design/"), path.rfind("/_local/"))
+    if split_at == -1:
+        split_at = path.rfind("/")
+    parts.path, doc_id = path[:split_at], path[split_at:].removeprefix("/")
+    parts.query = parts.fragment = ""
+    return url.build(parts), unquote(doc_id)
+
+
+def document_url(database_url: str, doc_id: str) -> str:
+    """
+    URL of the document in the database, the reverse of `split_document_url`.
+    """
+    prefix = ""
+    for special in ("_design/", "_local/"):
+        if doc_id.startswith(special):
+            prefix, doc_id = special, doc_id.removeprefix(special)
+    return f"{database_url.rstrip('/')}/{prefix}{quote(doc_id, safe='')}"
+
+
+class ChangesFeedError(Exception):
+    pass
+
+
+class ChangesFeed:
+    """
+    Long-poll `_changes` feed of a database, filtered by ids of followed
+    documents. All followers of documents in the database share one
+    connection; when a new document is followed, the pending request is
+    restarted with the new list of ids from the same sequence.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        *,
+        client: AsyncClient,
+        timeout: float | None = None,
+    ) -> None:
+        self._database_url = database_url.rstrip("/")
+        self._client = client
+        if timeout is None:
+            timeout = env_float("COUCHDB_LONGPOLL_TIMEOUT", DEFAULT_LONGPOLL_TIMEOUT)
+        self._timeout = timeout
+        self._followers: dict[str, set[asyncio.Queue[str | Exception]]] = {}
+        self._since = "now"
+        self._task: asyncio.Task | None = None
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def follow(self, doc_id: str) -> AsyncGenerator[str, None]:
+        """
+        Yield revisions of the document as they appear.
+        Raise `ChangesFeedError` if the feed can't be read.
+        """
+        queue: asyncio.Queue[str | Exception] = asyncio.Queue()
+        is_new_id = doc_id not in self._followers
+        self._followers.setdefault(doc_id, set()).add(queue)
+        if is_new_id or not self.is_running():
+            await self._restart()
+        try:
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            followers = self._followers.get(doc_id, set())
+            followers.discard(queue)
+            if not followers:
+                self._followers.pop(doc_id, None)
+            if not self._followers:
+                await self._stop()
+
+    async def _restart(self) -> None:
+        await self._stop()
+        self._task = asyncio.create_task(self._poll())
+
+    async def _stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            # doesn't raise, unlike awaiting the task
+            await asyncio.wait([task])
+
+    async def _poll(self) -> None:
+        while self._followers:
+            try:
+                changes = await self._request_changes(sorted(self._followers))
+            except ChangesFeedError as e:
+                for followers in self._followers.values():
+                    for queue in followers:
+                        queue.put_nowait(e)
+                return
+            self._since = str(changes.get("last_seq", self._since))
+            for change in changes.get("results", []):
+                revisions = [rev["rev"] for rev in change.get("changes", [])]
+                for queue in self._followers.get(change.get("id"), set()):
+                    for revision in revisions:
+                        queue.put_nowait(revision)
+
+    async def _request_changes(self, doc_ids: list[str]) -> dict:
+        try:
+            res = await self._client.post(
+                f"{self._database_url}/_changes",
+                params={
+                    "feed": "longpoll",
+                    "filter": "_doc_ids",
+                    "since": self._since,
+                    "timeout": str(int(self._timeout * 1000)),
+                },
+                json={"doc_ids": doc_ids},
+                timeout=Timeout(
+                    self._client.timeout.connect,
+                    read=self._timeout + LONGPOLL_TIMEOUT_MARGIN,
+                ),
+            )
+            res.raise_for_status()
+            return res.json()
+        except (HTTPError, JSONDecodeError) as e:
+            raise ChangesFeedError(
+                f"Could not read changes of {self._database_url}"
+            ) from e
+
+
+_feeds: weakref.WeakKeyDictionary[AsyncClient, dict[str, ChangesFeed]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def changes_feed(database_url: str, *, client: AsyncClient) -> ChangesFeed:
+    """
+    Get the shared feed of the database.
+    """
+    feeds = _feeds.setdefault(client, {})
+    key = database_url.rstrip("/")
+    if key not in feeds:
+        feeds[key] = ChangesFeed(key, client=client)
+    return feeds[key]
@@ -0,0 +1,350 @@
+"""
+Comparison of all documents of two CouchDB databases, e.g. to verify
+replication. `_all_docs` of both databases is paged through in parallel and
+merged by id, documents with equal revisions are skipped, the rest are
+fetched in bulk and diffed in a pool of workers.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from json import JSONDecodeError
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from httpx import HTTPError, HTTPStatusError
+
+from difflume.diffapp.differ import diff_stats
+from difflume.diffapp.normalize import MASK_PRESETS, Normalization, normalized_lines
+from difflume.diffapp.workers import process_pool
+from difflume.settings import env_int
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, AsyncIterator
+    from concurrent.futures import Executor
+
+    from httpx import AsyncClient
+
+    from difflume.diffapp.differ import DiffStats
+
+    T = TypeVar("T")
+
+# rows of `_all_docs` requested at once
+DEFAULT_PAGE_SIZE = 1000
+# documents fetched from each database with one request
+FETCH_BATCH_SIZE = 100
+# batches being fetched and diffed at the same time
+MAX_PENDING_BATCHES = 4
+# statuses of `_bulk_get` on servers without it (CouchDB 1.x)
+BULK_GET_UNSUPPORTED = frozenset({400, 404, 405, 501})
+# revisions of compared documents differ anyway
+DOCUMENT_NORMALIZATION = Normalization(masks=(MASK_PRESETS["couchdb revisions"],))
+
+Row = tuple[str, str]
+
+
+class DatabaseCompareError(Exception):
+    pass
+
+
+class DocumentStatus(Enum):
+    CHANGED = "changed"
+    # only in the database to compare
+    ADDED = "added"
+    # only in the first database
+    REMOVED = "removed"
+    # in both, but couldn't be fetched at the listed revision
+    MISSING_AT_REVISION = "missing at revision"
+
+
+@dataclass(frozen=True, kw_only=True)
+class DocumentDiff:
+    doc_id: str
+    # None if the database has no such document
+    rev: str | None
+    rev_to_compare: str | None
+    # None if the document is only in one of the databases or is missing
+    stats: DiffStats | None = None
+    # the revision was compacted, or the document was deleted or changed
+    # between listing and fetching
+    missing: bool = False
+
+    @property
+    def status(self) -> DocumentStatus:
+        if self.missing:
+            return DocumentStatus.MISSING_AT_REVISION
+        if self.rev is None:
+            return DocumentStatus.ADDED
+        if self.rev_to_compare is None:
+            return DocumentStatus.REMOVED
+        return DocumentStatus.CHANGED
+
+    @property
+    def summary(self) -> str:
+        if self.stats is None:
+            return self.status.value
+        # bodies can be equal when only revision histories differ
+        return str(self.stats)
+
+
+def document_text(doc: dict[str, Any]) -> str:
+    """
+    Same text as the document is shown with, see `parse_content`.
+    """
+    return json.dumps(doc, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+def diff_documents(doc: dict[str, Any], doc_to_compare: dict[str, Any]) -> DiffStats:
+    """
+    Only the stats, the diff is formatted when the document is opened.
+    """
+    return diff_stats(
+        normalized_lines(document_text(doc), DOCUMENT_NORMALIZATION),
+        normalized_lines(document_text(doc_to_compare), DOCUMENT_NORMALIZATION),
+    )
+
+
+async def _read_ahead(items: AsyncIterator[T]) -> AsyncGenerator[T, None]:
+    """
+    Request the next item while the current one is processed.
+    """
+    next_item = asyncio.ensure_future(anext(items, None))
+    try:
+        while (item := await next_item) is not None:
+            next_item = asyncio.ensure_future(anext(items, None))
+            yield item
+    finally:
+        next_item.cancel()
+        await asyncio.wait([next_item])
+
+
+async def _rows(pages: AsyncIterator[list[Row]]) -> AsyncGenerator[Row, None]:
+    async for page in pages:
+        for row in page:
+            yield row
+
+
+async def merge_revisions(
+    pages: AsyncIterator[list[Row]], pages_to_compare: AsyncIterator[list[Row]]
+) -> AsyncGenerator[tuple[str, str | None, str | None], None]:
+    """
+    Ids of documents with different revisions and the revisions, None where
+    a database has no document. Pages must be ordered by id.
+    """
+    rows, rows_to_compare = _rows(pages), _rows(pages_to_compare)
+    row = await anext(rows, None)
+    row_to_compare = await anext(rows_to_compare, None)
+    while row is not None or row_to_compare is not None:
+        doc_id = min(r[0] for r in (row, row_to_compare) if r is not None)
+        rev = row[1] if row is not None and row[0] == doc_id else None
+        rev_to_compare = (
+            row_to_compare[1]
+            if row_to_compare is not None and row_to_compare[0] == doc_id
+            else None
+        )
+        if rev != rev_to_compare:
+            yield doc_id, rev, rev_to_compare
+        if rev is not None:
+            row = await anext(rows, None)
+        if rev_to_compare is not None:
+            row_to_compare = await anext(rows_to_compare, None)
+
+
+class DatabaseComparison:
+    """
+    Compares documents of the database with documents of the database
+    to compare. `listed` counts documents of both databases listed so far.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        database_url_to_compare: str,
+        *,
+        client: AsyncClient,
+        page_size: int | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        self.database_url = database_url.rstrip("/")
+        self.database_url_to_compare = database_url_to_compare.rstrip("/")
+        self._client = client
+        if page_size is None:
+            page_size = env_int("COUCHDB_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+        self._page_size = page_size
+        self._executor = executor
+        self._without_bulk_get: set[str] = set()
+        self.listed = 0
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        res = await self._client.request(method, url, **kwargs)
+        res.raise_for_status()
+        return res.json()
+
+    async def iter_revisions(
+        self, database_url: str
+    ) -> AsyncGenerator[list[Row], None]:
+        """
+        Pages of ids and revisions of the documents, ordered by id.
+        """
+        params = {"limit": str(self._page_size)}
+        while True:
+            try:
+                data = await self._request(
+                    "GET", f"{database_url}/_all_docs", params=params
+                )
+                page = [(row["id"], row["value"]["rev"]) for row in data["rows"]]
+            except (HTTPError, JSONDecodeError, KeyError, TypeError) as e:
+                raise DatabaseCompareError(
+                    f"Could not read documents of {database_url}"
+                ) from e
+            self.listed += len(page)
+            yield page
+            if len(page) < self._page_size:
+                return
+            # ids are unique, the next page starts after the last one
+            params = {
+                "limit": str(self._page_size),
+                "startkey": json.dumps(page[-1][0]),
+                "skip": "1",
+            }
+
+    async def fetch_documents(
+        self, database_url: str, revisions: list[Row]
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Bodies of the documents at the revisions by ids, with `_bulk_get`,
+        or with `_all_docs` on servers without it. Documents that are not
+        at the listed revisions anymore are left out.
+        """
+        try:
+            docs = None
+            if database_url not in self._without_bulk_get:
+                try:
+                    docs = await self._bulk_get(database_url, revisions)
+                except HTTPStatusError as e:
+                    if e.response.status_code not in BULK_GET_UNSUPPORTED:
+                        raise
+                    self._without_bulk_get.add(database_url)
+            if docs is None:
+                docs = await self._include_docs(database_url, revisions)
+        except (HTTPError, JSONDecodeError, KeyError, TypeError) as e:
+            raise DatabaseCompareError(
+                f"Could not fetch documents of {database_url}"
+            ) from e
+        return {
+            doc_id: docs[doc_id]
+            for doc_id, rev in revisions
+            if doc_id in docs and docs[doc_id].get("_rev") == rev
+        }
+
+    async def _bulk_get(
+        self, database_url: str, revisions: list[Row]
+    ) -> dict[str, dict[str, Any]]:
+        data = await self._request(
+            "POST",
+            f"{database_url}/_bulk_get",
+            json={"docs": [{"id": doc_id, "rev": rev} for doc_id, rev in revisions]},
+        )
+        return {
+            result["id"]: doc["ok"]
+            for result in data["results"]
+            for doc in result["docs"]
+            if "ok" in doc
+        }
+
+    async def _include_docs(
+        self, database_url: str, revisions: list[Row]
+    ) -> dict[str, dict[str, Any]]:
+        # latest revisions, the listed ones unless changed since
+        data = await self._request(
+            "POST",
+            f"{database_url}/_all_docs",
+            params={"include_docs": "true"},
+            json={"keys": [doc_id for doc_id, _ in revisions]},
+        )
+        return {row["id"]: row["doc"] for row in data["rows"] if row.get("doc")}
+
+    async def diff_batch(
+        self, batch: list[tuple[str, str | None, str | None]]
+    ) -> list[DocumentDiff]:
+        """
+        Fetch the documents that are in both databases and diff them in workers.
+        """
+        both = [
+            (doc_id, rev, rev_to_compare)
+            for doc_id, rev, rev_to_compare in batch
+            if rev is not None and rev_to_compare is not None
+        ]
+        if not both:
+            return [
+                DocumentDiff(doc_id=doc_id, rev=rev, rev_to_compare=rev_to_compare)
+                for doc_id, rev, rev_to_compare in batch
+            ]
+        docs, docs_to_compare = await asyncio.gather(
+            self.fetch_documents(
+                self.database_url, [(doc_id, rev) for doc_id, rev, _ in both]
+            ),
+            self.fetch_documents(
+                self.database_url_to_compare,
+                [(doc_id, rev) for doc_id, _, rev in both],
+            ),
+        )
+        loop = asyncio.get_running_loop()
+        executor = self._executor or process_pool()
+        tasks = {
+            doc_id: loop.run_in_executor(
+                executor,
+                functools.partial(
+                    diff_documents, docs[doc_id], docs_to_compare[doc_id]
+                ),
+            )
+            for doc_id, _, _ in both
+            if doc_id in docs and doc_id in docs_to_compare
+        }
+        await asyncio.gather(*tasks.values())
+        return [
+            DocumentDiff(
+                doc_id=doc_id,
+                rev=rev,
+                rev_to_compare=rev_to_compare,
+                stats=tasks[doc_id].result() if doc_id in tasks else None,
+                missing=doc_id not in tasks
+                and rev is not None
+                and rev_to_compare is not None,
+            )
+            for doc_id, rev, rev_to_compare in batch
+        ]
+
+    async def run(self) -> AsyncGenerator[list[DocumentDiff], None]:
+        """
+        Yield differing documents in batches, ordered by id.
+        Raise `DatabaseCompareError` if a database can't be read.
+        """
+        self.listed = 0
+        pending: deque[asyncio.Task[list[DocumentDiff]]] = deque()
+        batch: list[tuple[str, str | None, str | None]] = []
+        pages = _read_ahead(self.iter_revisions(self.database_url))
+        pages_to_compare = _read_ahead(
+            self.iter_revisions(self.database_url_to_compare)
+        )
+        try:
+            async for row in merge_revisions(pages, pages_to_compare):
+                batch.append(row)
+                if len(batch) < FETCH_BATCH_SIZE:
+                    continue
+                pending.append(asyncio.create_task(self.diff_batch(batch)))
+                batch = []
+                while len(pending) > MAX_PENDING_BATCHES:
+                    yield await pending.popleft()
+            if batch:
+                pending.append(asyncio.create_task(self.diff_batch(batch)))
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await pages.aclose()
+            await pages_to_compare.aclose()
@@ -1,13 +1,37 @@
 from __future__ import annotations
 
+import bisect
+import copy
 import difflib
-from collections import deque
-from dataclasses import dataclass
+import threading
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from typing import TYPE_CHECKING
+from itertools import chain
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+from difflume.diffapp.normalize import Normalization, normalized_lines
+from difflume.diffapp.workers import process_pool, workers_count
+from difflume.settings import env_int
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterable
+    from collections.abc import Callable, Generator, Hashable, Iterable, Sequence
+    from concurrent.futures import Executor
+
+    Opcode = tuple[str, int, int, int, int]
+
+# texts with this many lines in total are diffed in parallel
+DEFAULT_PARALLEL_DIFF_THRESHOLD = 200_000
+# parallel diff doesn't split texts into segments smaller than this
+MIN_SEGMENT_LINES = 5_000
+# segments per worker, more segments even out the load
+SEGMENTS_PER_WORKER = 4
+# unchanged lines around changes in a collapsed diff
+DEFAULT_PRESERVE_ROWS = 2
+# second sequences of diffs whose matcher index is kept, e.g. both panels
+MATCHER_INDEX_CACHE_SIZE = 2
+
+T = TypeVar("T")
 
 
 class DiffType(Enum):
@@ -21,19 +45,512 @@ class HighlightType(Enum):
     EXPLANATION = "explanation"
 
 
+@dataclass(frozen=True)
+class DiffBlock:
+    """
+    One opcode of the diff together with its ndiff output lines.
+    `lo`/`hi` are line ranges in the first text, `lo_to_compare`/`hi_to_compare`
+    are ranges in the text to compare.
+    """
+
+    tag: str
+    lo: int
+    hi: int
+    lo_to_compare: int
+    hi_to_compare: int
+    lines: list[str]
+
+
+@dataclass(frozen=True)
+class HiddenLines:
+    """
+    Lines of the full diff hidden behind a delimiter of a collapsed diff.
+    `line` is the index of the delimiter in the collapsed lines, `start`/`end`
+    is the range of the hidden lines in the full diff.
+    """
+
+    line: int
+    start: int
+    end: int
+
+
+def hunk_starts(
+    blocks: Iterable[DiffBlock], hidden: Sequence[HiddenLines] = ()
+) -> list[int]:
+    """
+    Indexes of the output lines where changed blocks start, one per hunk
+    of `DiffStats`. With `hidden`, indexes are in the collapsed lines.
+    Taken from the opcodes: a replacement can have unchanged lines inside.
+    """
+    starts = []
+    shift = offset = index = 0
+    for block in blocks:
+        if block.tag != "equal":
+            # lines behind delimiters before the block are one line each
+            while index < len(hidden) and hidden[index].end <= offset:
+                shift += hidden[index].end - hidden[index].start - 1
+                index += 1
+            starts.append(offset - shift)
+        offset += len(block.lines)
+    return starts
+
+
+def full_diff_lines(blocks: Iterable[DiffBlock], start: int, end: int) -> list[str]:
+    """
+    Lines `start:end` of the full diff of the blocks.
+    """
+    lines: list[str] = []
+    offset = 0
+    for block in blocks:
+        if offset >= end:
+            break
+        block_start, block_end = max(start - offset, 0), end - offset
+        offset += len(block.lines)
+        if offset > start:
+            lines.extend(line.rstrip() for line in block.lines[block_start:block_end])
+    return lines
+
+
+class SideCache(Generic[T]):
+    """
+    State of one side of recent diffs (e.g. line counts) by the identity
+    of the side's lines, reused while that side stays the same and only
+    the other side changes. Only tuples are cached, lists could be changed
+    in place. The tuples are held, so their ids can't be reused.
+    """
+
+    def __init__(self, build: Callable[[Sequence[Hashable]], T], size: int = 4):
+        self._build = build
+        self._size = size
+        self._entries: OrderedDict[int, tuple[Sequence[Hashable], T]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, lines: Sequence[Hashable]) -> T:
+        if not isinstance(lines, tuple):
+            return self._build(lines)
+        with self._lock:
+            entry = self._entries.get(id(lines))
+            if entry is not None:
+                self._entries.move_to_end(id(lines))
+                return entry[1]
+        value = self._build(lines)
+        with self._lock:
+            self._entries[id(lines)] = (lines, value)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        return value
+
+
+_line_counts: SideCache[Counter[Hashable]] = SideCache(Counter)
+
+
+def _indexed(b: Sequence[Hashable]) -> difflib.SequenceMatcher:
+    return difflib.SequenceMatcher(None, (), b)
+
+
+# indexes of the second sequences of recent diffs, each holds its sequence
+_indexes: SideCache[difflib.SequenceMatcher] = SideCache(
+    _indexed, size=MATCHER_INDEX_CACHE_SIZE
+)
+
+
+def matcher(a: Sequence[Hashable], b: Sequence[Hashable]) -> difflib.SequenceMatcher:
+    """
+    SequenceMatcher indexes the second sequence, which is a big part of the
+    cost of a diff. Indexes of recent second sequences are kept by their
+    identity (see `SideCache`), so when only the first side changes, or the
+    second one changes back (e.g. `Content.lines` of a revision shown before),
+    the index is reused. The index is only read while matching, so copies of
+    the indexed matcher share it.
+    """
+    result = copy.copy(_indexes.get(b))
+    result.set_seq1(a)
+    return result
+
+
+class _BlockDiffer(difflib.Differ):
+    def __init__(self) -> None:
+        super().__init__(charjunk=difflib.IS_CHARACTER_JUNK)
+
+    def compare_blocks(
+        self,
+        a: Sequence[str],
+        b: Sequence[str],
+        opcodes: Iterable[Opcode],
+        *,
+        a_offset: int = 0,
+        b_offset: int = 0,
+    ) -> Generator[DiffBlock, None, None]:
+        """
+        Same as `difflib.Differ.compare` for already matched lines, see
+        `diff_opcodes`, but keep the output of each opcode separately,
+        so parts of the diff can be recomputed later.
+        """
+        for tag, alo, ahi, blo, bhi in opcodes:
+            if tag == "replace":
+                lines = self._fancy_replace(  # type: ignore[attr-defined]
+                    a, alo, ahi, b, blo, bhi
+                )
+            elif tag == "delete":
+                lines = self._dump("-", a, alo, ahi)  # type: ignore[attr-defined]
+            elif tag == "insert":
+                lines = self._dump("+", b, blo, bhi)  # type: ignore[attr-defined]
+            elif tag == "equal":
+                lines = self._dump(" ", a, alo, ahi)  # type: ignore[attr-defined]
+            else:
+                raise ValueError(f"Unknown tag {tag!r}")
+
+            yield DiffBlock(
+                tag,
+                alo + a_offset,
+                ahi + a_offset,
+                blo + b_offset,
+                bhi + b_offset,
+                list(lines),
+            )
+
+
+@dataclass(frozen=True, kw_only=True)
+class DiffStats:
+    added: int = 0
+    removed: int = 0
+    # replaced lines, paired up; the rest of a replacement is added or removed
+    changed: int = 0
+    hunks: int = 0
+
+    @classmethod
+    def from_opcodes(
+        cls, opcodes: Iterable[tuple[str, int, int, int, int]]
+    ) -> DiffStats:
+        added = removed = changed = hunks = 0
+        for tag, alo, ahi, blo, bhi in opcodes:
+            if tag == "equal":
+                continue
+            hunks += 1
+            paired = min(ahi - alo, bhi - blo) if tag == "replace" else 0
+            changed += paired
+            removed += ahi - alo - paired
+            added += bhi - blo - paired
+        return cls(added=added, removed=removed, changed=changed, hunks=hunks)
+
+    def __bool__(self) -> bool:
+        return self.hunks > 0
+
+    def __str__(self) -> str:
+        if not self:
+            return "No changes"
+        hunks = "hunk" if self.hunks == 1 else "hunks"
+        return f"+{self.added} -{self.removed} ~{self.changed} in {self.hunks} {hunks}"
+
+
+def diff_opcodes(
+    lines: Sequence[Hashable], lines_to_compare: Sequence[Hashable]
+) -> Sequence[Opcode]:
+    """
+    Match the lines (or their keys, e.g. normalized lines) without
+    formatting the diff. Stats and hunks come from the opcodes alone.
+    """
+    return matcher(lines, lines_to_compare).get_opcodes()
+
+
+def diff_stats(
+    lines: Sequence[Hashable], lines_to_compare: Sequence[Hashable]
+) -> DiffStats:
+    """
+    Count changed lines and hunks without formatting the diff.
+    """
+    return DiffStats.from_opcodes(diff_opcodes(lines, lines_to_compare))
+
+
+def common_prefix_len(old: Sequence[str], new: Sequence[str]) -> int:
+    size = min(len(old), len(new))
+    for i in range(size):
+        if old[i] != new[i]:
+            return i
+    return size
+
+
+def unique_anchors(
+    lines: Sequence[Hashable], lines_to_compare: Sequence[Hashable]
+) -> list[tuple[int, int]]:
+    """
+    Pairs of line numbers of lines that occur exactly once in both texts,
+    keeping the longest run of pairs that are in the same order in both
+    texts (as in patience diff).
+    """
+    counts = _line_counts.get(lines)
+    counts_to_compare = _line_counts.get(lines_to_compare)
+    positions = {
+        line: j
+        for j, line in enumerate(lines_to_compare)
+        if counts_to_compare[line] == 1 and counts[line] == 1
+    }
+    pairs = [(i, positions[line]) for i, line in enumerate(lines) if line in positions]
+
+    # longest increasing subsequence of the second line numbers
+    tails: list[int] = []
+    tail_indexes: list[int] = []
+    previous: list[int] = []
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect.bisect_left(tails, j)
+        previous.append(tail_indexes[pile - 1] if pile else -1)
+        if pile == len(tails):
+            tails.append(j)
+            tail_indexes.append(index)
+        else:
+            tails[pile] = j
+            tail_indexes[pile] = index
+    anchors = []
+    index = tail_indexes[-1] if tail_indexes else -1
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def split_on_anchors(
+    size: int,
+    size_to_compare: int,
+    anchors: Iterable[tuple[int, int]],
+    *,
+    segment_lines: int,
+) -> list[tuple[int, int, int, int]]:
+    """
+    Cut both texts at anchor lines into segments of at least `segment_lines`
+    lines that can be diffed independently.
+    Segments are `(lo, hi, lo_to_compare, hi_to_compare)`.
+    """
+    segments = []
+    lo = lo_to_compare = 0
+    for i, j in anchors:
+        if i - lo >= segment_lines and j > lo_to_compare:
+            segments.append((lo, i, lo_to_compare, j))
+            lo, lo_to_compare = i, j
+    segments.append((lo, size, lo_to_compare, size_to_compare))
+    return segments
+
+
+def _format_segment(
+    lines: Sequence[str],
+    lines_to_compare: Sequence[str],
+    opcodes: Iterable[Opcode],
+    offset: int,
+    offset_to_compare: int,
+) -> list[DiffBlock]:
+    return list(
+        _BlockDiffer().compare_blocks(
+            lines,
+            lines_to_compare,
+            opcodes,
+            a_offset=offset,
+            b_offset=offset_to_compare,
+        )
+    )
+
+
+def _diff_segment(
+    lines: Sequence[str],
+    lines_to_compare: Sequence[str],
+    offset: int,
+    offset_to_compare: int,
+    keys: Sequence[Hashable] | None = None,
+    keys_to_compare: Sequence[Hashable] | None = None,
+    on_stats: Callable[[DiffStats], None] | None = None,
+) -> list[DiffBlock]:
+    opcodes = diff_opcodes(
+        lines if keys is None else keys,
+        lines_to_compare if keys_to_compare is None else keys_to_compare,
+    )
+    if on_stats is not None:
+        on_stats(DiffStats.from_opcodes(opcodes))
+    return _format_segment(lines, lines_to_compare, opcodes, offset, offset_to_compare)
+
+
+def _slice(keys: Sequence[Hashable] | None, lo: int, hi: int) -> Sequence | None:
+    return None if keys is None else keys[lo:hi]
+
+
+def parallel_diff_blocks(
+    lines: Sequence[str],
+    lines_to_compare: Sequence[str],
+    *,
+    offset: int = 0,
+    offset_to_compare: int = 0,
+    keys: Sequence[Hashable] | None = None,
+    keys_to_compare: Sequence[Hashable] | None = None,
+    executor: Executor | None = None,
+    segment_lines: int | None = None,
+    on_stats: Callable[[DiffStats], None] | None = None,
+) -> list[DiffBlock]:
+    """
+    Split texts at unique common lines (or keys, if passed) and diff
+    the segments in a pool of workers. The result may align lines differently
+    than a diff of the whole texts, but it is a valid diff of them.
+    All segments are matched before any is formatted, so `on_stats` gets
+    the stats of the whole diff early.
+    """
+    executor = executor or process_pool()
+    if segment_lines is None:
+        segment_lines = max(
+            len(lines) // (workers_count() * SEGMENTS_PER_WORKER), MIN_SEGMENT_LINES
+        )
+    matched = lines if keys is None else keys
+    matched_to_compare = (
+        lines_to_compare if keys_to_compare is None else keys_to_compare
+    )
+    segments = split_on_anchors(
+        len(lines),
+        len(lines_to_compare),
+        unique_anchors(matched, matched_to_compare),
+        segment_lines=segment_lines,
+    )
+    if len(segments) == 1:
+        return _diff_segment(
+            lines,
+            lines_to_compare,
+            offset,
+            offset_to_compare,
+            keys,
+            keys_to_compare,
+            on_stats,
+        )
+    opcodes = [
+        future.result()
+        for future in [
+            executor.submit(diff_opcodes, matched[lo:hi], matched_to_compare[lo2:hi2])
+            for lo, hi, lo2, hi2 in segments
+        ]
+    ]
+    if on_stats is not None:
+        on_stats(DiffStats.from_opcodes(chain.from_iterable(opcodes)))
+    futures = [
+        executor.submit(
+            _format_segment,
+            lines[lo:hi],
+            lines_to_compare[lo2:hi2],
+            segment_opcodes,
+            lo + offset,
+            lo2 + offset_to_compare,
+        )
+        for (lo, hi, lo2, hi2), segment_opcodes in zip(segments, opcodes)
+    ]
+    return list(chain.from_iterable(future.result() for future in futures))
+
+
+def diff_blocks(
+    lines: Sequence[str],
+    lines_to_compare: Sequence[str],
+    *,
+    offset: int = 0,
+    offset_to_compare: int = 0,
+    keys: Sequence[Hashable] | None = None,
+    keys_to_compare: Sequence[Hashable] | None = None,
+    parallel: bool = True,
+    on_stats: Callable[[DiffStats], None] | None = None,
+) -> list[DiffBlock]:
+    """
+    Diff big texts in parallel, see `parallel_diff_blocks`.
+    `on_stats` is called with the stats once the lines are matched,
+    before the diff is formatted.
+    """
+    threshold = env_int("PARALLEL_DIFF_THRESHOLD", DEFAULT_PARALLEL_DIFF_THRESHOLD)
+    if parallel and len(lines) + len(lines_to_compare) >= threshold:
+        return parallel_diff_blocks(
+            lines,
+            lines_to_compare,
+            offset=offset,
+            offset_to_compare=offset_to_compare,
+            keys=keys,
+            keys_to_compare=keys_to_compare,
+            on_stats=on_stats,
+        )
+    return _diff_segment(
+        lines,
+        lines_to_compare,
+        offset,
+        offset_to_compare,
+        keys,
+        keys_to_compare,
+        on_stats,
+    )
+
+
+def equal_blocks(lines: Sequence[str]) -> list[DiffBlock]:
+    """
+    Diff of a text with itself, without matching the lines.
+    """
+    if not lines:
+        return []
+    size = len(lines)
+    return [DiffBlock("equal", 0, size, 0, size, [f"  {line}" for line in lines])]
+
+
+def update_diff_blocks(
+    blocks: list[DiffBlock],
+    *,
+    old_lines: Sequence[str],
+    old_lines_to_compare: Sequence[str],
+    lines: Sequence[str],
+    lines_to_compare: Sequence[str],
+    keys: Sequence[Hashable] | None = None,
+    keys_to_compare: Sequence[Hashable] | None = None,
+    parallel: bool = True,
+) -> list[DiffBlock]:
+    """
+    Recompute the diff after one or both texts were changed.
+    Blocks that lie entirely before the first changed line of both texts are
+    reused, only the rest of the texts is diffed again.
+    """
+    prefix = common_prefix_len(old_lines, lines)
+    prefix_to_compare = common_prefix_len(old_lines_to_compare, lines_to_compare)
+    kept = next(
+        (
+            i
+            for i, block in enumerate(blocks)
+            if block.hi > prefix or block.hi_to_compare > prefix_to_compare
+        ),
+        len(blocks),
+    )
+    # The last kept block may be extended by the changed lines (e.g. appended
+    # lines that are equal in both texts), so recompute it too.
+    kept = max(kept - 1, 0)
+    start = blocks[kept].lo if kept < len(blocks) else len(old_lines)
+    start_to_compare = (
+        blocks[kept].lo_to_compare if kept < len(blocks) else len(old_lines_to_compare)
+    )
+    tail = diff_blocks(
+        lines[start:],
+        lines_to_compare[start_to_compare:],
+        offset=start,
+        offset_to_compare=start_to_compare,
+        keys=_slice(keys, start, len(lines)),
+        keys_to_compare=_slice(
+            keys_to_compare, start_to_compare, len(lines_to_compare)
+        ),
+        parallel=parallel,
+    )
+    return [*blocks[:kept], *tail]
+
+
 class Ndiff:
     def __call__(self, text: str, text_to_compare: str) -> str:
-        diff = self._make_diff(text, text_to_compare)
-        return self._format_lines(diff)
+        blocks = diff_blocks(text.splitlines(), text_to_compare.splitlines())
+        return self.format_lines(self.from_blocks(blocks))
 
-    def _make_diff(self, text: str, text_to_compare: str) -> Iterable[str]:
-        return difflib.ndiff(
-            text.splitlines(),
-            text_to_compare.splitlines(),
-        )
+    def from_blocks(self, blocks: Iterable[DiffBlock]) -> list[str]:
+        return [line.rstrip() for line in chain.from_iterable(b.lines for b in blocks)]
+
+    def from_blocks_with_hidden(
+        self, blocks: Iterable[DiffBlock]
+    ) -> tuple[list[str], list[HiddenLines]]:
+        """
+        Output lines and the lines of the full diff hidden in them.
+        """
+        return self.from_blocks(blocks), []
 
-    def _format_lines(self, lines: Iterable[str]) -> str:
-        return "\n".join(line.rstrip() for line in lines)
+    def format_lines(self, lines: Iterable[str]) -> str:
+        return "\n".join(lines)
 
     def highlight_regexps(self) -> list[tuple[HighlightType, str]]:
         return [
@@ -44,23 +561,35 @@ class Ndiff:
 
 
 class NdiffCollapsed(Ndiff):
-    def __init__(self, preserve_rows: int = 2) -> None:
+    def __init__(self, preserve_rows: int = DEFAULT_PRESERVE_ROWS) -> None:
         self.preserve_rows = preserve_rows
         self.delimiter = "[...]"
 
-    def __call__(self, text: str, text_to_compare: str) -> str:
-        diff = self._make_diff(text, text_to_compare)
-        return self._format_lines(self.collapse(diff))
+    def from_blocks(self, blocks: Iterable[DiffBlock]) -> list[str]:
+        return list(self.collapse(super().from_blocks(blocks)))
+
+    def from_blocks_with_hidden(
+        self, blocks: Iterable[DiffBlock]
+    ) -> tuple[list[str], list[HiddenLines]]:
+        hidden: list[HiddenLines] = []
+        lines = list(self.collapse(super().from_blocks(blocks), hidden=hidden))
+        return lines, hidden
 
     def highlight_regexps(self) -> list[tuple[HighlightType, str]]:
         regexps = super().highlight_regexps()
         regexps.append((HighlightType.EXPLANATION, r"(^|\n)\[.*"))
         return regexps
 
-    def collapse(self, lines: Iterable[str]) -> Generator[str, None, None]:
+    def collapse(
+        self, lines: Iterable[str], *, hidden: list[HiddenLines] | None = None
+    ) -> Generator[str, None, None]:
+        """
+        Collapse unchanged lines far from changes into delimiters.
+        Lines behind the delimiters are appended to `hidden` if it's passed.
+        """
         lines_mapping, last_line_num = self._meaningful_lines(lines)
         return self._convert_lines_map_to_list_with_delimiters(
-            lines_mapping, last_line=last_line_num
+            lines_mapping, last_line=last_line_num, hidden=hidden
         )
 
     def _meaningful_lines(self, lines: Iterable[str]) -> tuple[dict[int, str], int]:
@@ -83,17 +612,34 @@ class NdiffCollapsed(Ndiff):
         return result, last_line_num
 
     def _convert_lines_map_to_list_with_delimiters(
-        self, lines_map: dict[int, str], last_line: int
+        self,
+        lines_map: dict[int, str],
+        last_line: int,
+        hidden: list[HiddenLines] | None = None,
     ) -> Generator[str, None, None]:
         prev_line = -1
+        # index of the next output line
+        output_line = 0
         for i in range(last_line + 1):
             if i in lines_map:
                 if i - 1 != prev_line:
+                    if hidden is not None:
+                        hidden.append(
+                            HiddenLines(line=output_line, start=prev_line + 1, end=i)
+                        )
                     yield self.delimiter
+                    output_line += 1
                 yield lines_map[i]
+                output_line += 1
                 prev_line = i
 
         if lines_map and last_line not in lines_map:
+            if hidden is not None:
+                hidden.append(
+                    HiddenLines(
+                        line=output_line, start=prev_line + 1, end=last_line + 1
+                    )
+                )
             yield self.delimiter
 
 
@@ -107,11 +653,139 @@ diff_func_mapping = {
 class DiffResult:
     text: str
     highlight_regexps: list[tuple[HighlightType, str]]
+    diff_type: DiffType = DiffType.NDIFF
+    lines: list[str] = field(default_factory=list)
+    source_lines: Sequence[str] = field(default_factory=list)
+    source_lines_to_compare: Sequence[str] = field(default_factory=list)
+    blocks: list[DiffBlock] = field(default_factory=list)
+    stats: DiffStats = field(default_factory=DiffStats)
+    # indexes of `lines` where hunks start, for jumping between changes
+    hunks: list[int] = field(default_factory=list)
+    normalization: Normalization = field(default_factory=Normalization)
+    # lines of the full diff behind the delimiters of a collapsed diff
+    hidden: list[HiddenLines] = field(default_factory=list)
+
 
+def create_diff(
+    text: str,
+    text_to_compare: str,
+    diff_type: DiffType,
+    *,
+    previous: DiffResult | None = None,
+    normalization: Normalization | None = None,
+    lines: Sequence[str] | None = None,
+    lines_to_compare: Sequence[str] | None = None,
+    parallel: bool = True,
+    on_stats: Callable[[DiffStats], None] | None = None,
+) -> DiffResult:
+    """
+    Create a diff of two texts. `lines` and `lines_to_compare` are the texts
+    already split into lines, e.g. `Content.lines`.
+    With `parallel=False` big texts are not diffed in worker processes,
+    e.g. when the diff is created in a worker process itself.
 
-def create_diff(text: str, text_to_compare: str, diff_type: DiffType) -> DiffResult:
+    If `previous` result is passed, only the part of the texts starting at the
+    first changed line is diffed again.
+    With `normalization`, lines are matched by their normalized versions,
+    but the diff shows the original lines.
+    `on_stats` is called with the stats of a diff made from scratch before
+    it is formatted, e.g. to show them while a big diff is formatted.
+    """
     differ = diff_func_mapping[diff_type]
+    normalization = normalization or Normalization()
+    source_lines = text.splitlines() if lines is None else lines
+    source_lines_to_compare = (
+        text_to_compare.splitlines() if lines_to_compare is None else lines_to_compare
+    )
+    keys: Sequence[Hashable] | None = None
+    keys_to_compare: Sequence[Hashable] | None = None
+    if normalization and text != text_to_compare:
+        # cached tuples, so the matcher of an unchanged side is reused
+        keys = normalized_lines(text, normalization)
+        keys_to_compare = normalized_lines(text_to_compare, normalization)
+    if text == text_to_compare:
+        # instant for content from the store: equal texts are the same object
+        blocks = equal_blocks(source_lines)
+    elif (
+        previous is not None
+        and previous.blocks
+        and previous.normalization == normalization
+    ):
+        blocks = update_diff_blocks(
+            previous.blocks,
+            old_lines=previous.source_lines,
+            old_lines_to_compare=previous.source_lines_to_compare,
+            lines=source_lines,
+            lines_to_compare=source_lines_to_compare,
+            keys=keys,
+            keys_to_compare=keys_to_compare,
+            parallel=parallel,
+        )
+    else:
+        blocks = diff_blocks(
+            source_lines,
+            source_lines_to_compare,
+            keys=keys,
+            keys_to_compare=keys_to_compare,
+            parallel=parallel,
+            on_stats=on_stats,
+        )
+    lines, hidden = differ.from_blocks_with_hidden(blocks)
     return DiffResult(
-        text=differ(text, text_to_compare),
+        text=differ.format_lines(lines),
         highlight_regexps=differ.highlight_regexps(),
+        diff_type=diff_type,
+        lines=lines,
+        source_lines=source_lines,
+        source_lines_to_compare=source_lines_to_compare,
+        blocks=blocks,
+        stats=DiffStats.from_opcodes(
+            (b.tag, b.lo, b.hi, b.lo_to_compare, b.hi_to_compare) for b in blocks
+        ),
+        hunks=hunk_starts(blocks, hidden),
+        normalization=normalization,
+        hidden=hidden,
+    )
+
+
+def expand_hidden(result: DiffResult, index: int) -> DiffResult:
+    """
+    Show the lines behind the `index`-th delimiter of a collapsed diff.
+    The lines are taken from the diff blocks, the texts aren't diffed again.
+    """
+    expanded = result.hidden[index]
+    line, next_line = expanded.line, expanded.line + 1
+    shown = full_diff_lines(result.blocks, expanded.start, expanded.end)
+    lines = result.lines[:line] + shown + result.lines[next_line:]
+    shift = len(shown) - 1
+    hidden = result.hidden[:index] + [
+        HiddenLines(line=h.line + shift, start=h.start, end=h.end)
+        for h in result.hidden
+        if h.line > line
+    ]
+    return replace(
+        result,
+        text=diff_func_mapping[result.diff_type].format_lines(lines),
+        lines=lines,
+        hunks=[hunk + shift if hunk > line else hunk for hunk in result.hunks],
+        hidden=hidden,
+    )
+
+
+def recollapse(result: DiffResult, preserve_rows: int) -> DiffResult:
+    """
+    Collapse the diff again with `preserve_rows` unchanged lines around
+    changes, e.g. after some of the lines were expanded. The diff blocks are
+    collapsed, the texts aren't diffed again.
+    """
+    if result.diff_type is not DiffType.NDIFF_COLLAPSED:
+        return result
+    differ = NdiffCollapsed(preserve_rows)
+    lines, hidden = differ.from_blocks_with_hidden(result.blocks)
+    return replace(
+        result,
+        text=differ.format_lines(lines),
+        lines=lines,
+        hunks=hunk_starts(result.blocks, hidden),
+        hidden=hidden,
     )
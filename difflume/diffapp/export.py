@@ -0,0 +1,171 @@
+"""
+Export of diffs to unified patches and HTML. The output is generated
+line by line from the diff blocks and written as it's generated, without
+building the whole document or highlighting the diff again.
+"""
+from __future__ import annotations
+
+import html
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable, Sequence
+
+    from difflume.diffapp.differ import DiffResult
+
+Opcode = tuple[str, int, int, int, int]
+
+CONTEXT_LINES = 3
+HTML_EXTENSIONS = frozenset({".html", ".htm"})
+# same colors as in the diff panel
+HTML_CLASSES = {"+": "added", "-": "removed", "?": "explanation", "[": "explanation"}
+HTML_HEAD = """\
+<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ background: #1e1e1e; color: #e0e0e0; margin: 0; }}
+h1 {{ font: bold 14px sans-serif; padding: 8px; margin: 0; }}
+.diff {{ font: 13px monospace; padding: 8px; }}
+.diff div {{ white-space: pre-wrap; min-height: 1.2em; }}
+.added {{ background: #005f00; }}
+.removed {{ background: #800000; }}
+.explanation {{ color: #808080; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div class="diff">
+"""
+HTML_TAIL = """\
+</div>
+</body>
+</html>
+"""
+
+
+def _merge_equal(opcodes: Iterable[Opcode]) -> list[Opcode]:
+    """
+    Merge adjacent `equal` opcodes, e.g. at the boundaries of segments
+    of a parallel diff.
+    """
+    merged: list[Opcode] = []
+    for opcode in opcodes:
+        if merged and opcode[0] == "equal" == merged[-1][0]:
+            _, i1, _, j1, _ = merged[-1]
+            merged[-1] = ("equal", i1, opcode[2], j1, opcode[4])
+        else:
+            merged.append(opcode)
+    return merged
+
+
+def group_opcodes(
+    opcodes: Iterable[Opcode], context: int = CONTEXT_LINES
+) -> Generator[list[Opcode], None, None]:
+    """
+    Same as `difflib.SequenceMatcher.get_grouped_opcodes`, but for opcodes
+    that are already computed.
+    """
+    codes = _merge_equal(opcodes)
+    if not codes:
+        codes = [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # split the group at big unchanged ranges
+        if tag == "equal" and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range(start: int, stop: int) -> str:
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return str(beginning)
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def iter_unified(
+    result: DiffResult,
+    *,
+    fromfile: str,
+    tofile: str,
+    context: int = CONTEXT_LINES,
+) -> Generator[str, None, None]:
+    """
+    Lines of the unified diff. Lines that are equal only after normalization
+    are context lines with the text of the first file.
+    """
+    lines: Sequence[str] = result.source_lines
+    lines_to_compare: Sequence[str] = result.source_lines_to_compare
+    opcodes = (
+        (b.tag, b.lo, b.hi, b.lo_to_compare, b.hi_to_compare) for b in result.blocks
+    )
+    started = False
+    for group in group_opcodes(opcodes, context):
+        if not started:
+            started = True
+            yield f"--- {fromfile}\n"
+            yield f"+++ {tofile}\n"
+        first, last = group[0], group[-1]
+        old_range = _format_range(first[1], last[2])
+        new_range = _format_range(first[3], last[4])
+        yield f"@@ -{old_range} +{new_range} @@\n"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in lines[i1:i2]:
+                    yield f" {line}\n"
+                continue
+            if tag in {"replace", "delete"}:
+                for line in lines[i1:i2]:
+                    yield f"-{line}\n"
+            if tag in {"replace", "insert"}:
+                for line in lines_to_compare[j1:j2]:
+                    yield f"+{line}\n"
+
+
+def iter_html(lines: Iterable[str], *, title: str) -> Generator[str, None, None]:
+    """
+    Self-contained HTML page with the diff lines, highlighted as in the diff
+    panel.
+    """
+    yield HTML_HEAD.format(title=html.escape(title))
+    for line in lines:
+        css_class = HTML_CLASSES.get(line[:1])
+        attrs = f' class="{css_class}"' if css_class else ""
+        yield f"<div{attrs}>{html.escape(line)}</div>\n"
+    yield HTML_TAIL
+
+
+def export_diff(
+    result: DiffResult, path: str | Path, *, fromfile: str, tofile: str
+) -> None:
+    """
+    Write the diff to a file: HTML if the file has `.html` extension,
+    a unified patch otherwise.
+    """
+    path = Path(path)
+    chunks: Iterable[str]
+    if path.suffix.lower() in HTML_EXTENSIONS:
+        chunks = iter_html(result.lines, title=f"{fromfile} → {tofile}")
+    else:
+        chunks = iter_unified(result, fromfile=fromfile, tofile=tofile)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        f.writelines(chunks)
@@ -0,0 +1,308 @@
+"""
+Index of files under a directory for the fuzzy file finder. The index is
+built in a background thread, skipping files from `.gitignore`/`.ignore`,
+and saved between sessions, so the finder shows results right away and
+refreshes them when the scan completes.
+"""
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import heapq
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from difflume.settings import env_str
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable, Sequence
+
+IGNORE_FILES = (".gitignore", ".ignore")
+# skipped even without ignore files
+ALWAYS_IGNORED = frozenset({".git", ".hg", ".svn"})
+# paths passed to the finder at once while scanning
+SCAN_BATCH_SIZE = 1000
+DEFAULT_MAX_RESULTS = 100
+# characters after which a match starts a new word
+WORD_SEPARATORS = frozenset("/\\_-. ")
+BOUNDARY_BONUS = 8
+CONSECUTIVE_BONUS = 10
+NAME_BONUS = 2
+# characters skipped between matches cost a point each, up to this
+MAX_GAP_PENALTY = 3
+
+
+@dataclass(frozen=True, kw_only=True)
+class IgnorePattern:
+    """
+    Pattern of an ignore file. Anchored patterns (with a slash not at
+    the end) match paths relative to the directory of the ignore file,
+    others match names at any depth.
+    """
+
+    regex: re.Pattern[str]
+    negated: bool = False
+    dir_only: bool = False
+    anchored: bool = False
+
+    @classmethod
+    def parse(cls, line: str) -> IgnorePattern | None:
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            return None
+        negated = line.startswith("!")
+        line = line.removeprefix("!").removeprefix("\\")
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        line = line.removeprefix("/").removeprefix("**/")
+        if not line:
+            return None
+        return cls(
+            regex=re.compile(fnmatch.translate(line)),
+            negated=negated,
+            dir_only=dir_only,
+            anchored=anchored,
+        )
+
+
+def read_ignore_patterns(directory: str) -> list[IgnorePattern]:
+    patterns: list[IgnorePattern] = []
+    for name in IGNORE_FILES:
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                lines = f.readlines()
+        except (OSError, UnicodeDecodeError):
+            continue
+        patterns.extend(filter(None, map(IgnorePattern.parse, lines)))
+    return patterns
+
+
+def is_ignored(
+    rules: Sequence[tuple[str, IgnorePattern]], path: str, name: str, *, is_dir: bool
+) -> bool:
+    """
+    Whether the path is ignored by the rules, pairs of the directory of the
+    ignore file and its pattern. The last matching pattern decides.
+    """
+    ignored = False
+    for base, pattern in rules:
+        if pattern.dir_only and not is_dir:
+            continue
+        subject = name
+        if pattern.anchored:
+            offset = len(base) + 1 if base else 0
+            subject = path[offset:]
+        if pattern.regex.match(subject):
+            ignored = not pattern.negated
+    return ignored
+
+
+IgnoreRules = list[tuple[str, IgnorePattern]]
+
+
+def _read_directory(
+    root: str, directory: str, rules: IgnoreRules
+) -> tuple[list[str], list[str]]:
+    """
+    Files and subdirectories of the directory that are not ignored.
+    """
+    try:
+        with os.scandir(os.path.join(root, directory)) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return [], []
+    files: list[str] = []
+    subdirectories: list[str] = []
+    for entry in entries:
+        if entry.name in ALWAYS_IGNORED:
+            continue
+        path = f"{directory}/{entry.name}" if directory else entry.name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_ignored(rules, path, entry.name, is_dir=is_dir):
+            continue
+        (subdirectories if is_dir else files).append(path)
+    return files, subdirectories
+
+
+def scan_files(root: str) -> Generator[list[str], None, None]:
+    """
+    Paths of files under the root relative to it, in batches.
+    Directories are walked depth-first in the order of names.
+    """
+    batch: list[str] = []
+    # directories to walk with ignore rules of their parents
+    stack: list[tuple[str, IgnoreRules]] = [("", [])]
+    while stack:
+        directory, rules = stack.pop()
+        patterns = read_ignore_patterns(os.path.join(root, directory))
+        rules = rules + [(directory, pattern) for pattern in patterns]
+        files, subdirectories = _read_directory(root, directory, rules)
+        batch.extend(files)
+        if len(batch) >= SCAN_BATCH_SIZE:
+            yield batch
+            batch = []
+        stack.extend((path, rules) for path in reversed(subdirectories))
+    yield batch
+
+
+def default_cache_dir() -> str:
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return env_str("CACHE_DIR", os.path.join(cache_home, "difflume"))
+
+
+class FileIndex:
+    """
+    Files under the root. `paths` grows while the first scan goes on,
+    later scans replace it when they complete.
+    """
+
+    def __init__(self, root: str, *, cache_dir: str | None = None) -> None:
+        self.root = os.path.abspath(root)
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.paths: list[str] = []
+        self.complete = False
+
+    @property
+    def cache_path(self) -> str:
+        digest = hashlib.blake2b(os.fsencode(self.root), digest_size=8).hexdigest()
+        return os.path.join(self.cache_dir, f"files-{digest}")
+
+    def load_cache(self) -> bool:
+        try:
+            with open(self.cache_path, encoding="utf-8", errors="surrogateescape") as f:
+                cached = f.read()
+        except OSError:
+            return False
+        self.paths = cached.split("\0") if cached else []
+        return True
+
+    def save_cache(self) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                errors="surrogateescape",
+                dir=self.cache_dir,
+                delete=False,
+            ) as f:
+                f.write("\0".join(self.paths))
+            os.replace(f.name, self.cache_path)
+        except OSError:
+            # the cache only speeds up the next start
+            return
+
+    def scan(self, on_batch: Callable[[], None] | None = None) -> None:
+        """
+        Scan the files, blocking, call from a thread. `on_batch` is called
+        when new paths are found.
+        """
+        found: list[str] = []
+        # without cached paths, the found ones are shown as they come
+        if not self.paths:
+            self.paths = found
+        for batch in scan_files(self.root):
+            found.extend(batch)
+            if on_batch is not None and self.paths is found:
+                on_batch()
+        self.paths = found
+        self.complete = True
+        self.save_cache()
+
+
+def _match_score(query: str, text: str, start: int, name_start: int) -> int | None:
+    score, position, previous = 0, start, -2
+    for char in query:
+        found = text.find(char, position)
+        if found == -1:
+            return None
+        if found == previous + 1:
+            score += CONSECUTIVE_BONUS
+        if found == 0 or text[found - 1] in WORD_SEPARATORS:
+            score += BOUNDARY_BONUS
+        if found >= name_start:
+            score += NAME_BONUS
+        score -= min(found - position, MAX_GAP_PENALTY)
+        previous, position = found, found + 1
+    return score
+
+
+def fuzzy_score(query: str, path: str) -> int | None:
+    """
+    Score of the query characters found in the path in order, ignoring
+    case, or None if they are not. Matches at word starts, consecutive
+    matches and matches in the file name score higher.
+    """
+    lowered = path.lower()
+    query = query.lower()
+    name_start = lowered.rfind("/") + 1
+    in_name = _match_score(query, lowered, name_start, name_start)
+    if in_name is not None:
+        return in_name
+    return _match_score(query, lowered, 0, name_start)
+
+
+def fuzzy_filter(paths: Sequence[str], query: str) -> list[str]:
+    """
+    Paths that have the query characters in order, ignoring case.
+    Characters are matched greedily, in linear time of the path length.
+    """
+    query = query.lower()
+    matched = []
+    for path in paths:
+        chars = iter(path.lower())
+        if all(char in chars for char in query):
+            matched.append(path)
+    return matched
+
+
+def rank_matches(
+    paths: Iterable[str], query: str, *, limit: int = DEFAULT_MAX_RESULTS
+) -> list[str]:
+    """
+    Best matches of the query, better and shorter paths first.
+    """
+    scored = []
+    for path in paths:
+        score = fuzzy_score(query, path)
+        if score is not None:
+            scored.append((-score, len(path), path))
+    return [path for _, _, path in heapq.nsmallest(limit, scored)]
+
+
+class FileSearch:
+    """
+    Searches in the index as the query is typed. A query that extends
+    the previous one is searched only in the paths the previous one matched.
+    """
+
+    def __init__(self, index: FileIndex) -> None:
+        self.index = index
+        # searched paths, their number, the query and the matched paths
+        self._previous: tuple[list[str], int, str, list[str]] | None = None
+
+    def search(self, query: str, *, limit: int = DEFAULT_MAX_RESULTS) -> list[str]:
+        paths = self.index.paths
+        # the list grows during the first scan
+        size = len(paths)
+        if not query:
+            return paths[:limit]
+        candidates: Sequence[str] = paths
+        if self._previous is not None:
+            previous_paths, previous_size, previous_query, matched = self._previous
+            if (
+                previous_paths is paths
+                and previous_size == size
+                and query.startswith(previous_query)
+            ):
+                candidates = matched
+        matched = fuzzy_filter(candidates, query)
+        self._previous = paths, size, query, matched
+        return rank_matches(matched, query, limit=limit)
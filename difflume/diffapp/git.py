@@ -0,0 +1,198 @@
+"""
+Access to a local git repository through the `git` command.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from asyncio.subprocess import Process as AsyncProcess
+    from collections.abc import Iterable, Sequence
+
+# separates records of `git log` output
+RECORD_SEPARATOR = "\x1e"
+
+
+class GitError(Exception):
+    pass
+
+
+async def run_git(*args: str, cwd: str) -> bytes:
+    """
+    Run a git command and return its output.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        raise GitError(f"Could not run git: {e}") from e
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise GitError(stderr.decode(errors="replace").strip())
+    return stdout
+
+
+@dataclass(frozen=True, kw_only=True)
+class FileCommit:
+    commit: str
+    # path of the file in the commit, relative to the repository root
+    path: str
+
+
+async def file_log(path: str) -> list[FileCommit]:
+    """
+    List commits that touched the file, newest first. Renames are followed,
+    so each commit comes with the path the file had in it.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    output = await run_git(
+        "log",
+        "-z",
+        f"--format={RECORD_SEPARATOR}%h",
+        "--name-only",
+        "--follow",
+        # commits that removed the file have nothing to show
+        "--diff-filter=d",
+        "--",
+        name,
+        cwd=directory,
+    )
+    commits = []
+    for record in os.fsdecode(output).split(RECORD_SEPARATOR):
+        commit, _, names = record.partition("\0")
+        file_path = names.removeprefix("\n").partition("\0")[0]
+        # merge commits don't list files
+        if commit and file_path:
+            commits.append(FileCommit(commit=commit, path=file_path))
+    return commits
+
+
+async def resolve_commit(spec: str, *, cwd: str) -> str:
+    """
+    Full hash of the commit the spec names: a hash of any length, a ref like
+    `HEAD~2` or a tag. Raise `GitError` if there is no such commit.
+    """
+    output = await run_git("rev-parse", "--verify", f"{spec}^{{commit}}", cwd=cwd)
+    return os.fsdecode(output).strip()
+
+
+async def commits_summary(commits: Sequence[str], *, cwd: str) -> dict[str, str]:
+    """
+    Short descriptions of the commits: date, author and subject.
+    """
+    if not commits:
+        return {}
+    output = await run_git(
+        "log",
+        "--no-walk=unsorted",
+        "-z",
+        "--date=short",
+        "--format=%ad %an: %s",
+        *commits,
+        "--",
+        cwd=cwd,
+    )
+    return dict(zip(commits, os.fsdecode(output).split("\0")))
+
+
+class CatFileBatch:
+    """
+    Long-lived `git cat-file --batch` process. Objects are requested by
+    writing their names to its stdin and read back from its stdout, so
+    loading many objects doesn't spawn a process per object.
+    """
+
+    def __init__(self, cwd: str) -> None:
+        self._cwd = cwd
+        self._process: AsyncProcess | None = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_started(self) -> AsyncProcess:
+        if self._process is None or self._process.returncode is not None:
+            try:
+                self._process = await asyncio.create_subprocess_exec(
+                    "git",
+                    "cat-file",
+                    "--batch",
+                    cwd=self._cwd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+            except OSError as e:
+                raise GitError(f"Could not run git: {e}") from e
+        return self._process
+
+    async def read(self, name: str) -> bytes | None:
+        """
+        Read the object, e.g. `HEAD:path/to/file`.
+        Return None if there is no such object.
+        """
+        (data,) = await self.read_many([name])
+        return data
+
+    async def read_many(self, names: Sequence[str]) -> list[bytes | None]:
+        """
+        Read several objects in one round trip. Names are written while
+        the objects are read, so the pipes can't fill up and block git.
+        """
+        async with self._lock:
+            process = await self._ensure_started()
+            writer = asyncio.create_task(self._write_names(process, names))
+            try:
+                result = [await self._read_object(process) for _ in names]
+                await writer
+            except BaseException:
+                writer.cancel()
+                # the output is out of sync with the requests now
+                await self._terminate()
+                raise
+        return result
+
+    @staticmethod
+    async def _write_names(process: AsyncProcess, names: Iterable[str]) -> None:
+        assert process.stdin, "Pipes must be opened"
+        for name in names:
+            process.stdin.write(os.fsencode(name) + b"\n")
+        await process.stdin.drain()
+
+    @staticmethod
+    async def _read_object(process: AsyncProcess) -> bytes | None:
+        assert process.stdout, "Pipes must be opened"
+        header = await process.stdout.readline()
+        if not header:
+            raise GitError("git cat-file exited unexpectedly")
+        # "<oid> <type> <size>" or "<name> missing"
+        *_, size = header.split()
+        if size in (b"missing", b"ambiguous"):
+            return None
+        try:
+            data = await process.stdout.readexactly(int(size) + 1)
+        except asyncio.IncompleteReadError as e:
+            raise GitError("git cat-file exited unexpectedly") from e
+        return data[:-1]
+
+    async def _terminate(self) -> None:
+        process, self._process = self._process, None
+        if process is None or process.returncode is not None:
+            return
+        if process.stdin:
+            process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._terminate()
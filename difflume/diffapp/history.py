@@ -0,0 +1,293 @@
+"""
+Scanning the history of a module: which JSON paths and lines changed
+at each revision, and bisecting revisions by a predicate.
+"""
+from __future__ import annotations
+
+import asyncio
+import difflib
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from difflume.diffapp.modules import Content, RevisionNotFoundError, TextType
+from difflume.diffapp.workers import process_pool
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable, Sequence
+    from concurrent.futures import Executor
+
+    from difflume.diffapp.modules import Module
+
+# revisions are loaded in batches of this size
+LOAD_BATCH_SIZE = 50
+
+_MISSING = object()
+
+
+def escape_pointer_token(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def json_pointer_get(data: Any, pointer: str) -> Any:
+    """
+    Get the value by JSON pointer (RFC 6901), e.g. `/nested/key`.
+    Raise `KeyError` if there is no such value.
+    """
+    if not pointer:
+        return data
+    for token in pointer.removeprefix("/").split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(data, dict) and token in data:
+            data = data[token]
+        elif isinstance(data, list) and token.isdigit() and int(token) < len(data):
+            data = data[int(token)]
+        else:
+            raise KeyError(pointer)
+    return data
+
+
+def _same(old: Any, new: Any) -> bool:
+    # 1 == 1.0 == True, but the JSON is different
+    return type(old) is type(new) and old == new
+
+
+def changed_paths(old: Any, new: Any, pointer: str = "") -> Generator[str, None, None]:
+    """
+    Yield JSON pointers of changed values. Added, removed and replaced
+    subtrees are yielded as a whole, without their descendants.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in sorted(old.keys() | new.keys()):
+            yield from changed_paths(
+                old.get(key, _MISSING),
+                new.get(key, _MISSING),
+                f"{pointer}/{escape_pointer_token(key)}",
+            )
+    elif isinstance(old, list) and isinstance(new, list):
+        for i in range(max(len(old), len(new))):
+            yield from changed_paths(
+                old[i] if i < len(old) else _MISSING,
+                new[i] if i < len(new) else _MISSING,
+                f"{pointer}/{i}",
+            )
+    elif not _same(old, new):
+        yield pointer
+
+
+def value_paths(value: Any, pointer: str) -> Generator[str, None, None]:
+    """
+    Yield JSON pointers of all values nested in the value.
+    """
+    if isinstance(value, dict):
+        items: Iterable[tuple[str, Any]] = (
+            (escape_pointer_token(key), item) for key, item in value.items()
+        )
+    elif isinstance(value, list):
+        items = ((str(i), item) for i, item in enumerate(value))
+    else:
+        return
+    for token, item in items:
+        yield f"{pointer}/{token}"
+        yield from value_paths(item, f"{pointer}/{token}")
+
+
+def _parse_json(content: Content | None) -> Any:
+    if content is None:
+        return _MISSING
+    if content.text_type is not TextType.JSON:
+        return None
+    return json.loads(content.text)
+
+
+@dataclass(frozen=True, kw_only=True)
+class RevisionChanges:
+    revision: str
+    # None for the first revision
+    previous: str | None
+    paths: frozenset[str]
+    added: tuple[str, ...]
+    removed: tuple[str, ...]
+
+    def touches_path(self, pointer: str) -> bool:
+        """
+        Whether the value at `pointer` or its descendant changed.
+        """
+        pointer = pointer.rstrip("/")
+        return any(
+            path == pointer or path.startswith(f"{pointer}/") for path in self.paths
+        )
+
+    def touches_text(self, text: str) -> bool:
+        """
+        Whether lines that contain `text` were added or removed.
+        """
+        return any(text in line for line in (*self.added, *self.removed))
+
+
+def compare_revisions(
+    revision: str,
+    previous: str | None,
+    old: Content | None,
+    new: Content,
+) -> RevisionChanges:
+    """
+    Find changes between two consecutive revisions.
+    Runs in a worker process, so everything here must be picklable.
+    """
+    old_lines = old.text.splitlines() if old is not None else []
+    new_lines = new.text.splitlines()
+    added: list[str] = []
+    removed: list[str] = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            removed.extend(old_lines[i1:i2])
+            added.extend(new_lines[j1:j2])
+
+    paths: set[str] = set()
+    if new.text_type is TextType.JSON:
+        old_data, new_data = _parse_json(old), _parse_json(new)
+        for path in changed_paths(old_data, new_data):
+            paths.add(path)
+            # values in added, removed or replaced subtrees changed too,
+            # but not paths that exist in neither revision
+            for data in (old_data, new_data):
+                try:
+                    paths.update(value_paths(json_pointer_get(data, path), path))
+                except KeyError:
+                    continue
+    return RevisionChanges(
+        revision=revision,
+        previous=previous,
+        paths=frozenset(paths),
+        added=tuple(added),
+        removed=tuple(removed),
+    )
+
+
+class HistoryIndex:
+    """
+    Changes made at each revision, newest first.
+    """
+
+    def __init__(self, changes: Sequence[RevisionChanges]) -> None:
+        self.changes = list(changes)
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def revisions_touching_path(self, pointer: str) -> list[str]:
+        return [c.revision for c in self.changes if c.touches_path(pointer)]
+
+    def revisions_touching_text(self, text: str) -> list[str]:
+        return [c.revision for c in self.changes if c.touches_text(text)]
+
+    def search(self, query: str) -> list[str]:
+        """
+        Revisions that changed the JSON path (if the query starts with `/`)
+        or lines containing the query, newest first.
+        """
+        if query.startswith("/"):
+            return self.revisions_touching_path(query)
+        return self.revisions_touching_text(query)
+
+
+async def load_all_revisions(module: Module) -> list[str]:
+    """
+    Load all revisions of the module in batches.
+    Return revisions that were actually loaded.
+    """
+    for start in range(0, len(module.revisions), LOAD_BATCH_SIZE):
+        await module.load_revisions(module.revisions[start:][:LOAD_BATCH_SIZE])
+    return [rev for rev in module.revisions if rev in module.revisions_content]
+
+
+async def scan_history(
+    module: Module, *, executor: Executor | None = None
+) -> HistoryIndex:
+    """
+    Diff each revision of the module with the previous one in a pool
+    of workers and index the changes.
+    """
+    revisions = await load_all_revisions(module)
+    loop = asyncio.get_running_loop()
+    executor = executor or process_pool()
+    tasks: list[asyncio.Future[RevisionChanges]] = []
+    for i, revision in enumerate(revisions):
+        previous = revisions[i + 1] if i + 1 < len(revisions) else None
+        old = module.get_content(previous) if previous is not None else None
+        new = module.get_content(revision)
+        if old is new:
+            # equal revisions share the content from the store
+            unchanged = loop.create_future()
+            unchanged.set_result(
+                RevisionChanges(
+                    revision=revision,
+                    previous=previous,
+                    paths=frozenset(),
+                    added=(),
+                    removed=(),
+                )
+            )
+            tasks.append(unchanged)
+            continue
+        tasks.append(
+            loop.run_in_executor(
+                executor, compare_revisions, revision, previous, old, new
+            )
+        )
+    return HistoryIndex(await asyncio.gather(*tasks))
+
+
+async def bisect_revisions(
+    module: Module, predicate: Callable[[Content], bool]
+) -> str | None:
+    """
+    Find the oldest revision of the run of newest revisions for which
+    the predicate holds, e.g. the revision where a value appeared.
+    The predicate must hold for some newest revisions and not hold for
+    all revisions before them. Only O(log n) revisions are loaded.
+    Return None if the predicate doesn't hold for the newest revision.
+    """
+    revisions = module.revisions
+
+    async def check(index: int) -> bool:
+        await module.load_revision(revisions[index])
+        try:
+            return predicate(module.get_content(revisions[index]))
+        except RevisionNotFoundError:
+            return False
+
+    if not revisions or not await check(0):
+        return None
+    # predicate holds at `low` and doesn't hold after `high`
+    low, high = 0, len(revisions) - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if await check(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return revisions[low]
+
+
+def value_at(pointer: str) -> Callable[[Content], Any]:
+    def get(content: Content) -> Any:
+        try:
+            return json_pointer_get(_parse_json(content), pointer)
+        except KeyError:
+            return _MISSING
+
+    return get
+
+
+async def find_value_introduced(module: Module, pointer: str) -> str | None:
+    """
+    Bisect for the revision where the value at `pointer` got its latest value.
+    """
+    get = value_at(pointer)
+    latest = get(module.get_content())
+    if latest is _MISSING:
+        return None
+    return await bisect_revisions(module, lambda content: _same(get(content), latest))
@@ -0,0 +1,198 @@
+"""
+Streaming canonicalization of JSON documents.
+
+`iter_canonical_lines(text)` yields the same lines as
+`json.dumps(json.loads(text), indent=2, sort_keys=True, ensure_ascii=False)`
+without building Python objects for the whole document. Arrays are emitted
+item by item; for objects only the sorted list of keys with positions of
+their values in the source text is kept, so memory usage depends on the
+nesting depth and the number of keys in open objects, not on the size of
+the document.
+"""
+from __future__ import annotations
+
+import json
+import re
+from json import JSONDecodeError
+from typing import TYPE_CHECKING, Any, TypeAlias
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_decoder = json.JSONDecoder()
+
+LineGenerator: TypeAlias = "Generator[str, None, int]"
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    match = _WHITESPACE.match(text, pos)
+    assert match is not None, "Whitespace pattern always matches"
+    return match.end()
+
+
+def _skip_container(text: str, pos: int) -> int:
+    """
+    Return the position after the container that starts at `pos`.
+    The content isn't validated here, it's done when the container is emitted.
+    """
+    depth = 0
+    while match := _STRUCTURE.search(text, pos):
+        char = match.group()
+        pos = match.end()
+        if char == '"':
+            pos = _skip_string(text, pos)
+        elif char in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+    raise JSONDecodeError("Unterminated container", text, pos)
+
+
+def _skip_string(text: str, pos: int) -> int:
+    """
+    Return the position after the string whose body starts at `pos`.
+    """
+    start = pos
+    while match := _STRING_SPECIAL.search(text, pos):
+        if match.group() == '"':
+            return match.end()
+        # skip escaped character
+        pos = match.end() + 1
+    raise JSONDecodeError("Unterminated string starting at", text, start - 1)
+
+
+def _parse_scalar(text: str, pos: int) -> tuple[Any, int]:
+    return _decoder.raw_decode(text, pos)
+
+
+def _expect(text: str, pos: int, char: str, message: str) -> int:
+    if not text.startswith(char, pos):
+        raise JSONDecodeError(message, text, pos)
+    return _skip_whitespace(text, pos + 1)
+
+
+def _object_members(text: str, pos: int) -> tuple[dict[str, Any], int]:
+    """
+    Parse members of the object starting after `{` at `pos`.
+    Containers are not parsed, only the positions where they start are kept.
+    Return the members and the position after the object.
+    """
+    members: dict[str, Any] = {}
+    pos = _skip_whitespace(text, pos)
+    if text.startswith("}", pos):
+        return members, pos + 1
+    while True:
+        if not text.startswith('"', pos):
+            raise JSONDecodeError(
+                "Expecting property name enclosed in double quotes", text, pos
+            )
+        key, pos = _parse_scalar(text, pos)
+        pos = _skip_whitespace(text, pos)
+        pos = _expect(text, pos, ":", "Expecting ':' delimiter")
+        if text.startswith(("{", "["), pos):
+            members[key] = _ContainerAt(pos)
+            pos = _skip_container(text, pos)
+        else:
+            members[key], pos = _parse_scalar(text, pos)
+        pos = _skip_whitespace(text, pos)
+        if text.startswith("}", pos):
+            return members, pos + 1
+        pos = _expect(text, pos, ",", "Expecting ',' delimiter")
+
+
+_dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class _ContainerAt:
+    __slots__ = ("pos",)
+
+    def __init__(self, pos: int) -> None:
+        self.pos = pos
+
+
+class _Emitter:
+    def __init__(self, text: str, indent: int) -> None:
+        self.text = text
+        self.indent = " " * indent
+
+    def emit(self, pos: int, level: int, prefix: str, suffix: str) -> LineGenerator:
+        """
+        Emit lines of the value starting at `pos`.
+        Return the position after the value.
+        """
+        if self.text.startswith("{", pos):
+            return (yield from self._emit_object(pos, level, prefix, suffix))
+        if self.text.startswith("[", pos):
+            return (yield from self._emit_array(pos, level, prefix, suffix))
+        value, end = _parse_scalar(self.text, pos)
+        yield f"{self.indent * level}{prefix}{_dumps(value)}{suffix}"
+        return end
+
+    def _emit_object(
+        self, pos: int, level: int, prefix: str, suffix: str
+    ) -> LineGenerator:
+        members, end = _object_members(self.text, pos + 1)
+        if not members:
+            yield f"{self.indent * level}{prefix}{{}}{suffix}"
+            return end
+        yield f"{self.indent * level}{prefix}{{"
+        keys = sorted(members)
+        last = len(keys) - 1
+        for i, key in enumerate(keys):
+            member_prefix = f"{_dumps(key)}: "
+            member_suffix = "," if i < last else ""
+            value = members.pop(key)
+            if isinstance(value, _ContainerAt):
+                yield from self.emit(value.pos, level + 1, member_prefix, member_suffix)
+            else:
+                yield (
+                    f"{self.indent * (level + 1)}{member_prefix}"
+                    f"{_dumps(value)}{member_suffix}"
+                )
+        yield f"{self.indent * level}}}{suffix}"
+        return end
+
+    def _emit_array(
+        self, pos: int, level: int, prefix: str, suffix: str
+    ) -> LineGenerator:
+        text = self.text
+        pos = _skip_whitespace(text, pos + 1)
+        if text.startswith("]", pos):
+            yield f"{self.indent * level}{prefix}[]{suffix}"
+            return pos + 1
+        yield f"{self.indent * level}{prefix}["
+        while True:
+            # check what follows the item first, because the last line
+            # of the item must end with a comma if it's not the last item
+            if text.startswith(("{", "["), pos):
+                after = _skip_whitespace(text, _skip_container(text, pos))
+                is_last = text.startswith("]", after)
+                yield from self.emit(pos, level + 1, "", "" if is_last else ",")
+            else:
+                value, end = _parse_scalar(text, pos)
+                after = _skip_whitespace(text, end)
+                is_last = text.startswith("]", after)
+                comma = "" if is_last else ","
+                yield f"{self.indent * (level + 1)}{_dumps(value)}{comma}"
+            if is_last:
+                yield f"{self.indent * level}]{suffix}"
+                return after + 1
+            pos = _expect(text, after, ",", "Expecting ',' delimiter")
+
+
+def iter_canonical_lines(text: str, *, indent: int = 2) -> Generator[str, None, None]:
+    """
+    Yield lines of the pretty-printed JSON with sorted keys.
+    Raise `json.JSONDecodeError` if the text is not a valid JSON, possibly
+    after some lines were already yielded.
+    """
+    pos = _skip_whitespace(text, 0)
+    end = yield from _Emitter(text, indent).emit(pos, 0, "", "")
+    end = _skip_whitespace(text, end)
+    if end != len(text):
+        raise JSONDecodeError("Extra data", text, end)
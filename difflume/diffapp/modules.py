@@ -1,36 +1,304 @@
 from __future__ import annotations
 
+import asyncio
 import contextlib
+import hashlib
 import json
+import os
+import re
+import threading
+import weakref
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from json import JSONDecodeError
+from typing import TYPE_CHECKING
 
 from httpx import AsyncClient, HTTPError
 
+from difflume.diffapp.compression import (
+    COMPRESSED_EXTENSIONS,
+    CompressionError,
+    aiter_decompressed,
+)
+from difflume.diffapp.couchdb import ChangesFeedError, changes_feed, split_document_url
+from difflume.diffapp.git import (
+    CatFileBatch,
+    GitError,
+    commits_summary,
+    file_log,
+    resolve_commit,
+)
+from difflume.diffapp.jsonstream import iter_canonical_lines
+from difflume.diffapp.readers import (
+    BinaryFile,
+    FileText,
+    decode_async_chunks,
+    read_bytes,
+    read_file,
+    read_file_from,
+)
+from difflume.diffapp.search import line_starts
+from difflume.diffapp.watch import create_file_watcher
 from difflume.http import url
+from difflume.settings import env_int
+
+if TYPE_CHECKING:
+    from array import array
+    from collections.abc import AsyncIterator, Sequence
 
 
 class TextType(Enum):
     PLAIN = "plain"
     JSON = "json"
+    BINARY = "binary"
 
 
-@dataclass(kw_only=True, frozen=True)
+@dataclass(kw_only=True, frozen=True, slots=True, weakref_slot=True)
 class Content:
+    """
+    Loaded text. The digest and the line index are computed once per content
+    (see `build_index`) and shared by everything that shows or diffs it.
+    Lines are kept as a tuple of strings next to the text, so a text takes
+    about twice its size in memory: the differs match the strings themselves
+    and reuse their state by the identity of the tuple, and hashes of lines
+    as matching keys could hide a changed line. Only the offsets of rendered
+    lines are kept in an array.
+    """
+
     text: str
     text_type: TextType
+    _digest: bytes | None = field(default=None, init=False, repr=False, compare=False)
+    _lines: tuple[str, ...] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _line_starts: array | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def digest(self) -> bytes:
+        """
+        Hash of the text, equal texts have equal digests.
+        """
+        if self._digest is None:
+            data = self.text.encode("utf-8", errors="surrogatepass")
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            object.__setattr__(self, "_digest", digest)
+        return self._digest  # type: ignore[return-value]
+
+    @property
+    def lines(self) -> tuple[str, ...]:
+        """
+        Lines as they are diffed, see `str.splitlines`.
+        """
+        if self._lines is None:
+            return self._build_lines()
+        return self._lines
 
+    @property
+    def line_starts(self) -> array:
+        """
+        Offsets where rendered lines start, for search and scrolling.
+        """
+        if self._line_starts is None:
+            return self._build_line_starts()
+        return self._line_starts
+
+    def _build_lines(self) -> tuple[str, ...]:
+        lines = tuple(self.text.splitlines())
+        object.__setattr__(self, "_lines", lines)
+        return lines
+
+    def _build_line_starts(self) -> array:
+        starts = line_starts(self.text)
+        object.__setattr__(self, "_line_starts", starts)
+        return starts
+
+    def build_index(self) -> None:
+        if self._lines is None:
+            self._build_lines()
+        if self._line_starts is None:
+            self._build_line_starts()
+
+    def __getstate__(self) -> tuple[str, TextType]:
+        # the index is not sent to worker processes
+        return self.text, self.text_type
+
+    def __setstate__(self, state: tuple[str, TextType]) -> None:
+        text, text_type = state
+        Content.__init__(self, text=text, text_type=text_type)
+
+
+class ContentStore:
+    """
+    Content of all modules by hash. The same text loaded several times
+    (e.g. the same URL in both panels or equal revisions) is kept once
+    and indexed once. Content is dropped from the store when
+    no module holds it anymore.
+    """
 
-def parse_content(text: str) -> Content:
-    text_type = TextType.PLAIN
-    with contextlib.suppress(json.JSONDecodeError):
-        text = json.dumps(
-            json.loads(text), indent=2, sort_keys=True, ensure_ascii=False
+    def __init__(self) -> None:
+        self._contents: weakref.WeakValueDictionary[tuple[bytes, TextType], Content] = (
+            weakref.WeakValueDictionary()
         )
-        text_type = TextType.JSON
-    return Content(text=text, text_type=text_type)
+        # content is parsed in worker threads too
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def intern(self, content: Content) -> Content:
+        """
+        Return the stored content equal to this one, or store this one.
+        """
+        key = (content.digest, content.text_type)
+        with self._lock:
+            stored = self._contents.get(key)
+            if stored is None:
+                self._contents[key] = stored = content
+        return stored
+
+
+content_store = ContentStore()
+
+
+def make_content(*, text: str, text_type: TextType) -> Content:
+    """
+    Get the content from the store and index it. Content is made in worker
+    threads for big texts, so the index is built there too.
+    """
+    content = content_store.intern(Content(text=text, text_type=text_type))
+    content.build_index()
+    return content
+
+
+# texts bigger than this are checked more strictly before parsing
+LARGE_TEXT_SIZE = 64 * 1024
+# JSON bigger than this is normalized in a worker thread
+PARSE_IN_THREAD_SIZE = 256 * 1024
+# JSON bigger than this is normalized with the streaming canonicalizer
+DEFAULT_STREAM_JSON_SIZE = 32 * 1024 * 1024
+
+JSON_MIME_TYPES = frozenset({"application/json", "text/json"})
+NOT_JSON_MIME_TYPES = frozenset(
+    {
+        "application/xml",
+        "text/csv",
+        "text/html",
+        "text/markdown",
+        "text/xml",
+    }
+)
+JSON_EXTENSIONS = frozenset({".json", ".geojson", ".har", ".ipynb"})
+NOT_JSON_EXTENSIONS = frozenset(
+    {
+        ".csv",
+        ".html",
+        ".ini",
+        ".jsonl",
+        ".log",
+        ".md",
+        ".ndjson",
+        ".py",
+        ".toml",
+        ".xml",
+        ".yaml",
+        ".yml",
+    }
+)
+JSON_BRACKETS = {"{": "}", "[": "]"}
+_NON_WHITESPACE = re.compile(r"\S")
+
+
+def text_type_from_mime(content_type: str | None) -> TextType | None:
+    """
+    Get text type from `Content-Type` header. Return None if the type
+    doesn't tell anything certain, e.g. for `text/plain`.
+    """
+    if not content_type:
+        return None
+    mime = content_type.partition(";")[0].strip().lower()
+    if mime in JSON_MIME_TYPES or mime.endswith("+json"):
+        return TextType.JSON
+    if mime in NOT_JSON_MIME_TYPES or mime.endswith("+xml"):
+        return TextType.PLAIN
+    return None
+
+
+def text_type_from_path(path: str) -> TextType | None:
+    root, extension = os.path.splitext(path)
+    if extension.lower() in COMPRESSED_EXTENSIONS:
+        # e.g. `dump.json.gz`
+        extension = os.path.splitext(root)[1]
+    extension = extension.lower()
+    if extension in JSON_EXTENSIONS:
+        return TextType.JSON
+    if extension in NOT_JSON_EXTENSIONS:
+        return TextType.PLAIN
+    return None
+
+
+def _last_non_whitespace(text: str) -> str:
+    for i in range(len(text) - 1, -1, -1):
+        if not text[i].isspace():
+            return text[i]
+    return ""
+
+
+def looks_like_json(text: str) -> bool:
+    """
+    Cheap check whether the text can be a JSON object or array.
+    For large texts the closing bracket is checked too, so a log that just
+    starts with `[` doesn't have to go through a failing parse.
+    """
+    match = _NON_WHITESPACE.search(text)
+    if match is None or match.group() not in JSON_BRACKETS:
+        return False
+    if len(text) > LARGE_TEXT_SIZE:
+        return _last_non_whitespace(text) == JSON_BRACKETS[match.group()]
+    return True
+
+
+def parse_content(text: str, *, text_type: TextType | None = None) -> Content:
+    """
+    Parse the text and normalize JSON (sort keys and indent).
+    `text_type` is a hint from the source, e.g. from `Content-Type` header.
+    Without the hint, the type is detected from the text itself.
+    """
+    if text_type is TextType.PLAIN or (text_type is None and not looks_like_json(text)):
+        return make_content(text=text, text_type=TextType.PLAIN)
+    try:
+        if len(text) >= env_int("STREAM_JSON_THRESHOLD", DEFAULT_STREAM_JSON_SIZE):
+            # don't build Python objects for the whole document
+            normalized = "\n".join(iter_canonical_lines(text))
+        else:
+            normalized = json.dumps(
+                json.loads(text), indent=2, sort_keys=True, ensure_ascii=False
+            )
+    except json.JSONDecodeError:
+        return make_content(text=text, text_type=TextType.PLAIN)
+    return make_content(text=normalized, text_type=TextType.JSON)
+
+
+async def parse_content_async(
+    text: str, *, text_type: TextType | None = None
+) -> Content:
+    """
+    Same as `parse_content`, but normalize big JSON documents in a worker
+    thread to not block the event loop.
+    """
+    if len(text) > PARSE_IN_THREAD_SIZE and text_type is not TextType.PLAIN:
+        return await asyncio.to_thread(parse_content, text, text_type=text_type)
+    return parse_content(text, text_type=text_type)
+
+
+async def file_to_content(
+    file: FileText | BinaryFile, *, text_type: TextType | None = None
+) -> Content:
+    if isinstance(file, BinaryFile):
+        return make_content(text=file.describe(), text_type=TextType.BINARY)
+    return await parse_content_async(file.text, text_type=text_type)
 
 
 class RevisionNotFoundError(Exception):
@@ -41,12 +309,25 @@ class ReadError(Exception):
     pass
 
 
+class WatchNotSupportedError(Exception):
+    pass
+
+
 class Module(ABC):
     _content: Content | None
 
     def __init__(self) -> None:
         self.revisions: list[str] = []
         self.revisions_content: dict[str, Content] = {}
+        # short descriptions of revisions, e.g. dates and subjects of commits
+        self.revisions_info: dict[str, str] = {}
+
+    @property
+    def name(self) -> str:
+        """
+        Where the content comes from, e.g. a path or URL.
+        """
+        return type(self).__name__
 
     def get_content(self, revision: str | None = None) -> Content:
         if revision is None:
@@ -87,7 +368,31 @@ class Module(ABC):
         """
         Read the file and return its parsed content.
         """
-        return parse_content(await self._read_text())
+        text = await self._read_text()
+        return await parse_content_async(text, text_type=self.text_type_hint())
+
+    async def find_revision(self, revision: str) -> str | None:
+        """
+        Listed revision given by its prefix, None if there is no such revision.
+        """
+        return next((rev for rev in self.revisions if rev.startswith(revision)), None)
+
+    def text_type_hint(self) -> TextType | None:
+        """
+        Text type known from the source (file extension, `Content-Type` header,
+        etc.) or None if it should be detected from the text.
+        """
+        return None
+
+    def can_watch(self) -> bool:
+        return False
+
+    def watch(self) -> AsyncIterator[None]:
+        """
+        Watch the source for changes. Yields each time the latest content
+        was updated.
+        """
+        raise WatchNotSupportedError(f"{type(self).__name__} can't be watched")
 
     @abstractmethod
     async def _read_text(self) -> str:
@@ -107,6 +412,27 @@ class Module(ABC):
         Load the file at the given revision and cache its contents.
         """
 
+    async def load_revisions(self, revisions: Sequence[str]) -> None:
+        """
+        Load several revisions. Modules that can fetch revisions in one
+        request override this.
+        """
+        for revision in revisions:
+            await self.load_revision(revision)
+
+    async def load_revisions_info(self, revisions: Sequence[str]) -> None:  # noqa: U100
+        """
+        Load descriptions of the revisions into `revisions_info`.
+        Modules without such metadata load nothing.
+        """
+        return None
+
+    async def close(self) -> None:
+        """
+        Release resources held by the module, e.g. subprocesses.
+        """
+        return None
+
 
 class NoRevisionModuleMixin:
     async def read_revisions(self) -> list[str]:
@@ -116,17 +442,243 @@ class NoRevisionModuleMixin:
         return None
 
 
+@dataclass(kw_only=True, frozen=True)
+class FileSnapshot:
+    """
+    State of the file at the moment it was read. Used to detect whether
+    the file was only appended since then.
+    """
+
+    inode: int
+    size: int
+    mtime_ns: int
+    position: int
+    tail: bytes
+
+
 class FSModule(NoRevisionModuleMixin, Module):
+    TAIL_CHECK_SIZE = 4096
+
     def __init__(self, path: str) -> None:
         super().__init__()
         self._path = path
+        self._file: FileText | BinaryFile | None = None
+        self._snapshot: FileSnapshot | None = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def name(self) -> str:
+        return self._path
+
+    async def read_content(self) -> Content:
+        await self._read_text()
+        assert self._file is not None
+        return await self._to_content(self._file)
+
+    def text_type_hint(self) -> TextType | None:
+        return text_type_from_path(self._path)
 
     async def _read_text(self) -> str:
         try:
-            with open(self._path) as f:
-                return f.read()
-        except (OSError, UnicodeDecodeError) as e:
+            file = await asyncio.to_thread(self._read_whole_file)
+        except (OSError, UnicodeDecodeError, CompressionError) as e:
+            raise ReadError(f"Could not read file {self._path}") from e
+        return file.describe() if isinstance(file, BinaryFile) else file.text
+
+    async def _to_content(self, file: FileText | BinaryFile) -> Content:
+        return await file_to_content(file, text_type=self.text_type_hint())
+
+    def _read_whole_file(self) -> FileText | BinaryFile:
+        file = read_file(self._path)
+        position = file.position if isinstance(file, FileText) else file.size
+        self._snapshot = self._take_snapshot(position)
+        self._file = file
+        return file
+
+    def _take_snapshot(self, position: int) -> FileSnapshot:
+        stat = os.stat(self._path)
+        with open(self._path, "rb") as f:
+            f.seek(max(position - self.TAIL_CHECK_SIZE, 0))
+            tail = f.read(min(position, self.TAIL_CHECK_SIZE))
+        return FileSnapshot(
+            inode=stat.st_ino,
+            size=position,
+            mtime_ns=stat.st_mtime_ns,
+            position=position,
+            tail=tail,
+        )
+
+    def _is_appended(self, snapshot: FileSnapshot, stat: os.stat_result) -> bool:
+        if stat.st_ino != snapshot.inode or stat.st_size <= snapshot.size:
+            return False
+        with open(self._path, "rb") as f:
+            f.seek(snapshot.position - len(snapshot.tail))
+            return f.read(len(snapshot.tail)) == snapshot.tail
+
+    def _read_appended_text(self, file: FileText, snapshot: FileSnapshot) -> FileText:
+        appended = read_file_from(
+            self._path, position=snapshot.position, encoding=file.encoding
+        )
+        self._snapshot = self._take_snapshot(appended.position)
+        self._file = FileText(
+            text=file.text + appended.text,
+            encoding=file.encoding,
+            position=appended.position,
+        )
+        return self._file
+
+    def _reread_changed_file(self) -> FileText | BinaryFile | None:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self._read_whole_file()
+        stat = os.stat(self._path)
+        if (stat.st_ino, stat.st_size, stat.st_mtime_ns) == (
+            snapshot.inode,
+            snapshot.size,
+            snapshot.mtime_ns,
+        ):
+            return None
+        if (
+            isinstance(self._file, FileText)
+            # appended compressed data can't be decompressed on its own
+            and self._file.compression is None
+            and self._is_appended(snapshot, stat)
+        ):
+            return self._read_appended_text(self._file, snapshot)
+        return self._read_whole_file()
+
+    async def reload(self) -> bool:
+        """
+        Read the file again if it was changed. If data was only appended
+        to the file, read just the new part.
+        Return True if content was changed.
+        """
+        try:
+            file = await asyncio.to_thread(self._reread_changed_file)
+        except (OSError, UnicodeDecodeError, CompressionError) as e:
             raise ReadError(f"Could not read file {self._path}") from e
+        if file is None:
+            return False
+
+        content = await self._to_content(file)
+        if self.revisions_content.get("latest") == content:
+            return False
+        self.revisions_content["latest"] = content
+        return True
+
+    def can_watch(self) -> bool:
+        return True
+
+    async def watch(self) -> AsyncIterator[None]:
+        async for _ in create_file_watcher(self._path).changes():
+            if await self.reload():
+                yield None
+
+
+class GitModule(Module):
+    """
+    File in a local git repository. Revisions are commits that touched
+    the file, the latest content is the file at `HEAD`.
+    Objects are read through one long-lived `git cat-file --batch` process.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self._path = os.path.abspath(path)
+        self._batch = CatFileBatch(os.path.dirname(self._path))
+        # path of the file in each revision, relative to the repository root
+        self._paths: dict[str, str] = {}
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def name(self) -> str:
+        return self._path
+
+    def text_type_hint(self) -> TextType | None:
+        return text_type_from_path(self._path)
+
+    def _head_object(self) -> str:
+        # `./` makes the path relative to the directory of the file
+        return f"HEAD:./{os.path.basename(self._path)}"
+
+    async def read_content(self) -> Content:
+        (file,) = await self._read_blobs([self._head_object()])
+        return await file_to_content(file, text_type=self.text_type_hint())
+
+    async def _read_text(self) -> str:
+        (file,) = await self._read_blobs([self._head_object()])
+        return file.describe() if isinstance(file, BinaryFile) else file.text
+
+    async def _read_blobs(self, names: Sequence[str]) -> list[FileText | BinaryFile]:
+        try:
+            blobs = await self._batch.read_many(names)
+        except GitError as e:
+            raise ReadError(f"Could not read file {self._path} from git") from e
+        files = []
+        for name, data in zip(names, blobs):
+            if data is None:
+                raise ReadError(f"Could not find {name} in git")
+            try:
+                files.append(await asyncio.to_thread(read_bytes, data))
+            except UnicodeDecodeError as e:
+                raise ReadError(f"Could not decode {name}") from e
+        return files
+
+    async def read_revisions(self) -> list[str]:
+        try:
+            commits = await file_log(self._path)
+        except GitError as e:
+            raise ReadError(f"Could not read revisions of {self._path}") from e
+        self._paths = {commit.commit: commit.path for commit in commits}
+        return [commit.commit for commit in commits]
+
+    async def find_revision(self, revision: str) -> str | None:
+        # revisions are listed by short hashes, which prefix the full one
+        try:
+            commit = await resolve_commit(revision, cwd=os.path.dirname(self._path))
+        except GitError:
+            return None
+        return next((rev for rev in self.revisions if commit.startswith(rev)), None)
+
+    async def load_revision(self, revision: str) -> None:
+        await self.load_revisions([revision])
+
+    async def load_revisions(self, revisions: Sequence[str]) -> None:
+        to_load = [
+            revision
+            for revision in dict.fromkeys(revisions)
+            if revision not in self.revisions_content
+        ]
+        if unknown := [rev for rev in to_load if rev not in self._paths]:
+            raise ReadError(f"Could not read revision {unknown[0]}")
+        files = await self._read_blobs(
+            [f"{revision}:{self._paths[revision]}" for revision in to_load]
+        )
+        for revision, file in zip(to_load, files):
+            self.revisions_content[revision] = await file_to_content(
+                file, text_type=self.text_type_hint()
+            )
+
+    async def load_revisions_info(self, revisions: Sequence[str]) -> None:
+        to_load = [
+            revision
+            for revision in dict.fromkeys(revisions)
+            if revision not in self.revisions_info
+        ]
+        try:
+            info = await commits_summary(to_load, cwd=os.path.dirname(self._path))
+        except GitError as e:
+            raise ReadError("Could not read descriptions of revisions") from e
+        self.revisions_info.update(info)
+
+    async def close(self) -> None:
+        await self._batch.close()
 
 
 class URLModule(NoRevisionModuleMixin, Module):
@@ -134,15 +686,36 @@ class URLModule(NoRevisionModuleMixin, Module):
         super().__init__()
         self._url = url
         self._client = client
+        self._content_type: str | None = None
+
+    @property
+    def name(self) -> str:
+        return self._url
 
     async def _read_text(self) -> str:
+        """
+        Decode the response while it's downloaded, so neither the body
+        nor the decompressed data is buffered as a whole. `Content-Encoding`
+        is removed by httpx, compressed files (e.g. `dump.json.gz`) are
+        detected by magic bytes.
+        """
         try:
-            res = await self._client.get(self._url)
-            res.raise_for_status()
-            return res.text
-        except HTTPError as e:
+            async with self._client.stream("GET", self._url) as res:
+                res.raise_for_status()
+                self._content_type = res.headers.get("Content-Type")
+                return await decode_async_chunks(
+                    aiter_decompressed(res.aiter_bytes()),
+                    res.encoding or "utf-8",
+                    errors="replace",
+                )
+        except (HTTPError, CompressionError) as e:
             raise ReadError(f"Could not read URL {self._url}") from e
 
+    def text_type_hint(self) -> TextType | None:
+        return text_type_from_mime(self._content_type) or text_type_from_path(
+            url.parse(self._url).path
+        )
+
 
 class CouchDBModule(Module):
     def __init__(self, url: str, *, client: AsyncClient) -> None:
@@ -150,6 +723,10 @@ class CouchDBModule(Module):
         self._url = url
         self._client = client
 
+    @property
+    def name(self) -> str:
+        return self._url
+
     def rewrite_inputs(self) -> None:
         """
         Parse Fauxton admin URLs and rewrite them for retrieving JSON.
@@ -191,6 +768,9 @@ class CouchDBModule(Module):
         except HTTPError as e:
             raise ReadError(f"Could not read URL {self._url}") from e
 
+    def text_type_hint(self) -> TextType | None:
+        return TextType.JSON
+
     async def read_revisions(self) -> list[str]:
         try:
             res = await self._client.get(self._url, params={"revs_info": "true"})
@@ -200,6 +780,30 @@ class CouchDBModule(Module):
             raise ReadError("Could not read revisions") from e
         return [rev["rev"] for rev in revs_info if rev["status"] == "available"]
 
+    def can_watch(self) -> bool:
+        return True
+
+    async def watch(self) -> AsyncIterator[None]:
+        """
+        Follow the document through the `_changes` feed of its database.
+        New revisions are prepended to `revisions` and become the latest
+        content; only their bodies are fetched.
+        """
+        database_url, doc_id = split_document_url(self._url)
+        feed = changes_feed(database_url, client=self._client)
+        try:
+            # stop following as soon as the watch is stopped
+            async with contextlib.aclosing(feed.follow(doc_id)) as revisions:
+                async for revision in revisions:
+                    if revision in self.revisions_content:
+                        continue
+                    await self.load_revision(revision)
+                    self.revisions.insert(0, revision)
+                    self.revisions_content["latest"] = self.revisions_content[revision]
+                    yield None
+        except ChangesFeedError as e:
+            raise ReadError(str(e)) from e
+
     async def load_revision(self, revision: str) -> None:
         if revision in self.revisions_content:
             return None
@@ -209,4 +813,37 @@ class CouchDBModule(Module):
         except HTTPError as e:
             raise ReadError(f"Could not read revision {revision}") from e
 
-        self.revisions_content[revision] = parse_content(res.text)
+        self.revisions_content[revision] = await parse_content_async(
+            res.text, text_type=self.text_type_hint()
+        )
+
+    async def load_revisions(self, revisions: Sequence[str]) -> None:
+        """
+        Load several revisions in one request with `open_revs`.
+        Revisions that are missing on the server are skipped.
+        """
+        to_load = [
+            revision
+            for revision in dict.fromkeys(revisions)
+            if revision not in self.revisions_content
+        ]
+        if len(to_load) < 2:
+            await super().load_revisions(to_load)
+            return
+        try:
+            res = await self._client.get(
+                self._url,
+                params={"open_revs": json.dumps(to_load)},
+                headers={"Accept": "application/json"},
+            )
+            res.raise_for_status()
+            results = res.json()
+        except (HTTPError, JSONDecodeError) as e:
+            raise ReadError("Could not read revisions") from e
+
+        for result in results:
+            if doc := result.get("ok"):
+                self.revisions_content[doc["_rev"]] = await parse_content_async(
+                    json.dumps(doc, ensure_ascii=False),
+                    text_type=self.text_type_hint(),
+                )
@@ -0,0 +1,105 @@
+"""
+Normalization of lines before diffing: lines that are equal after
+normalization are shown as unchanged.
+"""
+from __future__ import annotations
+
+import functools
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from difflume.settings import ENV_PREFIX, env_str
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+WHITESPACE = "whitespace"
+CASE = "case"
+CUSTOM_PATTERN = "custom pattern"
+MASK_PRESETS = {
+    "timestamps": (
+        r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}([.,]\d+)?)?(Z|[+-]\d{2}:?\d{2})?"
+    ),
+    "uuids": (
+        r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}"
+        r"-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+    ),
+    "couchdb revisions": r'(?<="_rev": ")\d+-[0-9a-f]+',
+}
+MASK = "<masked>"
+NORMALIZED_CACHE_SIZE = 8
+
+
+def available_rules() -> list[str]:
+    rules = [WHITESPACE, CASE, *MASK_PRESETS]
+    if env_str("IGNORE_PATTERN", ""):
+        rules.append(CUSTOM_PATTERN)
+    return rules
+
+
+def default_rules() -> list[str]:
+    """
+    Rules enabled by `DIFF_LUME_IGNORE`, e.g. `whitespace,timestamps`.
+    """
+    rules = [rule.strip() for rule in env_str("IGNORE", "").split(",")]
+    rules = [rule for rule in rules if rule]
+    if unknown := set(rules) - set(available_rules()):
+        raise ValueError(
+            f"Unknown rules in {ENV_PREFIX}IGNORE: {', '.join(sorted(unknown))}"
+        )
+    return rules
+
+
+@dataclass(frozen=True, kw_only=True)
+class Normalization:
+    ignore_whitespace: bool = False
+    ignore_case: bool = False
+    # regexps, matches are replaced with the same placeholder
+    masks: tuple[str, ...] = ()
+
+    @classmethod
+    def from_rules(cls, rules: Iterable[str]) -> Normalization:
+        rules = set(rules)
+        masks = [pattern for name, pattern in MASK_PRESETS.items() if name in rules]
+        if CUSTOM_PATTERN in rules and (pattern := env_str("IGNORE_PATTERN", "")):
+            masks.append(pattern)
+        return cls(
+            ignore_whitespace=WHITESPACE in rules,
+            ignore_case=CASE in rules,
+            masks=tuple(masks),
+        )
+
+    def __bool__(self) -> bool:
+        return self.ignore_whitespace or self.ignore_case or bool(self.masks)
+
+    def normalize(self, line: str) -> str:
+        if self.masks:
+            line = _compile_masks(self.masks).sub(MASK, line)
+        if self.ignore_whitespace:
+            line = "".join(line.split())
+        if self.ignore_case:
+            line = line.casefold()
+        return line
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_masks(masks: tuple[str, ...]) -> re.Pattern[str]:
+    return re.compile("|".join(f"(?:{mask})" for mask in masks))
+
+
+@functools.lru_cache(maxsize=NORMALIZED_CACHE_SIZE)
+def normalized_lines(text: str, normalization: Normalization) -> tuple[str, ...]:
+    """
+    Normalized lines of the text. Cached by the text and the rules, so
+    changing the rules back or changing the other side of the diff
+    doesn't normalize the text again.
+    """
+    cache: dict[str, str] = {}
+    result = []
+    for line in text.splitlines():
+        normalized = cache.get(line)
+        if normalized is None:
+            normalized = cache[line] = normalization.normalize(line)
+        result.append(normalized)
+    return tuple(result)
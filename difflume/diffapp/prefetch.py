@@ -0,0 +1,132 @@
+"""
+Diffs of revision pairs computed ahead of time. When both panels step
+through revisions in sync, the next pairs of revisions are diffed in worker
+processes, so each step only looks its diff up.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from difflume.diffapp.differ import create_diff
+from difflume.diffapp.workers import process_pool
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from concurrent.futures import Executor
+
+    from difflume.diffapp.differ import DiffResult, DiffType
+    from difflume.diffapp.modules import Content
+    from difflume.diffapp.normalize import Normalization
+
+    DiffKey = tuple[bytes, bytes, DiffType, Normalization]
+
+# revision pairs diffed ahead of the current one
+DEFAULT_PREFETCH_REVISIONS = 4
+DIFF_CACHE_SIZE = 16
+
+
+def diff_key(
+    content: Content,
+    content_to_compare: Content,
+    diff_type: DiffType,
+    normalization: Normalization,
+) -> DiffKey:
+    return content.digest, content_to_compare.digest, diff_type, normalization
+
+
+def pairs_ahead(
+    revisions: Sequence[str],
+    index: int,
+    revisions_to_compare: Sequence[str],
+    index_to_compare: int,
+    *,
+    step: int,
+    count: int,
+) -> list[tuple[str, str]]:
+    """
+    Revision pairs the panels show after the next `count` synced steps,
+    `step` is 1 for older revisions and -1 for newer ones.
+    """
+    pairs = []
+    for i in range(1, count + 1):
+        new_index, new_index_to_compare = index + i * step, index_to_compare + i * step
+        if not (
+            0 <= new_index < len(revisions)
+            and 0 <= new_index_to_compare < len(revisions_to_compare)
+        ):
+            break
+        pairs.append((revisions[new_index], revisions_to_compare[new_index_to_compare]))
+    return pairs
+
+
+class DiffCache:
+    """
+    Recently shown and prefetched diffs by the contents, the diff type
+    and the normalization. The number of diffs is bounded, least recently
+    used ones are dropped first.
+    """
+
+    def __init__(self, max_size: int = DIFF_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._results: OrderedDict[DiffKey, DiffResult] = OrderedDict()
+        self._pending: set[DiffKey] = set()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: DiffKey) -> DiffResult | None:
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def put(self, key: DiffKey, result: DiffResult) -> None:
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_size:
+            self._results.popitem(last=False)
+
+    async def prefetch(
+        self,
+        pairs: Iterable[tuple[Content, Content]],
+        diff_type: DiffType,
+        normalization: Normalization,
+        *,
+        executor: Executor | None = None,
+    ) -> None:
+        """
+        Diff the pairs of contents in a pool of workers, skipping pairs that
+        are already diffed or being diffed.
+        """
+        loop = asyncio.get_running_loop()
+        executor = executor or process_pool()
+        keys, tasks = [], []
+        for content, content_to_compare in pairs:
+            key = diff_key(content, content_to_compare, diff_type, normalization)
+            if key in self._results or key in self._pending:
+                continue
+            self._pending.add(key)
+            keys.append(key)
+            tasks.append(
+                loop.run_in_executor(
+                    executor,
+                    # the worker is one of the processes big texts are diffed in
+                    functools.partial(
+                        create_diff,
+                        content.text,
+                        content_to_compare.text,
+                        diff_type,
+                        normalization=normalization,
+                        parallel=False,
+                    ),
+                )
+            )
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            self._pending.difference_update(keys)
+        for key, result in zip(keys, results):
+            self.put(key, result)
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import codecs
+import hashlib
+import itertools
+import mmap
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, BinaryIO
+
+from difflume.diffapp.compression import detect_compression, iter_decompressed
+from difflume.diffapp.sniff import SNIFF_SIZE, sniff
+from difflume.settings import env_int, env_str
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, Generator, Iterable, Iterator
+    from types import TracebackType
+
+DEFAULT_MMAP_THRESHOLD = 16 * 1024 * 1024
+DEFAULT_BINARY_HASH_LIMIT = 128 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class MappedFile:
+    """
+    Read-only memory-mapped file. The content is decoded straight from
+    the mapping, so reading doesn't allocate an intermediate `bytes` copy
+    of the whole file. There is no line index over the mapping: lines are
+    split from the decoded text once it's loaded, see `Content.lines`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")  # noqa: SIM115
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            self._mmap = (
+                mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if size
+                else None
+            )
+        except BaseException:
+            self._file.close()
+            raise
+
+    def __enter__(self) -> MappedFile:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._mmap) if self._mmap is not None else 0
+
+    def read_text(self, encoding: str, *, offset: int = 0) -> str:
+        if self._mmap is None:
+            return ""
+        with memoryview(self._mmap) as view:
+            text = codecs.decode(view[offset:], encoding)
+        return translate_newlines(text)
+
+
+def translate_newlines(text: str) -> str:
+    """
+    Same as universal newlines mode of `open`.
+    """
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+@dataclass(frozen=True, kw_only=True)
+class FileText:
+    text: str
+    encoding: str
+    # position in the file right after the read data
+    position: int
+    # compression of the file, e.g. "gzip"; the text is decompressed
+    compression: str | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class BinaryFile:
+    size: int
+    sha256: str | None
+
+    def describe(self) -> str:
+        digest = self.sha256 or "not calculated, file is too big"
+        return f"Binary file\nsize: {self.size} bytes\nsha256: {digest}"
+
+
+def fallback_encoding() -> str:
+    return env_str("FALLBACK_ENCODING", "latin-1")
+
+
+def iter_chunks(
+    f: BinaryIO, size: int = READ_CHUNK_SIZE
+) -> Generator[bytes, None, None]:
+    while chunk := f.read(size):
+        yield chunk
+
+
+def decode_chunks(chunks: Iterable[bytes], encoding: str) -> str:
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = [decoder.decode(chunk) for chunk in chunks]
+    parts.append(decoder.decode(b"", final=True))
+    return translate_newlines("".join(parts))
+
+
+async def decode_async_chunks(
+    chunks: AsyncIterable[bytes], encoding: str, *, errors: str = "strict"
+) -> str:
+    """
+    Decode a stream, e.g. an HTTP response body, as it arrives.
+    Newlines are kept as is.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    parts = [decoder.decode(chunk) async for chunk in chunks]
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def _hash_file(f: BinaryIO, size: int) -> str | None:
+    if size > env_int("BINARY_HASH_LIMIT", DEFAULT_BINARY_HASH_LIMIT):
+        return None
+    f.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter_chunks(f):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _decode_file(f: BinaryIO, *, encoding: str, offset: int) -> tuple[str, int]:
+    size = os.fstat(f.fileno()).st_size
+    if size >= env_int("MMAP_THRESHOLD", DEFAULT_MMAP_THRESHOLD):
+        with MappedFile(f.name) as mapped:
+            return mapped.read_text(encoding, offset=offset), len(mapped)
+    f.seek(offset)
+    text = decode_chunks(iter_chunks(f), encoding)
+    return text, f.tell()
+
+
+def _peek(chunks: Iterator[bytes], size: int) -> bytes:
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= size:
+            break
+    return head
+
+
+def _read_compressed(f: BinaryIO, compression: str) -> FileText | BinaryFile:
+    """
+    Decompress the file chunk by chunk, the compressed data is never
+    read into memory as a whole.
+    """
+
+    def decompressed() -> Iterator[bytes]:
+        f.seek(0)
+        return iter_decompressed(iter_chunks(f), compression)
+
+    chunks = decompressed()
+    head = _peek(chunks, SNIFF_SIZE)
+    sniffed = sniff(
+        head, complete=len(head) < SNIFF_SIZE, fallback_encoding=fallback_encoding()
+    )
+    if sniffed.is_binary:
+        # the decompressed size is unknown upfront, hash until it's too big
+        hash_limit = env_int("BINARY_HASH_LIMIT", DEFAULT_BINARY_HASH_LIMIT)
+        digest = hashlib.sha256(head) if len(head) <= hash_limit else None
+        size = len(head)
+        for chunk in chunks:
+            size += len(chunk)
+            if digest is not None and size > hash_limit:
+                digest = None
+            if digest is not None:
+                digest.update(chunk)
+        return BinaryFile(
+            size=size, sha256=digest.hexdigest() if digest is not None else None
+        )
+    assert sniffed.encoding, "Encoding must be detected for text"
+
+    encoding, bom_length = sniffed.encoding, sniffed.bom_length
+    try:
+        text = decode_chunks(itertools.chain([head[bom_length:]], chunks), encoding)
+    except UnicodeDecodeError:
+        if bom_length or encoding != "utf-8":
+            raise
+        encoding = fallback_encoding()
+        text = decode_chunks(decompressed(), encoding)
+    return FileText(
+        text=text, encoding=encoding, position=f.tell(), compression=compression
+    )
+
+
+def read_file(path: str) -> FileText | BinaryFile:
+    """
+    Read the file. Only the first few KB are read to detect whether the file
+    is binary and which encoding it has, then the text is decoded chunk by
+    chunk (or straight from `mmap` for big files).
+    Binary files are not decoded, only their size and hash are returned.
+    Compressed files are decompressed on the fly.
+
+    This function is blocking, run it in a thread.
+    Raise `CompressionError` if the compressed data is corrupted.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        head = f.read(SNIFF_SIZE)
+        if compression := detect_compression(head):
+            return _read_compressed(f, compression)
+        sniffed = sniff(
+            head, complete=len(head) == size, fallback_encoding=fallback_encoding()
+        )
+        if sniffed.is_binary:
+            return BinaryFile(size=size, sha256=_hash_file(f, size))
+        assert sniffed.encoding, "Encoding must be detected for text"
+
+        encoding = sniffed.encoding
+        try:
+            text, position = _decode_file(
+                f, encoding=encoding, offset=sniffed.bom_length
+            )
+        except UnicodeDecodeError:
+            # only the head of the file was checked for UTF-8
+            if sniffed.bom_length or encoding != "utf-8":
+                raise
+            encoding = fallback_encoding()
+            text, position = _decode_file(f, encoding=encoding, offset=0)
+    return FileText(text=text, encoding=encoding, position=position)
+
+
+def read_bytes(data: bytes) -> FileText | BinaryFile:
+    """
+    Same as `read_file`, but for data that is already in memory,
+    e.g. a blob read from git.
+    """
+    sniffed = sniff(
+        data[:SNIFF_SIZE],
+        complete=len(data) <= SNIFF_SIZE,
+        fallback_encoding=fallback_encoding(),
+    )
+    if sniffed.is_binary:
+        digest = (
+            hashlib.sha256(data).hexdigest()
+            if len(data) <= env_int("BINARY_HASH_LIMIT", DEFAULT_BINARY_HASH_LIMIT)
+            else None
+        )
+        return BinaryFile(size=len(data), sha256=digest)
+    assert sniffed.encoding, "Encoding must be detected for text"
+
+    encoding, bom_length = sniffed.encoding, sniffed.bom_length
+    with memoryview(data) as view:
+        try:
+            text = codecs.decode(view[bom_length:], encoding)
+        except UnicodeDecodeError:
+            if bom_length or encoding != "utf-8":
+                raise
+            encoding = fallback_encoding()
+            text = codecs.decode(view, encoding)
+    return FileText(
+        text=translate_newlines(text), encoding=encoding, position=len(data)
+    )
+
+
+def read_file_from(path: str, *, position: int, encoding: str) -> FileText:
+    """
+    Read the file starting from `position`, e.g. data appended to the file.
+
+    This function is blocking, run it in a thread.
+    """
+    with open(path, "rb") as f:
+        text, end = _decode_file(f, encoding=encoding, offset=position)
+    return FileText(text=text, encoding=encoding, position=end)
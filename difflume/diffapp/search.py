@@ -0,0 +1,239 @@
+"""
+Search in big texts. The index of line offsets is built once per text
+(and cached by the text's hash), so each keystroke of an incremental
+search only scans until the next match. Big texts also get a trigram
+index that narrows the search down to lines that can contain the query.
+"""
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from difflume.settings import env_int
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+DEFAULT_TRIGRAM_THRESHOLD = 8 * 1024 * 1024
+# lines scanned at once when searching backwards
+BACKWARD_WINDOW_LINES = 4096
+INDEX_CACHE_SIZE = 8
+
+
+@dataclass(frozen=True, slots=True)
+class Match:
+    line: int
+    # offsets in the whole text
+    start: int
+    end: int
+
+
+def compile_query(query: str) -> re.Pattern[str]:
+    """
+    Smart case: the search is case-sensitive only if the query has
+    uppercase letters.
+    """
+    flags = 0 if any(char.isupper() for char in query) else re.IGNORECASE
+    return re.compile(re.escape(query), flags)
+
+
+def _trigrams(line: str) -> set[str]:
+    line = line.lower()
+    return {a + b + c for a, b, c in zip(line, line[1:], line[2:])}
+
+
+def line_starts(text: str) -> array:
+    """
+    Offsets where lines of the text start. Lines are split on `\n` only,
+    as in rendered text.
+    """
+    starts = array("Q", [0])
+    find = text.find
+    pos = find("\n")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = find("\n", pos + 1)
+    return starts
+
+
+class TextIndex:
+    __slots__ = ("text", "_starts", "_trigrams", "_trigrams_ready")
+
+    def __init__(self, text: str, starts: array) -> None:
+        self.text = text
+        self._starts = starts
+        self._trigrams: dict[str, array] = {}
+        self._trigrams_ready = threading.Event()
+
+    @classmethod
+    def build(cls, text: str) -> TextIndex:
+        return cls(text, line_starts(text))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def line_start(self, line: int) -> int:
+        return self._starts[line]
+
+    def line_end(self, line: int) -> int:
+        if line + 1 < len(self._starts):
+            return self._starts[line + 1] - 1
+        return len(self.text)
+
+    def line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self._starts, offset) - 1
+
+    def line(self, line: int) -> str:
+        start, end = self.line_start(line), self.line_end(line)
+        return self.text[start:end]
+
+    def build_trigrams(self) -> None:
+        """
+        Build the trigram index. It's slow for big texts, run it
+        in a thread; searches scan the text until the index is ready.
+        """
+        if self._trigrams_ready.is_set():
+            return
+        trigrams: dict[str, array] = {}
+        for i in range(len(self)):
+            for trigram in _trigrams(self.line(i)):
+                if trigram not in trigrams:
+                    trigrams[trigram] = array("L")
+                trigrams[trigram].append(i)
+        self._trigrams = trigrams
+        self._trigrams_ready.set()
+
+    def _candidate_lines(self, query: str) -> list[int] | None:
+        """
+        Sorted lines that contain all trigrams of the query.
+        None if the trigram index can't help.
+        """
+        if len(query) < 3 or not self._trigrams_ready.is_set():
+            return None
+        postings = sorted(
+            (self._trigrams.get(trigram, array("L")) for trigram in _trigrams(query)),
+            key=len,
+        )
+        lines = set(postings[0])
+        for posting in postings[1:]:
+            lines.intersection_update(posting)
+            if not lines:
+                break
+        return sorted(lines)
+
+    def search(
+        self, query: str, *, offset: int = 0, backwards: bool = False
+    ) -> Generator[Match, None, None]:
+        """
+        Lazily yield matches starting from `offset` (or before it, if searching
+        backwards) and wrapping around the end of the text.
+        """
+        if not query:
+            return
+        pattern = compile_query(query)
+        candidates = self._candidate_lines(query)
+        if candidates is not None:
+            yield from self._search_lines(pattern, candidates, offset, backwards)
+        elif backwards:
+            yield from self._reversed_matches(pattern, 0, offset)
+            yield from self._reversed_matches(pattern, offset, len(self.text) + 1)
+        else:
+            yield from self._matches(pattern, offset, len(self.text) + 1)
+            yield from self._matches(pattern, 0, offset)
+
+    def _match(self, match: re.Match[str]) -> Match:
+        return Match(
+            line=self.line_of(match.start()), start=match.start(), end=match.end()
+        )
+
+    def _matches(
+        self, pattern: re.Pattern[str], start: int, end: int
+    ) -> Generator[Match, None, None]:
+        """
+        Matches that start in [start, end).
+        """
+        for match in pattern.finditer(self.text, start):
+            if match.start() >= end:
+                break
+            yield self._match(match)
+
+    def _reversed_matches(
+        self, pattern: re.Pattern[str], start: int, end: int
+    ) -> Generator[Match, None, None]:
+        """
+        Matches that start in [start, end), last first. The text is scanned
+        back from `end` by windows of lines, so finding a match close
+        to `end` doesn't scan the whole text.
+        """
+        while end > start:
+            window_line = max(self.line_of(end) - BACKWARD_WINDOW_LINES, 0)
+            window_start = max(self.line_start(window_line), start)
+            yield from reversed(list(self._matches(pattern, window_start, end)))
+            end = window_start
+
+    def _line_matches(
+        self, pattern: re.Pattern[str], line: int
+    ) -> Generator[Match, None, None]:
+        for match in pattern.finditer(
+            self.text, self.line_start(line), self.line_end(line)
+        ):
+            yield self._match(match)
+
+    def _search_lines(
+        self,
+        pattern: re.Pattern[str],
+        lines: list[int],
+        offset: int,
+        backwards: bool,
+    ) -> Generator[Match, None, None]:
+        current = self.line_of(offset)
+        # the current line goes first in both directions
+        if backwards:
+            split = bisect.bisect_right(lines, current)
+            ordered = [*reversed(lines[:split]), *reversed(lines[split:])]
+        else:
+            split = bisect.bisect_left(lines, current)
+            ordered = [*lines[split:], *lines[:split]]
+        in_current = []
+        for line in ordered:
+            matches = list(self._line_matches(pattern, line))
+            if line == current:
+                in_current = matches
+                matches = [m for m in matches if (m.start < offset) == backwards]
+            yield from reversed(matches) if backwards else matches
+        # wrap around to the rest of the current line
+        rest = [m for m in in_current if (m.start < offset) != backwards]
+        yield from reversed(rest) if backwards else rest
+
+
+_cache: OrderedDict[tuple[int, int], TextIndex] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def text_index(text: str, *, starts: array | None = None) -> TextIndex:
+    """
+    Get the index of the text, building it on the first use. `starts` are
+    line offsets if they are already known, e.g. `Content.line_starts`.
+    Indexes are cached by the text's hash, which Python caches in the string
+    object, so getting the index of the same text again is cheap.
+    """
+    key = (hash(text), len(text))
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None and (index.text is text or index.text == text):
+            _cache.move_to_end(key)
+            return index
+
+    index = TextIndex.build(text) if starts is None else TextIndex(text, starts)
+    if len(text) >= env_int("SEARCH_TRIGRAM_THRESHOLD", DEFAULT_TRIGRAM_THRESHOLD):
+        threading.Thread(target=index.build_trigrams, daemon=True).start()
+    with _cache_lock:
+        _cache[key] = index
+        while len(_cache) > INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import codecs
+from dataclasses import dataclass
+
+SNIFF_SIZE = 8 * 1024
+
+# Longest BOMs go first: UTF-32 LE BOM starts with UTF-16 LE BOM
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+TEXT_CONTROL_BYTES = frozenset(b"\t\n\r\f\b\x1b")
+MAX_CONTROL_BYTES_RATIO = 0.1
+
+
+@dataclass(frozen=True, kw_only=True)
+class SniffResult:
+    is_binary: bool
+    encoding: str | None
+    bom_length: int = 0
+
+
+def _is_binary(head: bytes) -> bool:
+    if b"\0" in head:
+        return True
+    control = sum(
+        1
+        for byte in head
+        if (byte < 0x20 or byte == 0x7F) and byte not in TEXT_CONTROL_BYTES
+    )
+    return control > len(head) * MAX_CONTROL_BYTES_RATIO
+
+
+def _is_utf8(head: bytes, *, complete: bool) -> bool:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        # the head can end in the middle of a multibyte character
+        decoder.decode(head, final=complete)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def sniff(
+    head: bytes, *, complete: bool = False, fallback_encoding: str
+) -> SniffResult:
+    """
+    Guess whether the data is binary and which encoding it has, looking only
+    at the first bytes of the data.
+    Pass `complete=True` if `head` is the whole data.
+
+    Text with a BOM is decoded with the BOM's encoding. Otherwise UTF-8 is
+    used if the head is valid UTF-8, else `fallback_encoding`.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return SniffResult(is_binary=False, encoding=encoding, bom_length=len(bom))
+    if _is_binary(head):
+        return SniffResult(is_binary=True, encoding=None)
+    if _is_utf8(head, complete=complete):
+        return SniffResult(is_binary=False, encoding="utf-8")
+    return SniffResult(is_binary=False, encoding=fallback_encoding)
@@ -0,0 +1,100 @@
+"""
+Sources given as strings, e.g. on the command line.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from difflume.diffapp.modules import CouchDBModule, FSModule, GitModule, URLModule
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from difflume.diffapp.modules import Module
+
+SOURCES_HELP = """\
+sources:
+  path/to/file.json                  a file
+  git:path/to/file.json@abc123       a file in a git repository at a commit
+  https://example.com/file.json      a URL
+  couchdb://host:5984/db/doc@3-abc   a CouchDB document at a revision,
+                                     couchdbs:// for HTTPS
+  git:path/with@sign.json@           a trailing @ keeps an @ in the path
+"""
+GIT_PREFIX = "git:"
+COUCHDB_SCHEMES = {"couchdb://": "http://", "couchdbs://": "https://"}
+URL_SCHEMES = ("http://", "https://")
+# commit hashes, refs like HEAD~2 and version tags like v1.2.0
+GIT_REVISION = re.compile(r"[\w~^-]+|v?\d+(\.\d+)+")
+COUCHDB_REVISION = re.compile(r"\d+-\w+")
+
+
+class SourceError(ValueError):
+    pass
+
+
+class SourceKind(Enum):
+    FILE = "file"
+    GIT = "git"
+    URL = "url"
+    COUCHDB = "couchdb"
+
+
+@dataclass(frozen=True, kw_only=True)
+class Source:
+    kind: SourceKind
+    location: str
+    revision: str | None = None
+
+    def create_module(self, *, client: AsyncClient) -> Module:
+        if self.kind is SourceKind.GIT:
+            return GitModule(self.location)
+        if self.kind is SourceKind.URL:
+            return URLModule(self.location, client=client)
+        if self.kind is SourceKind.COUCHDB:
+            return CouchDBModule(self.location, client=client)
+        return FSModule(self.location)
+
+
+def _split_revision(spec: str, pattern: re.Pattern[str]) -> tuple[str, str | None]:
+    """
+    Split `location@revision`. The part after the last `@` is a revision
+    only if it matches the pattern, so `docs/a@b.json` is a path.
+    A trailing `@` ends the location without a revision.
+    """
+    location, sep, revision = spec.rpartition("@")
+    if not sep or not location:
+        return spec, None
+    if not revision:
+        return location, None
+    if not pattern.fullmatch(revision):
+        return spec, None
+    return location, revision
+
+
+def parse_source(spec: str) -> Source:
+    if not spec:
+        raise SourceError("Source can't be empty")
+    if spec.startswith(GIT_PREFIX):
+        location, revision = _split_revision(
+            spec.removeprefix(GIT_PREFIX), GIT_REVISION
+        )
+        return Source(kind=SourceKind.GIT, location=location, revision=revision)
+    for scheme, http_scheme in COUCHDB_SCHEMES.items():
+        if spec.startswith(scheme):
+            location, revision = _split_revision(
+                spec.removeprefix(scheme), COUCHDB_REVISION
+            )
+            if "/" not in location:
+                raise SourceError(f"No database and document in {spec}")
+            return Source(
+                kind=SourceKind.COUCHDB,
+                location=f"{http_scheme}{location}",
+                revision=revision,
+            )
+    if spec.startswith(URL_SCHEMES):
+        return Source(kind=SourceKind.URL, location=spec)
+    return Source(kind=SourceKind.FILE, location=spec)
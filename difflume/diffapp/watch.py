@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import ctypes
+import ctypes.util
+import functools
+import os
+import struct
+import sys
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from difflume.settings import env_float
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+
+class FileWatcher(ABC):
+    """
+    Notify about changes of a single file.
+
+    Bursts of changes (e.g. an editor writing a file in several steps) are
+    debounced: `changes` yields once the file stays unchanged for `debounce`
+    seconds.
+    """
+
+    def __init__(self, path: str, *, debounce: float | None = None) -> None:
+        self.path = os.path.abspath(path)
+        if debounce is None:
+            debounce = env_float("WATCH_DEBOUNCE", 0.3)
+        self.debounce = debounce
+        self._changed = asyncio.Event()
+
+    async def changes(self) -> AsyncIterator[None]:
+        self._start()
+        try:
+            while True:
+                await self._changed.wait()
+                while self._changed.is_set():
+                    self._changed.clear()
+                    await asyncio.sleep(self.debounce)
+                yield None
+        finally:
+            self._stop()
+
+    def _notify(self) -> None:
+        self._changed.set()
+
+    @abstractmethod
+    def _start(self) -> None:
+        pass
+
+    @abstractmethod
+    def _stop(self) -> None:
+        pass
+
+
+class PollingFileWatcher(FileWatcher):
+    def __init__(
+        self,
+        path: str,
+        *,
+        debounce: float | None = None,
+        interval: float | None = None,
+    ) -> None:
+        super().__init__(path, debounce=debounce)
+        if interval is None:
+            interval = env_float("WATCH_POLL_INTERVAL", 1.0)
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def _fingerprint(self) -> tuple[int, int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    async def _poll(self) -> None:
+        last = self._fingerprint()
+        while True:
+            await asyncio.sleep(self.interval)
+            current = self._fingerprint()
+            if current != last:
+                last = current
+                self._notify()
+
+    def _start(self) -> None:
+        self._task = asyncio.create_task(self._poll())
+
+    def _stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class _Inotify:
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct("iIII")
+
+    @staticmethod
+    @functools.cache
+    def libc() -> ctypes.CDLL | None:
+        if not sys.platform.startswith("linux"):
+            return None
+        with contextlib.suppress(OSError):
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            if hasattr(libc, "inotify_init1"):
+                return libc
+        return None
+
+    @classmethod
+    def available(cls) -> bool:
+        return cls.libc() is not None
+
+    @classmethod
+    def parse_names(cls, data: bytes) -> list[str]:
+        names = []
+        offset = 0
+        while offset + cls.EVENT_HEADER.size <= len(data):
+            _, _, _, name_len = cls.EVENT_HEADER.unpack_from(data, offset)
+            offset += cls.EVENT_HEADER.size
+            end = offset + name_len
+            names.append(os.fsdecode(data[offset:end].rstrip(b"\0")))
+            offset = end
+        return names
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Watch the directory of the file, so replacing the file (which many editors
+    do on save) is noticed too.
+    """
+
+    MASK = (
+        _Inotify.IN_MODIFY
+        | _Inotify.IN_ATTRIB
+        | _Inotify.IN_CLOSE_WRITE
+        | _Inotify.IN_MOVED_TO
+        | _Inotify.IN_CREATE
+        | _Inotify.IN_DELETE
+    )
+
+    def __init__(self, path: str, *, debounce: float | None = None) -> None:
+        super().__init__(path, debounce=debounce)
+        self._fd: int | None = None
+
+    def _start(self) -> None:
+        libc = _Inotify.libc()
+        assert libc is not None, "inotify is not available"
+        fd = libc.inotify_init1(_Inotify.IN_NONBLOCK | _Inotify.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        directory = os.fsencode(os.path.dirname(self.path))
+        if libc.inotify_add_watch(fd, directory, self.MASK) < 0:
+            os.close(fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+        self._fd = fd
+        asyncio.get_running_loop().add_reader(fd, self._read_events)
+
+    def _read_events(self) -> None:
+        assert self._fd is not None
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        if os.path.basename(self.path) in _Inotify.parse_names(data):
+            self._notify()
+
+    def _stop(self) -> None:
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+
+def create_file_watcher(path: str) -> FileWatcher:
+    """
+    Use inotify where it's available, fall back to polling file's mtime.
+    """
+    if _Inotify.available():
+        return InotifyFileWatcher(path)
+    return PollingFileWatcher(path)
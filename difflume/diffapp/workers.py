@@ -0,0 +1,33 @@
+"""
+Shared pool of worker processes for CPU-bound work like diffing.
+"""
+from __future__ import annotations
+
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from difflume.settings import env_int
+
+MAX_DEFAULT_WORKERS = 8
+
+
+def default_workers() -> int:
+    return min(os.cpu_count() or 1, MAX_DEFAULT_WORKERS)
+
+
+def workers_count() -> int:
+    return env_int("WORKERS", default_workers())
+
+
+@functools.cache
+def process_pool() -> ProcessPoolExecutor:
+    """
+    Processes are spawned, not forked: forking a process that runs threads
+    (the TUI does) can deadlock the child.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
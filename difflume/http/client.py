@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from httpx import (
+    AsyncBaseTransport,
+    AsyncByteStream,
+    AsyncClient,
+    AsyncHTTPTransport,
+    Limits,
+    Request,
+    Response,
+    Timeout,
+)
+
+from difflume.settings import env_bool, env_float, env_int
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+
+@dataclass(kw_only=True, frozen=True)
+class HTTPSettings:
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    max_connections_per_host: int = 6
+    connect_timeout: float = 5.0
+    read_timeout: float = 10.0
+    http2: bool = False
+    verify: bool = False
+
+    @classmethod
+    def from_env(cls) -> HTTPSettings:
+        default = cls()
+        return cls(
+            max_connections=env_int("HTTP_MAX_CONNECTIONS", default.max_connections),
+            max_keepalive_connections=env_int(
+                "HTTP_MAX_KEEPALIVE_CONNECTIONS", default.max_keepalive_connections
+            ),
+            keepalive_expiry=env_float(
+                "HTTP_KEEPALIVE_EXPIRY", default.keepalive_expiry
+            ),
+            max_connections_per_host=env_int(
+                "HTTP_MAX_CONNECTIONS_PER_HOST", default.max_connections_per_host
+            ),
+            connect_timeout=env_float("HTTP_CONNECT_TIMEOUT", default.connect_timeout),
+            read_timeout=env_float("HTTP_READ_TIMEOUT", default.read_timeout),
+            http2=env_bool("HTTP2", default.http2),
+            verify=env_bool("HTTP_VERIFY", default.verify),
+        )
+
+
+def http2_available() -> bool:
+    """
+    HTTP/2 support in httpx requires the optional `h2` package
+    (`pip install httpx[http2]`).
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+class _ReleasingStream(AsyncByteStream):
+    def __init__(self, stream: AsyncByteStream, semaphore: asyncio.Semaphore) -> None:
+        self._stream = stream
+        self._semaphore = semaphore
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._semaphore.release()
+
+
+class PerHostLimitTransport(AsyncBaseTransport):
+    """
+    Limit the number of concurrent requests to a single host, while all hosts
+    share one connection pool of the wrapped transport.
+
+    A slot is held until the response body is closed, so streamed responses
+    count as in-flight requests.
+    """
+
+    def __init__(self, transport: AsyncBaseTransport, *, max_per_host: int) -> None:
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore_for(self, request: Request) -> asyncio.Semaphore:
+        host = request.url.netloc.decode("ascii")
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self._max_per_host)
+        return self._semaphores[host]
+
+    async def handle_async_request(self, request: Request) -> Response:
+        semaphore = self._semaphore_for(request)
+        await semaphore.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        assert isinstance(response.stream, AsyncByteStream)
+        return Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, semaphore),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_client(settings: HTTPSettings) -> AsyncClient:
+    transport: AsyncBaseTransport = AsyncHTTPTransport(
+        verify=settings.verify,
+        http2=settings.http2 and http2_available(),
+        limits=Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+    )
+    if settings.max_connections_per_host > 0:
+        transport = PerHostLimitTransport(
+            transport, max_per_host=settings.max_connections_per_host
+        )
+    return AsyncClient(
+        follow_redirects=True,
+        verify=settings.verify,
+        timeout=Timeout(settings.read_timeout, connect=settings.connect_timeout),
+        transport=transport,
+    )
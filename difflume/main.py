@@ -1,15 +1,68 @@
+from __future__ import annotations
+
+import argparse
 import asyncio
+from typing import TYPE_CHECKING
 
+from difflume.diffapp.sources import (
+    SOURCES_HELP,
+    Source,
+    SourceError,
+    SourceKind,
+    parse_source,
+)
 from difflume.tui.app import DiffLume
 
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+def source_type(spec: str) -> Source:
+    try:
+        return parse_source(spec)
+    except SourceError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="difflume",
+        description="Visualize the differences between two files.",
+        epilog=SOURCES_HELP,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "left", nargs="?", type=source_type, help="source for the left panel"
+    )
+    parser.add_argument(
+        "right", nargs="?", type=source_type, help="source for the right panel"
+    )
+    parser.add_argument(
+        "--databases",
+        action="store_true",
+        help=(
+            "compare all documents of two CouchDB databases, e.g."
+            " couchdb://host:5984/db couchdb://host:5984/replica"
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.databases and not all(
+        source is not None
+        and source.kind is SourceKind.COUCHDB
+        and source.revision is None
+        for source in (args.left, args.right)
+    ):
+        parser.error("--databases needs two CouchDB databases without revisions")
+    return args
+
 
-async def run() -> None:
-    app = DiffLume()
+async def run(args: argparse.Namespace) -> None:
+    app = DiffLume(left=args.left, right=args.right, databases=args.databases)
     await app.run_async()
 
 
 def main() -> None:
-    asyncio.run(run())
+    asyncio.run(run(parse_args()))
 
 
 if __name__ == "__main__":
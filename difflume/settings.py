@@ -0,0 +1,59 @@
+"""
+Helpers for reading DiffLume settings from the environment.
+
+All settings share the `DIFF_LUME_` prefix, e.g. `DIFF_LUME_HTTP_READ_TIMEOUT=30`.
+"""
+from __future__ import annotations
+
+import os
+
+ENV_PREFIX = "DIFF_LUME_"
+TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+FALSE_VALUES = frozenset({"0", "false", "no", "off"})
+
+
+def _get_raw(name: str) -> str | None:
+    value = os.getenv(f"{ENV_PREFIX}{name}")
+    if value is None or not value.strip():
+        return None
+    return value.strip()
+
+
+def env_str(name: str, default: str) -> str:
+    value = _get_raw(name)
+    return default if value is None else value
+
+
+def env_int(name: str, default: int) -> int:
+    value = _get_raw(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid integer value for {ENV_PREFIX}{name}: {value!r}"
+        ) from None
+
+
+def env_float(name: str, default: float) -> float:
+    value = _get_raw(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid float value for {ENV_PREFIX}{name}: {value!r}"
+        ) from None
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = _get_raw(name)
+    if value is None:
+        return default
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean value for {ENV_PREFIX}{name}: {value!r}")
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-from httpx import AsyncClient
 from textual.app import App
 from textual.binding import Binding
 
-from difflume.tui.screens import DiffScreen, HelpScreen
+from difflume.http.client import HTTPSettings, create_client
+from difflume.tui.screens import DatabasesScreen, DiffScreen, HelpScreen
+from difflume.tui.widgets import PanelType
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+    from difflume.diffapp.sources import Source
 
 
 @dataclass
@@ -14,14 +22,10 @@ class Deps:
     http_client: AsyncClient
 
     @classmethod
-    def create(cls) -> Deps:
-        return cls(
-            http_client=AsyncClient(
-                follow_redirects=True,
-                verify=False,  # noqa: S501
-                timeout=10,
-            )
-        )
+    def create(cls, http_settings: HTTPSettings | None = None) -> Deps:
+        if http_settings is None:
+            http_settings = HTTPSettings.from_env()
+        return cls(http_client=create_client(http_settings))
 
     async def close(self) -> None:
         await self.http_client.aclose()
@@ -38,9 +42,48 @@ class DiffLume(App[None]):
 
     deps: Deps
 
+    def __init__(
+        self,
+        *,
+        left: Source | None = None,
+        right: Source | None = None,
+        databases: bool = False,
+    ) -> None:
+        super().__init__()
+        self.sources = {PanelType.LEFT: left, PanelType.RIGHT: right}
+        # sources are CouchDB databases to compare document by document
+        self.databases = databases
+
     async def on_mount(self) -> None:
         self.deps = Deps.create()
-        await self.push_screen(DiffScreen())
+        left, right = self.sources[PanelType.LEFT], self.sources[PanelType.RIGHT]
+        if self.databases and left is not None and right is not None:
+            await self.push_screen(
+                DatabasesScreen(
+                    left.location, right.location, client=self.deps.http_client
+                )
+            )
+            return
+        modules = {
+            panel_type: (source.create_module(client=self.deps.http_client), source)
+            for panel_type, source in self.sources.items()
+            if source is not None
+        }
+        # start loading both sources before the screen is built,
+        # errors are shown by the screen
+        loading = asyncio.gather(
+            *[module.load() for module, _ in modules.values()],
+            return_exceptions=True,
+        )
+        await self.push_screen(
+            DiffScreen(
+                modules={
+                    panel_type: (module, source.revision)
+                    for panel_type, (module, source) in modules.items()
+                },
+                loading=loading,
+            )
+        )
 
     async def on_unmount(self) -> None:
         await self.deps.close()
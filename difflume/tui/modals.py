@@ -2,32 +2,53 @@
 from __future__ import annotations
 
 import os
+import time
 from typing import TYPE_CHECKING
 
+from rich.style import Style
+from rich.text import Text
+from textual import work
 from textual.binding import Binding
-from textual.containers import Center, ScrollableContainer
+from textual.containers import Center, ScrollableContainer, Vertical
+from textual.geometry import Size
+from textual.message import Message
 from textual.screen import ModalScreen
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
 from textual.validation import URL
 from textual.widgets import (
     Button,
-    DirectoryTree,
     Footer,
     Input,
     Label,
+    OptionList,
     RadioButton,
     RadioSet,
+    SelectionList,
 )
+from textual.worker import get_current_worker
 
-from difflume.diffapp.modules import CouchDBModule, FSModule, URLModule
+from difflume.diffapp.finder import FileIndex, FileSearch
+from difflume.diffapp.modules import (
+    CouchDBModule,
+    FSModule,
+    GitModule,
+    ReadError,
+    URLModule,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Awaitable, Callable, Generator, Mapping, Sequence
 
     from textual import events
     from textual.app import ComposeResult
 
+    from difflume.diffapp.modules import Module
     from difflume.tui.app import DiffLume
 
+# how often the file finder shows files found by a running scan, seconds
+SCAN_REFRESH_INTERVAL = 0.2
+
 
 class Modal(ModalScreen):
     BINDINGS = [Binding("escape,q,й", "pop_screen", "Close", show=True)]
@@ -35,10 +56,28 @@ class Modal(ModalScreen):
 
 
 class SelectFileModal(Modal):
+    """
+    Fuzzy finder of files under the home directory. Files are indexed in
+    a background thread and matches are ranked in another one as you type.
+    """
+
     NAME = "File"
+    BINDINGS = [
+        *Modal.BINDINGS,
+        Binding("up", "cursor_up", "Up", show=False),
+        Binding("down", "cursor_down", "Down", show=False),
+    ]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.index = FileIndex(self.get_path_for_tree_home())
+        self.file_search = FileSearch(self.index)
+        self.search_query = ""
 
     def compose(self) -> Generator[ComposeResult, None, None]:
-        yield DirectoryTree(self.get_path_for_tree_home(), id="select-file-dialog")
+        with Vertical(id="select-file-dialog"):
+            yield Input(placeholder="Search files")
+            yield OptionList()
         yield Footer()
 
     def get_path_for_tree_home(self) -> str:
@@ -46,11 +85,76 @@ class SelectFileModal(Modal):
             return from_env
         return os.getcwd()
 
-    async def on_directory_tree_file_selected(
-        self, event: DirectoryTree.FileSelected
-    ) -> None:
-        new_module = FSModule(str(event.path))
-        self.dismiss(new_module)
+    def create_module(self, path: str) -> Module:
+        return FSModule(path)
+
+    def on_mount(self) -> None:
+        self.scan_files()
+
+    @work(thread=True, exclusive=True, group="file-index", exit_on_error=False)
+    def scan_files(self) -> None:
+        worker = get_current_worker()
+        if self.index.load_cache():
+            self.app.call_from_thread(self.search, self.search_query)
+        last_refresh = 0.0
+
+        def refresh() -> None:
+            nonlocal last_refresh
+            if worker.is_cancelled:
+                return
+            if time.monotonic() - last_refresh >= SCAN_REFRESH_INTERVAL:
+                last_refresh = time.monotonic()
+                self.app.call_from_thread(self.search, self.search_query)
+
+        self.index.scan(on_batch=refresh)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.search, self.search_query)
+
+    @work(thread=True, exclusive=True, group="file-search", exit_on_error=False)
+    def search(self, query: str) -> None:
+        matches = self.file_search.search(query)
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self.show_matches, query, matches)
+
+    def show_matches(self, query: str, matches: list[str]) -> None:
+        if query != self.search_query:
+            return
+        option_list = self.query_one(OptionList)
+        highlighted = option_list.highlighted
+        option_list.clear_options()
+        # not as markup, names can have brackets
+        option_list.add_options([Text(path) for path in matches])
+        if highlighted is not None and matches:
+            option_list.highlighted = min(highlighted, len(matches) - 1)
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self.search_query = event.value
+        self.search(self.search_query)
+
+    def on_input_submitted(self) -> None:
+        option_list = self.query_one(OptionList)
+        if option_list.option_count:
+            self.select(option_list.highlighted or 0)
+
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
+        self.select(event.option_index)
+
+    def select(self, index: int) -> None:
+        path = str(self.query_one(OptionList).get_option_at_index(index).prompt)
+        self.dismiss(self.create_module(os.path.join(self.index.root, path)))
+
+    def action_cursor_up(self) -> None:
+        self.query_one(OptionList).action_cursor_up()
+
+    def action_cursor_down(self) -> None:
+        self.query_one(OptionList).action_cursor_down()
+
+
+class SelectGitFileModal(SelectFileModal):
+    NAME = "File from git"
+
+    def create_module(self, path: str) -> Module:
+        return GitModule(path)
 
 
 class URLModalComposeMixin:
@@ -81,10 +185,11 @@ class SelectCouchDBURLModal(URLModalComposeMixin, Modal):
 
 
 class OpenFileModal(Modal):
-    CHILD_MODALS = [
+    CHILD_MODALS: list[type[Modal]] = [
         SelectURLModal,
         SelectFileModal,
         SelectCouchDBURLModal,
+        SelectGitFileModal,
     ]
 
     def compose(self) -> Generator[ComposeResult, None, None]:
@@ -107,6 +212,25 @@ class OpenFileModal(Modal):
             self.dismiss(selected_modal.__name__)
 
 
+class InputModal(Modal):
+    def __init__(self, label: str, *, placeholder: str = "") -> None:
+        super().__init__()
+        self.label = label
+        self.placeholder = placeholder
+
+    def compose(self) -> Generator[ComposeResult, None, None]:
+        yield Center(
+            Label(self.label, id="input-dialog-label"),
+            Input(placeholder=self.placeholder),
+            id="input-dialog",
+        )
+        yield Footer()
+
+    async def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.value:
+            self.dismiss(event.value)
+
+
 class RadioButtonsModal(Modal):
     def __init__(self, label: str, *, current: str, options: list[str]) -> None:
         super().__init__()
@@ -124,3 +248,246 @@ class RadioButtonsModal(Modal):
 
     def on_radio_set_changed(self, event: RadioSet.Changed) -> None:
         self.dismiss(str(event.pressed.label))
+
+
+HIGHLIGHTED_REVISION_STYLE = Style(reverse=True)
+CURRENT_REVISION_STYLE = Style(bold=True)
+REVISION_INFO_STYLE = Style(color="bright_black")
+
+
+class RevisionList(ScrollView, can_focus=True):
+    """
+    List of revisions that renders only the visible rows, so it opens as
+    fast for thousands of revisions as for a few. Descriptions of revisions
+    are loaded with `load_info` when their rows are shown.
+    """
+
+    BINDINGS = [
+        Binding("up", "cursor_up", "Up", show=False),
+        Binding("down", "cursor_down", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("enter", "select", "Select", show=False),
+    ]
+
+    class Selected(Message):
+        def __init__(self, revision: str) -> None:
+            super().__init__()
+            self.revision = revision
+
+    def __init__(
+        self,
+        revisions: Sequence[str],
+        *,
+        current: str = "",
+        highlighted: str | None = None,
+        info: Mapping[str, str] | None = None,
+        load_info: Callable[[Sequence[str]], Awaitable[None]] | None = None,
+        id: str | None = None,
+    ) -> None:
+        super().__init__(id=id)
+        self.revisions = revisions
+        # revisions that match the filter
+        self.shown = revisions
+        self.current = current
+        self.info = info if info is not None else {}
+        self.load_info = load_info
+        # the current revision unless another one is given
+        if highlighted is None:
+            highlighted = current
+        self.highlighted = (
+            revisions.index(highlighted) if highlighted in revisions else 0
+        )
+        self.virtual_size = Size(0, len(self.shown))
+
+    def on_mount(self) -> None:
+        self.call_after_refresh(self.scroll_to_highlighted, center=True)
+
+    def on_resize(self) -> None:
+        self.load_visible_info()
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self.load_visible_info()
+
+    def render_line(self, y: int) -> Strip:
+        width = self.size.width
+        index = round(self.scroll_y) + y
+        if index >= len(self.shown):
+            return Strip.blank(width, self.rich_style)
+        revision = self.shown[index]
+        line = Text(
+            revision, style=CURRENT_REVISION_STYLE if revision == self.current else ""
+        )
+        if info := self.info.get(revision):
+            line.append(f"  {info}", style=REVISION_INFO_STYLE)
+        line.truncate(width, overflow="ellipsis", pad=True)
+        if index == self.highlighted:
+            line.stylize(HIGHLIGHTED_REVISION_STYLE)
+        return Strip(line.render(self.app.console)).adjust_cell_length(
+            width, self.rich_style
+        )
+
+    def visible_revisions(self) -> Sequence[str]:
+        top = round(self.scroll_y)
+        bottom = top + self.size.height
+        return self.shown[top:bottom]
+
+    @work(exclusive=True, group="revisions-info", exit_on_error=False)
+    async def load_visible_info(self) -> None:
+        if self.load_info is None:
+            return
+        missing = [rev for rev in self.visible_revisions() if rev not in self.info]
+        if not missing:
+            return
+        try:
+            await self.load_info(missing)
+        except ReadError:
+            # descriptions are optional, revisions are shown without them
+            self.load_info = None
+            return
+        self.refresh()
+
+    def filter(self, query: str) -> None:
+        """
+        Show only revisions that contain the query, ignoring case.
+        """
+        highlighted = self.shown[self.highlighted] if self.shown else None
+        query = query.casefold()
+        self.shown = (
+            [revision for revision in self.revisions if query in revision.casefold()]
+            if query
+            else self.revisions
+        )
+        self.highlighted = (
+            self.shown.index(highlighted) if highlighted in self.shown else 0
+        )
+        self.virtual_size = Size(0, len(self.shown))
+        self.scroll_to_highlighted(center=True)
+        self.refresh()
+        self.load_visible_info()
+
+    def scroll_to_highlighted(self, *, center: bool = False) -> None:
+        top, height = round(self.scroll_y), self.size.height
+        if center:
+            self.scroll_to(y=max(self.highlighted - height // 2, 0), animate=False)
+        elif self.highlighted < top:
+            self.scroll_to(y=self.highlighted, animate=False)
+        elif self.highlighted >= top + height:
+            self.scroll_to(y=self.highlighted - height + 1, animate=False)
+
+    def move_highlight(self, delta: int) -> None:
+        if not self.shown:
+            return
+        self.highlighted = min(max(self.highlighted + delta, 0), len(self.shown) - 1)
+        self.scroll_to_highlighted()
+        self.refresh()
+
+    def action_cursor_up(self) -> None:
+        self.move_highlight(-1)
+
+    def action_cursor_down(self) -> None:
+        self.move_highlight(1)
+
+    def action_page_up(self) -> None:
+        self.move_highlight(-max(self.size.height - 1, 1))
+
+    def action_page_down(self) -> None:
+        self.move_highlight(max(self.size.height - 1, 1))
+
+    def action_select(self) -> None:
+        if self.shown:
+            self.post_message(self.Selected(self.shown[self.highlighted]))
+
+    def on_click(self, event: events.Click) -> None:
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return
+        index = round(self.scroll_y) + offset.y
+        if index < len(self.shown):
+            self.highlighted = index
+            self.action_select()
+
+
+class RevisionsModal(Modal):
+    """
+    Revisions to select from, filtered by the typed text.
+    """
+
+    BINDINGS = [
+        *Modal.BINDINGS,
+        Binding("up", "move_highlight(-1)", "Up", show=False),
+        Binding("down", "move_highlight(1)", "Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+    ]
+
+    def __init__(
+        self,
+        label: str,
+        *,
+        current: str,
+        revisions: Sequence[str],
+        highlighted: str | None = None,
+        info: Mapping[str, str] | None = None,
+        load_info: Callable[[Sequence[str]], Awaitable[None]] | None = None,
+    ) -> None:
+        super().__init__()
+        self.label = label
+        self.current = current
+        self.highlighted = highlighted
+        self.revisions = revisions
+        self.info = info
+        self.load_info = load_info
+
+    def compose(self) -> Generator[ComposeResult, None, None]:
+        with Vertical(id="revisions-dialog"):
+            yield Label(self.label, id="revisions-dialog-label")
+            yield Input(placeholder=f"Filter {len(self.revisions)} revisions")
+            yield RevisionList(
+                self.revisions,
+                current=self.current,
+                highlighted=self.highlighted,
+                info=self.info,
+                load_info=self.load_info,
+            )
+        yield Footer()
+
+    def action_move_highlight(self, delta: int) -> None:
+        self.query_one(RevisionList).move_highlight(delta)
+
+    def action_page_up(self) -> None:
+        self.query_one(RevisionList).action_page_up()
+
+    def action_page_down(self) -> None:
+        self.query_one(RevisionList).action_page_down()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self.query_one(RevisionList).filter(event.value)
+
+    def on_input_submitted(self) -> None:
+        self.query_one(RevisionList).action_select()
+
+    def on_revision_list_selected(self, event: RevisionList.Selected) -> None:
+        self.dismiss(event.revision)
+
+
+class CheckboxesModal(Modal):
+    BINDINGS = [Binding("escape,q,й", "apply", "Apply", show=True)]
+
+    def __init__(self, label: str, *, options: list[str], selected: list[str]) -> None:
+        super().__init__()
+        self.label = label
+        self.options = options
+        self.selected = selected
+
+    def compose(self) -> Generator[ComposeResult, None, None]:
+        with ScrollableContainer(id="checkboxes-dialog"):
+            yield Label(self.label, id="checkboxes-dialog-label")
+            yield SelectionList[str](
+                *[(option, option, option in self.selected) for option in self.options]
+            )
+        yield Footer()
+
+    def action_apply(self) -> None:
+        self.dismiss(self.query_one(SelectionList).selected)
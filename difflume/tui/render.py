@@ -0,0 +1,126 @@
+"""
+Cache of highlighted panel content. Switching back to a recently viewed
+revision reuses the highlighted text and its lines wrapped to the panel
+width instead of highlighting and wrapping the whole text again.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from difflume.settings import env_int
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterable
+
+    from rich.console import Console, ConsoleOptions
+    from rich.measure import Measurement
+    from rich.segment import Segment
+    from rich.text import Text
+
+# in characters of cached texts, each wrapped copy counts separately
+DEFAULT_RENDER_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class RenderCache:
+    """
+    LRU cache of highlighted texts and their rendered segments, limited by
+    the total size of cached texts.
+    """
+
+    def __init__(self, max_size: int | None = None) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self.size = 0
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        return env_int("RENDER_CACHE_SIZE", DEFAULT_RENDER_CACHE_SIZE)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def _get(self, key: Hashable) -> object | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _put(self, key: Hashable, value: object, size: int) -> None:
+        if size > self.max_size:
+            return
+        self._entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def text(self, key: Hashable, highlight: Callable[[], Text]) -> Text:
+        """
+        Highlighted text, e.g. by (content digest, highlighter).
+        The text is shared, copy it before changing.
+        """
+        cached = self._get(("text", key))
+        if cached is not None:
+            return cached  # type: ignore[return-value]
+        text = highlight()
+        self._put(("text", key), text, len(text))
+        return text
+
+    def segments(
+        self, key: Hashable, text: Text, console: Console, options: ConsoleOptions
+    ) -> list[Segment]:
+        """
+        The text rendered with the options, by the text key and the width.
+        """
+        segments_key = (
+            "segments",
+            key,
+            options.max_width,
+            options.no_wrap,
+            options.overflow,
+            options.justify,
+        )
+        cached = self._get(segments_key)
+        if cached is not None:
+            return cached  # type: ignore[return-value]
+        segments = list(console.render(text, options))
+        self._put(segments_key, segments, len(text))
+        return segments
+
+
+render_cache = RenderCache()
+
+
+class CachedText:
+    """
+    Renderable for a highlighted text from the cache. Rendered segments are
+    cached too, so the text is wrapped once for each panel width.
+    """
+
+    def __init__(
+        self, text: Text, *, key: Hashable, cache: RenderCache = render_cache
+    ) -> None:
+        self.text = text
+        self.key = key
+        self.cache = cache
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> Iterable[Segment]:
+        return self.cache.segments(self.key, self.text, console, options)
+
+    def __rich_measure__(
+        self, console: Console, options: ConsoleOptions
+    ) -> Measurement:
+        return self.text.__rich_measure__(console, options)
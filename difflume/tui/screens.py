@@ -1,8 +1,13 @@
 # mypy: disable-error-code="override, misc"
 from __future__ import annotations
 
+import asyncio
+import bisect
 import contextlib
+import functools
 import os
+import weakref
+from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING, Literal
 
@@ -13,17 +18,61 @@ from textual import work
 from textual.binding import Binding
 from textual.containers import Horizontal
 from textual.screen import Screen
-from textual.widgets import Footer, Header, Markdown
-
-from difflume.diffapp.differ import DiffType, HighlightType, create_diff
-from difflume.diffapp.modules import Module, ReadError, TextType
+from textual.widgets import Footer, Header, Label, Markdown, OptionList
+from textual.worker import get_current_worker
+
+from difflume.diffapp.couchdb import document_url
+from difflume.diffapp.dbcompare import DatabaseCompareError, DatabaseComparison
+from difflume.diffapp.differ import (
+    DEFAULT_PRESERVE_ROWS,
+    DiffResult,
+    DiffStats,
+    DiffType,
+    HighlightType,
+    common_prefix_len,
+    create_diff,
+    expand_hidden,
+    recollapse,
+)
+from difflume.diffapp.export import export_diff
+from difflume.diffapp.history import find_value_introduced, scan_history
+from difflume.diffapp.modules import (
+    CouchDBModule,
+    Module,
+    ReadError,
+    RevisionNotFoundError,
+    TextType,
+)
+from difflume.diffapp.normalize import Normalization
+from difflume.diffapp.prefetch import (
+    DEFAULT_PREFETCH_REVISIONS,
+    DiffCache,
+    diff_key,
+    pairs_ahead,
+)
+from difflume.settings import env_int
 from difflume.tui import modals
-from difflume.tui.widgets import LeftPanel, MiddlePanel, Panel, PanelType, RightPanel
+from difflume.tui.render import render_cache
+from difflume.tui.widgets import (
+    LeftPanel,
+    MiddlePanel,
+    Panel,
+    PanelType,
+    RightPanel,
+    SearchBar,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Awaitable, Callable, Generator, Hashable, Sequence
 
+    from httpx import AsyncClient
     from textual.app import ComposeResult
+    from textual.worker import Worker
+
+    from difflume.diffapp.dbcompare import DocumentDiff
+    from difflume.diffapp.history import HistoryIndex
+    from difflume.diffapp.prefetch import DiffKey
+    from difflume.diffapp.search import Match
 
 
 class HelpScreen(Screen):
@@ -50,12 +99,76 @@ DIFF_COLORS = {
 }
 
 
+@dataclass
+class RenderedDiff:
+    result: DiffResult
+    text: Text
+
+
+def highlight_diff(text: str, result: DiffResult) -> Text:
+    highlighted = Text(text)
+    for highlight_type, regexp in result.highlight_regexps:
+        highlighted.highlight_regex(regexp, Style(bgcolor=DIFF_COLORS[highlight_type]))
+    return highlighted
+
+
+def render_diff(result: DiffResult, previous: RenderedDiff | None = None) -> Text:
+    """
+    Highlight the diff. If the previous rendered diff is passed, reuse
+    its highlighted text up to the first changed line.
+    """
+    if previous is None or previous.result.diff_type is not result.diff_type:
+        return highlight_diff(result.text, result)
+
+    unchanged = common_prefix_len(previous.result.lines, result.lines)
+    if unchanged == len(result.lines) == len(previous.result.lines):
+        return previous.text
+    if unchanged == 0:
+        return highlight_diff(result.text, result)
+    # keep the newline before the first changed line in the highlighted tail,
+    # so regexps match the same way as in the full text
+    offset = sum(len(line) + 1 for line in result.lines[:unchanged]) - 1
+    text = previous.text[:offset]
+    if unchanged < len(result.lines):
+        tail = "\n".join(["", *result.lines[unchanged:]])
+        text.append_text(highlight_diff(tail, result))
+    return text
+
+
+def expand_rendered_diff(rendered: RenderedDiff, index: int) -> RenderedDiff:
+    """
+    Expand the `index`-th collapsed part of the rendered diff. Only the
+    expanded lines are highlighted, the rest of the highlighted text is reused.
+    """
+    lines = rendered.result.lines
+    delimiter = rendered.result.hidden[index].line
+    result = expand_hidden(rendered.result, index)
+    shown_end = delimiter + len(result.lines) - len(lines) + 1
+    start = sum(len(line) + 1 for line in lines[:delimiter])
+    end = start + len(lines[delimiter])
+    shown = "\n".join(result.lines[delimiter:shown_end])
+    if start:
+        # the highlight of the delimiter starts at the newline before it,
+        # so the newline is highlighted again with the expanded lines
+        start -= 1
+        shown = "\n" + shown
+    text = rendered.text[:start]
+    text.append_text(highlight_diff(shown, result))
+    text.append_text(rendered.text[end:])
+    return RenderedDiff(result=result, text=text)
+
+
 class DiffScreen(Screen):
     CSS_PATH = os.path.join("css", "main.tcss")
     BINDINGS = [
         Binding(
             "question_mark,comma,&,.,/", "push_screen('help')", "Help", key_display="?"
         ),
+        Binding("ctrl+f", "start_search", "Search", show=False),
+        Binding("n,т", "next_match", "Next Match", show=False),
+        Binding("N,Т", "prev_match", "Prev Match", show=False),
+        Binding("j,о", "next_change", "Next Change", show=False),
+        Binding("k,л", "prev_change", "Prev Change", show=False),
         Binding("f1", "select_file('left')", "Open Left", show=True),
         Binding("f2", "select_file('right')", "Open Right", show=True),
         Binding("[,х", "prev_revision", "Prev Revision", show=False),
@@ -76,12 +189,31 @@ class DiffScreen(Screen):
         name: str | None = None,
         id: str | None = None,
         classes: str | None = None,
+        *,
+        modules: dict[PanelType, tuple[Module, str | None]] | None = None,
+        loading: Awaitable | None = None,
     ) -> None:
         super().__init__(name=name, id=id, classes=classes)
+        # modules to open on mount with their revisions, and the loading
+        # of them started before the screen
+        self.initial_modules = modules or {}
+        self.initial_loading = loading
         self.modules: dict[PanelType, Module | None] = {
             PanelType.LEFT: None,
             PanelType.RIGHT: None,
         }
+        self.watchers: dict[PanelType, Worker] = {}
+        self.rendered_diff: RenderedDiff | None = None
+        # index of the hunk the diff panel was scrolled to
+        self.current_hunk = -1
+        self.histories: weakref.WeakKeyDictionary[
+            Module, tuple[tuple[str, ...], HistoryIndex]
+        ] = weakref.WeakKeyDictionary()
+        self.search_panel_type = PanelType.MIDDLE
+        self.search_query = ""
+        self.search_origin = 0
+        self.search_match: Match | None = None
+        self.diff_cache = DiffCache()
 
     @property
     def left_module(self) -> Module | None:
@@ -97,6 +229,7 @@ class DiffScreen(Screen):
             yield LeftPanel()
             yield MiddlePanel()
             yield RightPanel()
+        yield SearchBar(classes="disabled")
         yield Footer()
 
     def query_panel(self, panel_type: PanelType = PanelType.FOCUS) -> Panel:
@@ -142,50 +275,97 @@ class DiffScreen(Screen):
         )
 
     def prev_revision(self, *panel: Panel) -> None:
-        try:
-            indexes = [p.revisions.index(p.current_revision or "") for p in panel]
-        except ValueError:
-            return
-        if any(i == len(p.revisions) - 1 for i, p in zip(indexes, panel)):
-            return
-        for i, p in zip(indexes, panel):
-            self.set_revision(p.revisions[i + 1], panel=p)
-            if i + 2 < len(p.revisions):
-                self.preload_revision(p.revisions[i + 2], panel=p)
+        self.step_revisions(1, *panel)
 
     def next_revision(self, *panel: Panel) -> None:
+        self.step_revisions(-1, *panel)
+
+    def step_revisions(self, step: int, *panel: Panel) -> None:
+        """
+        Show the older (`step=1`) or newer (`step=-1`) revision in the panels.
+        Stepping both panels in sync prefetches diffs of the next steps.
+        """
         try:
             indexes = [p.revisions.index(p.current_revision or "") for p in panel]
         except ValueError:
             return
-        if 0 in indexes:
+        if any(not 0 <= i + step < len(p.revisions) for i, p in zip(indexes, panel)):
             return
+        self.set_revisions(
+            [(p, p.revisions[i + step]) for i, p in zip(indexes, panel)],
+            prefetch_step=step if len(panel) > 1 else None,
+        )
         for i, p in zip(indexes, panel):
-            self.set_revision(p.revisions[i - 1], panel=p)
-            if i - 2 >= 0:
-                self.preload_revision(p.revisions[i - 2], panel=p)
+            if 0 <= i + 2 * step < len(p.revisions):
+                self.preload_revision(p.revisions[i + 2 * step], panel=p)
+
+    @work
+    async def open_initial_modules(self) -> None:
+        for panel_type in self.initial_modules:
+            self.set_loading_styles(panel_type)
+        if self.initial_loading is not None:
+            await self.initial_loading
+        await asyncio.gather(
+            *[
+                self.open_module(module, panel_type=panel_type, revision=revision)
+                for panel_type, (module, revision) in self.initial_modules.items()
+            ]
+        )
+        self.update_diff_panel()
 
     @work
     async def load_panel(self, module: Module, *, panel_type: PanelType) -> None:
+        if await self.open_module(module, panel_type=panel_type):
+            self.update_diff_panel()
+
+    async def open_module(
+        self, module: Module, *, panel_type: PanelType, revision: str | None = None
+    ) -> bool:
+        """
+        Load the module and show it in the panel.
+        Return False if it couldn't be loaded.
+        """
+        self.stop_watching(panel_type)
         self.set_loading_styles(panel_type)
-        self.modules[panel_type] = module
+        previous, self.modules[panel_type] = self.modules[panel_type], module
+        if previous is not None and previous not in self.modules.values():
+            await previous.close()
 
         try:
             await module.load()
         except ReadError as e:
             self.show_error(str(e))
             self.set_empty_styles(panel_type)
-            return
+            return False
 
         panel = self.query_panel(panel_type)
         panel.revisions = list(module.revisions)
         panel.current_revision = next(iter(module.revisions), None)
+        if revision is not None:
+            panel.current_revision = await self.find_revision(module, revision)
 
         self.apply_module_to_panel(module, panel)
-        self.update_diff_panel()
 
         if len(panel.revisions) > 1:
             self.preload_revision(panel.revisions[1], panel=panel)
+        return True
+
+    async def find_revision(self, module: Module, revision: str) -> str | None:
+        """
+        Load the revision given by its prefix, or for git by a ref or hash.
+        Fall back to the latest revision if there is no such revision.
+        """
+        latest = next(iter(module.revisions), None)
+        found = await module.find_revision(revision)
+        if found is None:
+            self.show_error(f"Revision {revision} not found, showing the latest one")
+            return latest
+        try:
+            await module.load_revision(found)
+        except ReadError as e:
+            self.show_error(str(e))
+            return latest
+        return found
 
     def show_error(self, message: str) -> None:
         self.notify(message, title="ERROR", severity="error", timeout=10)
@@ -206,40 +386,224 @@ class DiffScreen(Screen):
         if module is None:
             panel.set_empty()
             return
-        highlighter = get_highlighter(
-            module.get_content(panel.current_revision).text_type
+        content = module.get_content(panel.current_revision)
+        highlighter = get_highlighter(content.text_type)
+        key = (content.digest, type(highlighter).__name__)
+        text = render_cache.text(key, lambda: highlighter(Text(content.text)))
+        # rich strips control codes, then the offsets don't match
+        same_text = len(text.plain) == len(content.text)
+        panel.update(
+            text,
+            line_starts=content.line_starts if same_text else None,
+            render_key=key,
         )
-        panel.update(highlighter(Text(module.get_content(panel.current_revision).text)))
         panel.revisions = list(module.revisions)
-
-    def update_diff_panel(self) -> None:
+        panel.revisions_info = module.revisions_info
+        panel.load_revisions_info = module.load_revisions_info
+
+    def update_diff_panel(self, *, incremental: bool = False) -> None:
+        """
+        Diff the content of left and right panels.
+        With `incremental=True` only the changed part of the content is diffed
+        and highlighted again. Diffs that aren't cached are made in a thread,
+        the current diff is shown until then.
+        """
+        self.current_hunk = -1
+        # a diff still being made is outdated now
+        self.workers.cancel_group(self, "diff")
         if not self.left_module or not self.right_module:
+            self.rendered_diff = None
+            self.sub_title = None
             return
         if not self.left_module.ready() or not self.right_module.ready():
+            self.rendered_diff = None
+            self.sub_title = None
             return
 
         left_panel = self.query_panel(PanelType.LEFT)
         middle_panel = self.query_panel(PanelType.MIDDLE)
         right_panel = self.query_panel(PanelType.RIGHT)
-        diff_result = create_diff(
-            self.left_module.get_content(left_panel.current_revision).text,
-            self.right_module.get_content(right_panel.current_revision).text,
-            DiffType(middle_panel.current_diff_type),
-        )
-        diff_highlighted = Text(diff_result.text)
-        for highlight_type, regexp in diff_result.highlight_regexps:
-            diff_highlighted.highlight_regex(
-                regexp, Style(bgcolor=DIFF_COLORS[highlight_type])
+        previous = self.rendered_diff if incremental else None
+        diff_type = DiffType(middle_panel.current_diff_type)
+        normalization = Normalization.from_rules(middle_panel.ignore_rules)
+        content = self.left_module.get_content(left_panel.current_revision)
+        content_to_compare = self.right_module.get_content(right_panel.current_revision)
+        key = diff_key(content, content_to_compare, diff_type, normalization)
+        diff_result = self.diff_cache.get(key)
+        if diff_result is None:
+            self.make_diff(
+                key,
+                functools.partial(
+                    create_diff,
+                    content.text,
+                    content_to_compare.text,
+                    diff_type,
+                    previous=previous.result if previous else None,
+                    normalization=normalization,
+                    lines=content.lines,
+                    lines_to_compare=content_to_compare.lines,
+                ),
+                previous=previous,
+            )
+            return
+        self.show_diff(key, diff_result, previous=previous)
+
+    @work(exclusive=True, group="diff")
+    async def make_diff(
+        self,
+        key: DiffKey,
+        diff: Callable[..., DiffResult],
+        *,
+        previous: RenderedDiff | None,
+    ) -> None:
+        worker = get_current_worker()
+
+        def show_stats(stats: DiffStats) -> None:
+            # the header is filled while the diff is formatted
+            if not worker.is_cancelled:
+                self.app.call_from_thread(setattr, self, "sub_title", str(stats))
+
+        # diffing big texts takes seconds, the UI must not freeze meanwhile
+        diff_result = await asyncio.to_thread(diff, on_stats=show_stats)
+        self.diff_cache.put(key, diff_result)
+        self.show_diff(key, diff_result, previous=previous)
+
+    def show_diff(
+        self,
+        key: DiffKey,
+        diff_result: DiffResult,
+        *,
+        previous: RenderedDiff | None,
+    ) -> None:
+        middle_panel = self.query_panel(PanelType.MIDDLE)
+        render_key: Hashable | None = ("diff", key)
+        rows = middle_panel.context_rows
+        if (
+            DiffType(middle_panel.current_diff_type) is DiffType.NDIFF_COLLAPSED
+            and rows != DEFAULT_PRESERVE_ROWS
+        ):
+            # collapsed again from the cached diff, without diffing
+            diff_result = recollapse(diff_result, rows)
+            render_key = ("diff", key, rows)
+        if previous is None:
+            diff_highlighted = render_cache.text(
+                render_key, lambda: highlight_diff(diff_result.text, diff_result)
             )
-        middle_panel.update(diff_highlighted)
+        else:
+            render_key = None
+            diff_highlighted = render_diff(diff_result, previous)
+        self.rendered_diff = RenderedDiff(result=diff_result, text=diff_highlighted)
+        middle_panel.update(diff_highlighted, render_key=render_key)
+        self.sub_title = str(diff_result.stats)
+
+    def action_next_change(self) -> None:
+        self.go_to_hunk(self.current_hunk + 1)
+
+    def action_prev_change(self) -> None:
+        self.go_to_hunk(self.current_hunk - 1)
+
+    def go_to_hunk(self, hunk: int) -> None:
+        if self.rendered_diff is None or not self.rendered_diff.result.hunks:
+            return
+        hunks = self.rendered_diff.result.hunks
+        self.current_hunk = min(max(hunk, 0), len(hunks) - 1)
+        panel = self.query_panel(PanelType.MIDDLE)
+        panel.scroll_to_line(panel.text_index(), hunks[self.current_hunk])
+
+    def action_start_search(self) -> None:
+        panel = self.focused
+        if not isinstance(panel, Panel):
+            panel = self.query_panel(PanelType.MIDDLE)
+        self.search_panel_type = panel.TYPE
+        # incremental search starts from the top of the visible text
+        index = panel.text_index()
+        self.search_origin = index.line_start(panel.top_line(index))
+        self.search_match = None
+        search_bar = self.query_one(SearchBar)
+        search_bar.set_status("")
+        search_bar.open()
+
+    def action_next_match(self) -> None:
+        offset = self.search_match.start + 1 if self.search_match else 0
+        self.find(self.search_query, offset=offset)
+
+    def action_prev_match(self) -> None:
+        offset = self.search_match.start if self.search_match else 0
+        self.find(self.search_query, offset=offset, backwards=True)
+
+    def find(self, query: str, *, offset: int, backwards: bool = False) -> None:
+        """
+        Highlight the first match of the query in the searched panel
+        and scroll to it.
+        """
+        if not query:
+            return
+        panel = self.query_panel(self.search_panel_type)
+        index = panel.text_index()
+        self.search_match = next(
+            index.search(query, offset=offset, backwards=backwards), None
+        )
+        search_bar = self.query_one(SearchBar)
+        if self.search_match is None:
+            panel.clear_highlight()
+            search_bar.set_status("No matches")
+            if search_bar.has_class("disabled"):
+                self.notify(f"No matches for {query}")
+            return
+        panel.highlight(self.search_match.start, self.search_match.end)
+        panel.scroll_to_line(index, self.search_match.line)
+        search_bar.set_status(f"Line {self.search_match.line + 1} of {len(index)}")
+
+    def on_search_bar_query_changed(self, event: SearchBar.QueryChanged) -> None:
+        self.search_query = event.query
+        if not event.query:
+            self.search_match = None
+            self.query_panel(self.search_panel_type).clear_highlight()
+            return
+        self.find(event.query, offset=self.search_origin)
+
+    def on_search_bar_submitted(self, event: SearchBar.Submitted) -> None:
+        self.search_query = event.query
+        self.query_panel(self.search_panel_type).focus()
+
+    def on_search_bar_closed(self) -> None:
+        self.search_match = None
+        panel = self.query_panel(self.search_panel_type)
+        panel.clear_highlight()
+        panel.focus()
 
     def on_panel_revision_selected(self, event: Panel.RevisionSelected) -> None:
         panel = self.query_panel(event.panel_type)
         self.set_revision(event.revision, panel=panel)
 
+    def set_revision(self, revision: str, *, panel: Panel) -> None:
+        self.set_revisions([(panel, revision)])
+
     @work
-    async def set_revision(self, revision: str, *, panel: Panel) -> None:
-        self.set_loading_styles(panel.TYPE)
+    async def set_revisions(
+        self,
+        revisions: Sequence[tuple[Panel, str]],
+        *,
+        prefetch_step: int | None = None,
+    ) -> None:
+        """
+        Load and show revisions in the panels, then diff them once.
+        """
+        for panel, _ in revisions:
+            self.set_loading_styles(panel.TYPE)
+        shown = await asyncio.gather(
+            *[
+                self.show_revision(revision, panel=panel)
+                for panel, revision in revisions
+            ]
+        )
+        if not all(shown):
+            return
+        self.update_diff_panel()
+        if prefetch_step is not None:
+            self.prefetch_diffs(prefetch_step)
+
+    async def show_revision(self, revision: str, *, panel: Panel) -> bool:
         module = self.modules[panel.TYPE]
         assert module, "Unexpected empty module"
 
@@ -248,12 +612,51 @@ class DiffScreen(Screen):
         except ReadError as e:
             self.show_error(str(e))
             self.set_empty_styles(panel.TYPE)
-            return
+            return False
 
         panel.current_revision = revision
-
         self.apply_module_to_panel(module, panel)
-        self.update_diff_panel()
+        return True
+
+    @work(exclusive=True, group="prefetch", exit_on_error=False)
+    async def prefetch_diffs(self, step: int) -> None:
+        """
+        Diff the revisions the panels show after the next synced steps.
+        """
+        left_module, right_module = self.left_module, self.right_module
+        if left_module is None or right_module is None:
+            return
+        left_panel = self.query_panel(PanelType.LEFT)
+        right_panel = self.query_panel(PanelType.RIGHT)
+        try:
+            pairs = pairs_ahead(
+                left_panel.revisions,
+                left_panel.revisions.index(left_panel.current_revision or ""),
+                right_panel.revisions,
+                right_panel.revisions.index(right_panel.current_revision or ""),
+                step=step,
+                count=env_int("PREFETCH_REVISIONS", DEFAULT_PREFETCH_REVISIONS),
+            )
+        except ValueError:
+            return
+        # revisions that can't be loaded are just not prefetched
+        with contextlib.suppress(ReadError):
+            await asyncio.gather(
+                left_module.load_revisions([left for left, _ in pairs]),
+                right_module.load_revisions([right for _, right in pairs]),
+            )
+        contents = []
+        for left, right in pairs:
+            with contextlib.suppress(RevisionNotFoundError):
+                contents.append(
+                    (left_module.get_content(left), right_module.get_content(right))
+                )
+        middle_panel = self.query_panel(PanelType.MIDDLE)
+        await self.diff_cache.prefetch(
+            contents,
+            DiffType(middle_panel.current_diff_type),
+            Normalization.from_rules(middle_panel.ignore_rules),
+        )
 
     @work
     async def preload_revision(self, revision: str, *, panel: Panel) -> None:
@@ -265,6 +668,104 @@ class DiffScreen(Screen):
         with contextlib.suppress(ReadError):
             await module.load_revision(revision)
 
+    def on_panel_history_search_request(
+        self, event: Panel.HistorySearchRequest
+    ) -> None:
+        module = self.modules[event.panel_type]
+        if module is None or len(module.revisions) < 2:
+            self.show_error("There is no history to search")
+            return
+        self.search_history(
+            module, event.query, panel=self.query_panel(event.panel_type)
+        )
+
+    async def get_history(self, module: Module) -> HistoryIndex:
+        """
+        Scan the history of the module, the result is cached until
+        the module gets new revisions.
+        """
+        revisions, history = self.histories.get(module, ((), None))
+        if history is None or revisions != tuple(module.revisions):
+            revisions = tuple(module.revisions)
+            history = await scan_history(module)
+            self.histories[module] = revisions, history
+        return history
+
+    @work(exclusive=True, group="history")
+    async def search_history(self, module: Module, query: str, *, panel: Panel) -> None:
+        self.notify(f"Scanning {len(module.revisions)} revisions...")
+        try:
+            history = await self.get_history(module)
+            # a JSON path query starts at the revision that set its current value
+            introduced = (
+                await find_value_introduced(module, query)
+                if query.startswith("/")
+                else None
+            )
+        except ReadError as e:
+            self.show_error(str(e))
+            return
+        revisions = history.search(query)
+        if not revisions:
+            self.notify(f"No revisions changed {query}")
+            return
+        if introduced is not None:
+            self.notify(f"The current value of {query} is from {introduced}")
+
+        def select_revision_callback(revision: str) -> None:
+            if self.modules[panel.TYPE] is module:
+                self.set_revision(revision, panel=panel)
+
+        await self.app.push_screen(
+            modals.RevisionsModal(
+                f"Revisions that changed {query}",
+                current=panel.current_revision or "",
+                revisions=revisions,
+                highlighted=introduced,
+                info=module.revisions_info,
+                load_info=module.load_revisions_info,
+            ),
+            select_revision_callback,
+        )
+
+    def on_panel_watch_request(self, event: Panel.WatchRequest) -> None:
+        if event.panel_type in self.watchers:
+            self.stop_watching(event.panel_type)
+            self.notify("Stopped watching for changes")
+            return
+        module = self.modules[event.panel_type]
+        if module is None or not module.can_watch():
+            self.show_error("Content of this panel can't be watched")
+            return
+        self.watchers[event.panel_type] = self.watch_module(module)
+        self.notify("Watching for changes")
+
+    def stop_watching(self, panel_type: PanelType) -> None:
+        if worker := self.watchers.pop(panel_type, None):
+            worker.cancel()
+
+    @work
+    async def watch_module(self, module: Module) -> None:
+        head = next(iter(module.revisions), None)
+        try:
+            async for _ in module.watch():
+                for panel_type in (PanelType.LEFT, PanelType.RIGHT):
+                    if self.modules[panel_type] is not module:
+                        continue
+                    panel = self.query_panel(panel_type)
+                    # panels that show the newest revision follow new ones
+                    if head is not None and panel.current_revision == head:
+                        panel.current_revision = module.revisions[0]
+                    self.apply_module_to_panel(module, panel)
+                head = next(iter(module.revisions), None)
+                self.update_diff_panel(incremental=True)
+        except ReadError as e:
+            self.show_error(str(e))
+            for panel_type, worker in list(self.watchers.items()):
+                if self.modules[panel_type] is module:
+                    self.watchers.pop(panel_type)
+                    worker.cancel()
+
     async def on_panel_sync_panels_request(
         self, event: Panel.SyncPanelsRequest
     ) -> None:
@@ -273,7 +774,10 @@ class DiffScreen(Screen):
 
     def sync_panels(self, from_panel: Panel) -> None:
         module = self.modules[from_panel.TYPE]
+        replaced = set(filter(None, self.modules.values())) - {module}
         self.modules[PanelType.LEFT] = self.modules[PanelType.RIGHT] = module
+        for old_module in replaced:
+            self.run_worker(old_module.close())
         to_panel = self.query_panel(
             next(
                 type_
@@ -292,7 +796,169 @@ class DiffScreen(Screen):
     ) -> None:
         self.update_diff_panel()
 
+    def on_panel_context_rows_selected(
+        self,
+        event: Panel.ContextRowsSelected,  # noqa: U100
+    ) -> None:
+        self.update_diff_panel()
+
+    def on_panel_expand_request(self, event: Panel.ExpandRequest) -> None:
+        if self.rendered_diff is None:
+            return
+        hidden = self.rendered_diff.result.hidden
+        index = bisect.bisect_left(hidden, event.start, key=lambda h: h.line)
+        if index == len(hidden) or hidden[index].line >= event.end:
+            return
+        self.rendered_diff = expand_rendered_diff(self.rendered_diff, index)
+        self.query_panel(PanelType.MIDDLE).update(self.rendered_diff.text)
+
+    def on_panel_export_request(self, event: Panel.ExportRequest) -> None:
+        if self.rendered_diff is None:
+            self.show_error("There is no diff to export")
+            return
+        self.export(event.path, self.rendered_diff.result)
+
+    def module_label(self, panel_type: PanelType) -> str:
+        module = self.modules[panel_type]
+        if module is None:
+            return ""
+        revision = self.query_panel(panel_type).current_revision
+        return f"{module.name}@{revision}" if revision else module.name
+
+    @work(exclusive=True, group="export")
+    async def export(self, path: str, result: DiffResult) -> None:
+        try:
+            await asyncio.to_thread(
+                export_diff,
+                result,
+                os.path.expanduser(path),
+                fromfile=self.module_label(PanelType.LEFT),
+                tofile=self.module_label(PanelType.RIGHT),
+            )
+        except OSError as e:
+            self.show_error(f"Could not export the diff: {e}")
+            return
+        self.notify(f"Exported to {path}")
+
+    def on_panel_ignore_rules_selected(
+        self,
+        event: Panel.IgnoreRulesSelected,  # noqa: U100
+    ) -> None:
+        self.update_diff_panel()
+
     def on_mount(self) -> None:
         self.query_panel(PanelType.LEFT).set_empty()
         self.query_panel(PanelType.MIDDLE).update("")
         self.query_panel(PanelType.RIGHT).set_empty()
+        if self.initial_modules:
+            self.open_initial_modules()
+
+    async def on_unmount(self) -> None:
+        for module in set(filter(None, self.modules.values())):
+            await module.close()
+
+
+class DocumentDiffScreen(DiffScreen):
+    """
+    Diff of a document from the list of differing documents.
+    """
+
+    BINDINGS = [
+        Binding("escape,backspace", "app.pop_screen", "Back", show=True),
+        *DiffScreen.BINDINGS,
+    ]
+
+
+class DatabasesScreen(Screen):
+    """
+    Documents that differ between two CouchDB databases, listed as they are
+    found. Selecting a document opens its diff.
+    """
+
+    CSS_PATH = os.path.join("css", "main.tcss")
+    BINDINGS = [
+        Binding(
+            "question_mark,comma,&,.", "push_screen('help')", "Help", key_display="?"
+        ),
+    ]
+
+    def __init__(
+        self,
+        database_url: str,
+        database_url_to_compare: str,
+        *,
+        client: AsyncClient,
+    ) -> None:
+        super().__init__()
+        self.client = client
+        self.comparison = DatabaseComparison(
+            database_url, database_url_to_compare, client=client
+        )
+        self.diffs: list[DocumentDiff] = []
+
+    def compose(self) -> Generator[ComposeResult, None, None]:
+        yield Header()
+        yield Label(id="databases-status")
+        yield OptionList(id="databases-list")
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.title = (
+            f"{self.comparison.database_url}"
+            f" → {self.comparison.database_url_to_compare}"
+        )
+        self.query_one(OptionList).focus()
+        self.compare()
+
+    def update_status(self, *, done: bool = False) -> None:
+        state = "Compared" if done else "Comparing..."
+        self.query_one("#databases-status", Label).update(
+            f"{state} {self.comparison.listed} documents listed,"
+            f" {len(self.diffs)} differ"
+        )
+
+    @work(exclusive=True, group="compare-databases")
+    async def compare(self) -> None:
+        self.update_status()
+        diffs = self.comparison.run()
+        try:
+            async for batch in diffs:
+                self.diffs.extend(batch)
+                # not as markup, ids can have brackets
+                self.query_one(OptionList).add_options(
+                    [Text(f"{diff.doc_id}  {diff.summary}") for diff in batch]
+                )
+                self.update_status()
+        except DatabaseCompareError as e:
+            self.notify(str(e), title="ERROR", severity="error", timeout=10)
+            return
+        finally:
+            await diffs.aclose()
+        self.update_status(done=True)
+
+    async def on_option_list_option_selected(
+        self, event: OptionList.OptionSelected
+    ) -> None:
+        diff = self.diffs[event.option_index]
+        modules: dict[PanelType, tuple[Module, str | None]] = {
+            panel_type: (
+                CouchDBModule(
+                    document_url(database_url, diff.doc_id), client=self.client
+                ),
+                revision,
+            )
+            for panel_type, database_url, revision in (
+                (PanelType.LEFT, self.comparison.database_url, diff.rev),
+                (
+                    PanelType.RIGHT,
+                    self.comparison.database_url_to_compare,
+                    diff.rev_to_compare,
+                ),
+            )
+            if revision is not None
+        }
+        loading = asyncio.gather(
+            *[module.load() for module, _ in modules.values()],
+            return_exceptions=True,
+        )
+        await self.app.push_screen(DocumentDiffScreen(modules=modules, loading=loading))
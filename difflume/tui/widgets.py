@@ -1,22 +1,40 @@
 # mypy: disable-error-code="override, misc"
 from __future__ import annotations
 
+import bisect
+from array import array
 from enum import Enum
 from typing import TYPE_CHECKING
 
+from rich.cells import cell_len
+from rich.style import Style
+from rich.text import Text
 from textual.binding import Binding
-from textual.containers import VerticalScroll
+from textual.containers import Horizontal, VerticalScroll
 from textual.message import Message
-from textual.widgets import Static
+from textual.widgets import Input, Static
 
-from difflume.diffapp.differ import DiffType
+from difflume.diffapp.differ import DEFAULT_PRESERVE_ROWS, DiffType
+from difflume.diffapp.normalize import available_rules, default_rules
+from difflume.diffapp.search import text_index
 from difflume.tui import modals
+from difflume.tui.render import CachedText
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
-
-    from rich.console import RenderableType
+    from collections.abc import (
+        Awaitable,
+        Callable,
+        Generator,
+        Hashable,
+        Mapping,
+        Sequence,
+    )
+
+    from rich.console import Console, RenderableType
     from textual.app import ComposeResult
+    from textual.events import Click
+
+    from difflume.diffapp.search import TextIndex
 
 
 class PanelType(Enum):
@@ -26,10 +44,25 @@ class PanelType(Enum):
     FOCUS = "focus"
 
 
+SEARCH_MATCH_STYLE = Style(color="black", bgcolor="yellow")
+
+
 class Content(Static):
     pass
 
 
+def wrapped_height(line: str, width: int, console: Console) -> int:
+    """
+    Number of rows the line takes when wrapped to `width`.
+    """
+    # a cell is at most 2 columns wide, so short lines are checked cheaply
+    if width <= 0 or ("\t" not in line and len(line) * 2 <= width):
+        return 1
+    if "\t" not in line and cell_len(line) <= width:
+        return 1
+    return max(len(Text(line).wrap(console, width)), 1)
+
+
 class Panel(VerticalScroll):
     TYPE: PanelType
 
@@ -44,12 +77,52 @@ class Panel(VerticalScroll):
             super().__init__()
             self.panel_type = panel_type
 
+    class WatchRequest(Message):
+        def __init__(self, panel_type: PanelType) -> None:
+            super().__init__()
+            self.panel_type = panel_type
+
+    class HistorySearchRequest(Message):
+        def __init__(self, query: str, *, panel_type: PanelType) -> None:
+            super().__init__()
+            self.query = query
+            self.panel_type = panel_type
+
+    class IgnoreRulesSelected(Message):
+        def __init__(self, rules: list[str], *, panel_type: PanelType) -> None:
+            super().__init__()
+            self.rules = rules
+            self.panel_type = panel_type
+
+    class ExportRequest(Message):
+        def __init__(self, path: str, *, panel_type: PanelType) -> None:
+            super().__init__()
+            self.path = path
+            self.panel_type = panel_type
+
     class DIffTypeSelected(Message):
         def __init__(self, diff_type: DiffType, *, panel_type: PanelType) -> None:
             super().__init__()
             self.diff_type = diff_type
             self.panel_type = panel_type
 
+    class ExpandRequest(Message):
+        """
+        Expand the first collapsed part of the diff in lines `start:end`.
+        """
+
+        def __init__(self, start: int, end: int, *, panel_type: PanelType) -> None:
+            super().__init__()
+            self.start = start
+            self.end = end
+            self.panel_type = panel_type
+
+    class ContextRowsSelected(Message):
+        def __init__(self, rows: int, *, panel_type: PanelType) -> None:
+            super().__init__()
+            self.rows = rows
+            self.panel_type = panel_type
+
     def __init__(
         self,
         name: str | None = None,
@@ -60,16 +133,97 @@ class Panel(VerticalScroll):
         super().__init__(name=name, id=id, classes=classes, disabled=disabled)
         self.revisions: list[str] = []
         self.current_revision: str | None = None
+        self.revisions_info: Mapping[str, str] = {}
+        self.load_revisions_info: (
+            Callable[[Sequence[str]], Awaitable[None]] | None
+        ) = None
         self.diff_types: list[str] = [diff.value for diff in DiffType]
         self.current_diff_type: str = DiffType.NDIFF_COLLAPSED.value
+        self.ignore_rules: list[str] = default_rules()
+        # unchanged lines shown around changes in a collapsed diff
+        self.context_rows = DEFAULT_PRESERVE_ROWS
+        self.text = Text()
+        self._renderable: RenderableType = self.text
+        # line offsets of the text if they are known in advance
+        self.line_starts: array | None = None
+        self._rows: tuple[TextIndex, int, array] | None = None
 
     def compose(self) -> Generator[ComposeResult, None, None]:
         yield Content()
 
-    def update(self, renderable: RenderableType = "") -> None:
+    def update(
+        self,
+        renderable: RenderableType = "",
+        *,
+        line_starts: array | None = None,
+        render_key: Hashable | None = None,
+    ) -> None:
+        """
+        Show the renderable. A text from the render cache is shown with
+        its `render_key`, so it's wrapped only once for each width.
+        """
+        self.text = (
+            renderable if isinstance(renderable, Text) else Text(str(renderable))
+        )
+        self.line_starts = line_starts
+        if render_key is not None:
+            renderable = CachedText(self.text, key=render_key)
+        self._renderable = renderable
         self.query_one(Content).update(renderable)
         self.query_one(Content).remove_class("centered-middle")
 
+    def highlight(self, start: int, end: int) -> None:
+        """
+        Highlight a part of the text (e.g. a search match)
+        without changing the text itself.
+        """
+        text = self.text.copy()
+        text.stylize(SEARCH_MATCH_STYLE, start, end)
+        self.query_one(Content).update(text)
+
+    def clear_highlight(self) -> None:
+        self.query_one(Content).update(self._renderable)
+
+    def text_index(self) -> TextIndex:
+        return text_index(self.text.plain, starts=self.line_starts)
+
+    def wrapped_rows(self, index: TextIndex) -> array:
+        """
+        The first row of each line of the text after wrapping.
+        Cached until the text or the width of the panel changes.
+        """
+        width = self.query_one(Content).size.width
+        if self._rows is None or self._rows[:2] != (index, width):
+            rows = array("Q", [0])
+            row = 0
+            console = self.app.console
+            text = index.text
+            for line in range(len(index) - 1):
+                start, end = index.line_start(line), index.line_end(line)
+                # same shortcut as in `wrapped_height`, without slicing the line
+                if (end - start) * 2 <= width and text.find("\t", start, end) == -1:
+                    row += 1
+                else:
+                    row += wrapped_height(text[start:end], width, console)
+                rows.append(row)
+            self._rows = index, width, rows
+        return self._rows[2]
+
+    def line_at_row(self, index: TextIndex, row: float) -> int:
+        return max(bisect.bisect_right(self.wrapped_rows(index), row) - 1, 0)
+
+    def top_line(self, index: TextIndex) -> int:
+        return self.line_at_row(index, self.scroll_y)
+
+    def bottom_line(self, index: TextIndex) -> int:
+        return self.line_at_row(
+            index, self.scroll_y + self.scrollable_content_region.height - 1
+        )
+
+    def scroll_to_line(self, index: TextIndex, line: int) -> None:
+        row = self.wrapped_rows(index)[line]
+        self.scroll_to(y=max(row - self.size.height // 3, 0), animate=False)
+
     def set_empty(self) -> None:
         self.reset()
         self.update("Empty")
@@ -83,6 +237,8 @@ class Panel(VerticalScroll):
     def reset(self) -> None:
         self.revisions = []
         self.current_revision = None
+        self.revisions_info = {}
+        self.load_revisions_info = None
         self.update("")
 
     async def action_select_revision(self) -> None:
@@ -94,10 +250,12 @@ class Panel(VerticalScroll):
             self.post_message(self.RevisionSelected(revision, panel_type=self.TYPE))
 
         await self.app.push_screen(
-            modals.RadioButtonsModal(
+            modals.RevisionsModal(
                 "Select a revision to view",
                 current=self.current_revision or "",
-                options=self.revisions,
+                revisions=self.revisions,
+                info=self.revisions_info,
+                load_info=self.load_revisions_info,
             ),
             fire_revision_event,
         )
@@ -105,6 +263,24 @@ class Panel(VerticalScroll):
     async def action_sync_panels(self) -> None:
         self.post_message(self.SyncPanelsRequest(self.TYPE))
 
+    async def action_toggle_watch(self) -> None:
+        self.post_message(self.WatchRequest(self.TYPE))
+
+    async def action_search_history(self) -> None:
+        if len(self.revisions) < 2:
+            return
+
+        def fire_history_search_event(query: str) -> None:
+            self.post_message(self.HistorySearchRequest(query, panel_type=self.TYPE))
+
+        await self.app.push_screen(
+            modals.InputModal(
+                "Find revisions that changed a JSON path or lines with text",
+                placeholder="/path/to/key or text",
+            ),
+            fire_history_search_event,
+        )
+
     async def action_select_diff_type(self) -> None:
         def fire_diff_type_event(diff_type: str) -> None:
             self.current_diff_type = diff_type
@@ -121,10 +297,53 @@ class Panel(VerticalScroll):
             fire_diff_type_event,
         )
 
+    async def action_select_ignore_rules(self) -> None:
+        def fire_ignore_rules_event(rules: list[str]) -> None:
+            self.ignore_rules = rules
+            self.post_message(self.IgnoreRulesSelected(rules, panel_type=self.TYPE))
+
+        await self.app.push_screen(
+            modals.CheckboxesModal(
+                "Ignore differences in",
+                options=available_rules(),
+                selected=self.ignore_rules,
+            ),
+            fire_ignore_rules_event,
+        )
+
+    async def action_expand(self) -> None:
+        index = self.text_index()
+        self.post_message(
+            self.ExpandRequest(
+                self.top_line(index), self.bottom_line(index) + 1, panel_type=self.TYPE
+            )
+        )
+
+    async def action_change_context_rows(self, delta: int) -> None:
+        rows = max(self.context_rows + delta, 0)
+        if rows == self.context_rows:
+            return
+        self.context_rows = rows
+        self.post_message(self.ContextRowsSelected(rows, panel_type=self.TYPE))
+
+    async def action_export(self) -> None:
+        def fire_export_event(path: str) -> None:
+            self.post_message(self.ExportRequest(path, panel_type=self.TYPE))
+
+        await self.app.push_screen(
+            modals.InputModal(
+                "Export the diff to a unified patch or HTML (.html) file",
+                placeholder="diff.patch",
+            ),
+            fire_export_event,
+        )
+
 
 TEXT_PANEL_BINDINGS: list[Binding | tuple[str, str] | tuple[str, str, str]] = [
     Binding("r,к", "select_revision", "Revisions", show=True),
     Binding("s,ы,і", "sync_panels", "Sync", show=True),
+    Binding("w,ц", "toggle_watch", "Watch", show=False),
+    Binding("h,р", "search_history", "History", show=False),
 ]
 
 
@@ -137,9 +356,71 @@ class MiddlePanel(Panel):
     TYPE = PanelType.MIDDLE
     BINDINGS = [
         Binding("d,в", "select_diff_type", "Diff Type", show=True),
+        Binding("i,ш", "select_ignore_rules", "Ignore", show=True),
+        Binding("e,у", "export", "Export", show=False),
+        Binding("x,ч", "expand", "Expand", show=False),
+        Binding(
+            "plus,equals_sign", "change_context_rows(1)", "More Context", show=False
+        ),
+        Binding("minus", "change_context_rows(-1)", "Less Context", show=False),
     ]
 
+    def on_click(self, event: Click) -> None:
+        content = self.query_one(Content)
+        # clicks below the text are outside of the content
+        if not content.region.contains_point(event.screen_offset):
+            return
+        line = self.line_at_row(self.text_index(), event.screen_y - content.region.y)
+        self.post_message(self.ExpandRequest(line, line + 1, panel_type=self.TYPE))
+
 
 class RightPanel(Panel):
     TYPE = PanelType.RIGHT
     BINDINGS = TEXT_PANEL_BINDINGS
+
+
+class SearchBar(Horizontal):
+    BINDINGS = [
+        Binding("escape", "close", "Close", show=False),
+    ]
+
+    class QueryChanged(Message):
+        def __init__(self, query: str) -> None:
+            super().__init__()
+            self.query = query
+
+    class Submitted(Message):
+        def __init__(self, query: str) -> None:
+            super().__init__()
+            self.query = query
+
+    class Closed(Message):
+        pass
+
+    def compose(self) -> Generator[ComposeResult, None, None]:
+        yield Input(placeholder="Search", id="search-input")
+        yield Static(id="search-status")
+
+    def open(self) -> None:
+        self.remove_class("disabled")
+        self.query_one(Input).value = ""
+        self.query_one(Input).focus()
+
+    def close(self) -> None:
+        self.add_class("disabled")
+
+    def set_status(self, status: str) -> None:
+        self.query_one("#search-status", Static).update(status)
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        event.stop()
+        self.post_message(self.QueryChanged(event.value))
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        event.stop()
+        self.close()
+        self.post_message(self.Submitted(event.value))
+
+    def action_close(self) -> None:
+        self.close()
+        self.post_message(self.Closed())
@@ -11,16 +11,17 @@ class HTTPServer:
     def make_endpoint(
         self,
         *,
-        content: dict | str,
+        content: dict | list | str | bytes,
         path: str,
-        query: str | None = None,
+        query: str | dict[str, str] | None = None,
         status: int = 200,
+        headers: dict[str, str] | None = None,
     ) -> HTTPServer:
         with_path = self._httpserver.expect_request(path, query_string=query)
-        if isinstance(content, dict):
-            with_path.respond_with_json(content, status=status)
+        if isinstance(content, (dict, list)):
+            with_path.respond_with_json(content, status=status, headers=headers)
         else:
-            with_path.respond_with_data(content, status=status)
+            with_path.respond_with_data(content, status=status, headers=headers)
         return self
 
     def clear_all_handlers(self) -> None:
@@ -82,3 +83,40 @@ def couchdb_server(httpserver, response_data, document_url):
     httpserver.make_endpoint(content=response_data, path=document_url)
 
     return httpserver
+
+
+def all_docs_response(*revisions: tuple[str, str]) -> dict:
+    return {
+        "rows": [
+            {"id": doc_id, "key": doc_id, "value": {"rev": rev}}
+            for doc_id, rev in revisions
+        ]
+    }
+
+
+def bulk_get_response(*docs: dict) -> dict:
+    return {"results": [{"id": doc["_id"], "docs": [{"ok": doc}]} for doc in docs]}
+
+
+@pytest.fixture()
+def databases_server(httpserver):
+    # pages of two rows, "a" is equal, "b" is removed, "c" changed, "e" added
+    for path, first_page, second_page in (
+        ("/db", [("a", "1-a"), ("b", "1-b")], [("c", "2-c")]),
+        ("/replica", [("a", "1-a"), ("c", "1-c")], [("e", "1-e")]),
+    ):
+        httpserver.make_endpoint(
+            content=all_docs_response(*first_page),
+            path=f"{path}/_all_docs",
+            query={"limit": "2"},
+        )
+        httpserver.make_endpoint(
+            content=all_docs_response(*second_page),
+            path=f"{path}/_all_docs",
+            query={"limit": "2", "startkey": f'"{first_page[-1][0]}"', "skip": "1"},
+        )
+    httpserver.make_endpoint(
+        content=bulk_get_response({"_id": "c", "_rev": "2-c", "key": "new"}),
+        path="/db/_bulk_get",
+    )
+    return httpserver
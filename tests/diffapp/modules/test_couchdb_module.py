@@ -1,3 +1,4 @@
+import asyncio
 import json
 
 import httpx
@@ -180,3 +181,60 @@ async def test_rewrite_fauxton_url(
     result = sut.get_content()
 
     assert result == Content(text=response_data_text, text_type=TextType.JSON)
+
+
+async def test_watch_new_revisions(sut: CouchDBModule, couchdb_server, response_data):
+    await sut.load()
+    couchdb_server.clear_all_handlers()
+    couchdb_server.make_endpoint(
+        content={
+            "results": [{"id": "my_id", "changes": [{"rev": "8-new"}]}],
+            "last_seq": "10-x",
+        },
+        path="/collection/_changes",
+    )
+    couchdb_server.make_endpoint(
+        content={**response_data, "_rev": "8-new"},
+        path="/collection/my_id",
+        query="rev=8-new",
+    )
+    changes = sut.watch()
+
+    await asyncio.wait_for(anext(changes), timeout=1)
+    await changes.aclose()
+
+    assert sut.can_watch()
+    assert sut.revisions == ["8-new", "7-abc", "6-def"]
+    assert '"_rev": "8-new"' in sut.get_content().text
+    assert sut.get_content("7-abc") != sut.get_content()
+
+
+async def test_raise_error_if_cant_watch(sut: CouchDBModule, couchdb_server):
+    couchdb_server.make_endpoint(
+        content="Error", path="/collection/_changes", status=500
+    )
+    await sut.load()
+
+    with pytest.raises(ReadError, match="Could not read changes"):
+        await asyncio.wait_for(anext(sut.watch()), timeout=1)
+
+
+async def test_load_revisions_in_one_request(
+    sut: CouchDBModule, couchdb_server, response_data
+):
+    await sut.load()
+    couchdb_server.clear_all_handlers()
+    couchdb_server.make_endpoint(
+        content=[
+            {"ok": {**response_data, "_rev": "6-def"}},
+            {"missing": "5-ghi"},
+        ],
+        path="/collection/my_id",
+        query={"open_revs": '["6-def", "5-ghi"]'},
+    )
+
+    await sut.load_revisions(["7-abc", "6-def", "5-ghi"])
+
+    assert '"_rev": "6-def"' in sut.get_content("6-def").text
+    with pytest.raises(RevisionNotFoundError):
+        sut.get_content("5-ghi")
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import gzip
 import json
 from typing import TYPE_CHECKING
 
@@ -56,11 +57,23 @@ async def test_raise_error_if_cant_open_file(sut: FSModule, file: Path):
         await sut.load()
 
 
-async def test_raise_error_if_cant_decode_file(sut: FSModule, file: Path):
-    file.write_bytes(b"\x89PNG\r\n\x1a\n")
+async def test_read_binary_file_as_size_and_hash(sut: FSModule, file: Path):
+    file.write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR")
+    await sut.load()
 
-    with pytest.raises(ReadError, match="Could not read file"):
-        await sut.load()
+    result = sut.get_content()
+
+    assert result.text_type == TextType.BINARY
+    assert result.text.startswith("Binary file\nsize: 16 bytes\nsha256: ")
+
+
+async def test_read_non_utf8_file(sut: FSModule, file: Path):
+    file.write_bytes("café".encode("latin-1"))
+    await sut.load()
+
+    result = sut.get_content()
+
+    assert result == Content(text="café", text_type=TextType.PLAIN)
 
 
 async def test_dont_load_loaded_content(sut: FSModule, file: Path):
@@ -73,3 +86,90 @@ async def test_dont_load_loaded_content(sut: FSModule, file: Path):
     result = sut.get_content()
 
     assert result == Content(text="test file", text_type=TextType.PLAIN)
+
+
+async def test_reload_appended_content(sut: FSModule, file: Path):
+    file.write_text("test\nfile")
+    await sut.load()
+    with file.open("a") as f:
+        f.write("\nappended")
+
+    result = await sut.reload()
+
+    assert result is True
+    assert sut.get_content() == Content(
+        text="test\nfile\nappended", text_type=TextType.PLAIN
+    )
+
+
+async def test_reload_rewritten_content(sut: FSModule, file: Path):
+    file.write_text("test\nfile")
+    await sut.load()
+    file.write_text("new\ncontent\nwhich is longer")
+
+    result = await sut.reload()
+
+    assert result is True
+    assert sut.get_content() == Content(
+        text="new\ncontent\nwhich is longer", text_type=TextType.PLAIN
+    )
+
+
+async def test_reload_truncated_content(sut: FSModule, file: Path):
+    file.write_text("test\nfile")
+    await sut.load()
+    file.write_text("new")
+
+    await sut.reload()
+
+    assert sut.get_content() == Content(text="new", text_type=TextType.PLAIN)
+
+
+async def test_dont_reload_unchanged_content(sut: FSModule, file: Path):
+    file.write_text("test\nfile")
+    await sut.load()
+
+    result = await sut.reload()
+
+    assert result is False
+
+
+async def test_raise_error_if_cant_reload_file(sut: FSModule, file: Path):
+    file.write_text("test\nfile")
+    await sut.load()
+    file.unlink()
+
+    with pytest.raises(ReadError, match="Could not read file"):
+        await sut.reload()
+
+
+async def test_dont_parse_json_in_files_with_plain_text_extension(tmp_path):
+    file = tmp_path / "app.log"
+    file.write_text('{"key": "value"}')
+    sut = FSModule(str(file))
+
+    result = await sut.read_content()
+
+    assert result == Content(text='{"key": "value"}', text_type=TextType.PLAIN)
+
+
+async def test_read_compressed_json(tmp_path):
+    file = tmp_path / "dump.json.gz"
+    file.write_bytes(gzip.compress(b'{"key": "value"}'))
+    sut = FSModule(str(file))
+
+    result = await sut.read_content()
+
+    assert result == Content(text='{\n  "key": "value"\n}', text_type=TextType.JSON)
+
+
+async def test_reload_rewritten_compressed_file(tmp_path):
+    file = tmp_path / "app.log.gz"
+    file.write_bytes(gzip.compress(b"first\n"))
+    sut = FSModule(str(file))
+    await sut.load()
+    with file.open("ab") as f:
+        f.write(gzip.compress(b"second\n"))
+
+    assert await sut.reload()
+    assert sut.get_content().text == "first\nsecond\n"
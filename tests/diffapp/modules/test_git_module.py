@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess  # noqa: S404
+from typing import TYPE_CHECKING
+
+import pytest
+
+from difflume.diffapp.modules import Content, GitModule, ReadError, TextType
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is required")
+
+
+def git(repo: Path, *args: str) -> None:
+    subprocess.run(  # noqa: S603, S607
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+def commit(repo: Path, message: str) -> None:
+    git(repo, "add", "-A")
+    git(repo, "commit", "-m", message)
+
+
+@pytest.fixture()
+def repo(tmp_path) -> Path:
+    git(tmp_path, "init")
+    return tmp_path
+
+
+@pytest.fixture()
+def file(repo) -> Path:
+    path = repo / "configs" / "app.json"
+    path.parent.mkdir()
+    for version in range(1, 4):
+        path.write_text(json.dumps({"version": version}))
+        commit(repo, f"version {version}")
+    return path
+
+
+@pytest.fixture()
+async def sut(file):
+    module = GitModule(str(file))
+    yield module
+    await module.close()
+
+
+def json_content(version: int) -> Content:
+    return Content(
+        text=json.dumps({"version": version}, indent=2), text_type=TextType.JSON
+    )
+
+
+async def test_read_content_from_head(sut: GitModule, file: Path):
+    file.write_text("not committed")
+
+    await sut.load()
+
+    assert sut.get_content() == json_content(3)
+
+
+async def test_read_revisions(sut: GitModule):
+    await sut.load()
+
+    assert len(sut.revisions) == 3
+    assert sut.get_content(sut.revisions[0]) == json_content(3)
+
+
+async def test_load_revision(sut: GitModule):
+    await sut.load()
+
+    await sut.load_revision(sut.revisions[2])
+
+    assert sut.get_content(sut.revisions[2]) == json_content(1)
+
+
+async def test_load_revisions_in_batch(sut: GitModule):
+    await sut.load()
+
+    await sut.load_revisions(sut.revisions)
+
+    assert [sut.get_content(rev) for rev in sut.revisions] == [
+        json_content(3),
+        json_content(2),
+        json_content(1),
+    ]
+
+
+async def test_load_revisions_info(sut: GitModule):
+    await sut.load()
+
+    await sut.load_revisions_info([sut.revisions[2], sut.revisions[0]])
+
+    assert list(sut.revisions_info) == [sut.revisions[2], sut.revisions[0]]
+    assert sut.revisions_info[sut.revisions[2]].endswith(" test: version 1")
+    assert sut.revisions_info[sut.revisions[0]].endswith(" test: version 3")
+
+
+@pytest.mark.usefixtures("file")
+async def test_follow_renames(repo: Path):
+    git(repo, "mv", "configs/app.json", "configs/renamed.json")
+    commit(repo, "rename")
+    renamed = repo / "configs" / "renamed.json"
+    renamed.write_text(json.dumps({"version": 4}))
+    commit(repo, "version 4")
+    sut = GitModule(str(renamed))
+
+    await sut.load()
+    await sut.load_revisions(sut.revisions)
+    await sut.close()
+
+    assert [sut.get_content(rev) for rev in sut.revisions] == [
+        json_content(4),
+        json_content(3),
+        json_content(3),
+        json_content(2),
+        json_content(1),
+    ]
+
+
+async def test_binary_file(repo: Path):
+    file = repo / "image.bin"
+    file.write_bytes(b"\0\1\2")
+    commit(repo, "binary")
+    sut = GitModule(str(file))
+
+    await sut.load()
+    await sut.close()
+
+    assert sut.get_content().text_type is TextType.BINARY
+
+
+async def test_unknown_revision(sut: GitModule):
+    await sut.load()
+
+    with pytest.raises(ReadError, match="Could not read revision"):
+        await sut.load_revision("unknown")
+
+
+@pytest.mark.parametrize("spec", ["HEAD~1", "v2", "full hash"])
+async def test_find_revision_by_ref_or_full_hash(sut: GitModule, repo: Path, spec):
+    git(repo, "tag", "v2", "HEAD~1")
+    full_hash = subprocess.run(  # noqa: S603, S607
+        ["git", "rev-parse", "HEAD~1"],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    await sut.load()
+
+    revision = await sut.find_revision(full_hash if spec == "full hash" else spec)
+    await sut.load_revision(revision)
+
+    assert revision == sut.revisions[1]
+    assert sut.get_content(revision) == json_content(2)
+
+
+async def test_find_unknown_revision(sut: GitModule):
+    await sut.load()
+
+    assert await sut.find_revision("unknown") is None
+
+
+async def test_not_committed_file(repo: Path):
+    file = repo / "new.txt"
+    file.write_text("new")
+    commit(repo, "init")
+    (repo / "other.txt").write_text("other")
+    sut = GitModule(str(repo / "other.txt"))
+
+    with pytest.raises(ReadError):
+        await sut.load()
+    await sut.close()
+
+
+async def test_not_a_repository(tmp_path: Path):
+    file = tmp_path / "file.txt"
+    file.write_text("test")
+    sut = GitModule(str(file))
+
+    with pytest.raises(ReadError):
+        await sut.load()
+    await sut.close()
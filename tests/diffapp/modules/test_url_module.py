@@ -1,3 +1,4 @@
+import gzip
 import json
 
 import httpx
@@ -68,3 +69,37 @@ async def test_dont_load_loaded_content(sut: URLModule, url: str, httpserver):
     result = sut.get_content()
 
     assert result == Content(text="test file", text_type=TextType.PLAIN)
+
+
+async def test_detect_json_by_url_extension(client, httpserver):
+    httpserver.make_endpoint(content='{"key": "value"}', path="/data.json")
+    sut = URLModule(httpserver.url_for("/data.json"), client=client)
+
+    result = await sut.read_content()
+
+    assert result == Content(text='{\n  "key": "value"\n}', text_type=TextType.JSON)
+
+
+async def test_read_compressed_file(client, httpserver):
+    httpserver.make_endpoint(
+        content=gzip.compress(b'{"key": "value"}'),
+        path="/dump.json.gz",
+        headers={"Content-Type": "application/gzip"},
+    )
+    sut = URLModule(httpserver.url_for("/dump.json.gz"), client=client)
+
+    result = await sut.read_content()
+
+    assert result == Content(text='{\n  "key": "value"\n}', text_type=TextType.JSON)
+
+
+async def test_read_gzip_content_encoding(sut: URLModule, url: str, httpserver):
+    httpserver.make_endpoint(
+        content=gzip.compress("test\nсвіт".encode()),
+        path=url,
+        headers={"Content-Encoding": "gzip"},
+    )
+
+    result = await sut.read_content()
+
+    assert result == Content(text="test\nсвіт", text_type=TextType.PLAIN)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+import sys
+
+import pytest
+
+from difflume.diffapp.compression import (
+    CompressionError,
+    aiter_decompressed,
+    detect_compression,
+    iter_decompressed,
+)
+
+DATA = b"line\n" * 10_000
+
+COMPRESSORS = {
+    "gzip": gzip.compress,
+    "xz": lzma.compress,
+    "bzip2": bz2.compress,
+}
+
+
+def split(data: bytes, size: int = 1000) -> list[bytes]:
+    chunks = []
+    while data:
+        chunks.append(data[:size])
+        data = data[size:]
+    return chunks
+
+
+async def to_async(chunks: list[bytes]):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_detect_compression(compression: str):
+    compressed = COMPRESSORS[compression](DATA)
+
+    assert detect_compression(compressed) == compression
+
+
+def test_detect_zstd():
+    assert detect_compression(b"\x28\xb5\x2f\xfd\x00") == "zstd"
+
+
+def test_detect_not_compressed():
+    assert detect_compression(b'{"key": "value"}') is None
+
+
+@pytest.mark.parametrize("head", [b"BZh", b"BZhello", b"BZh0"])
+def test_text_like_bzip2_magic_is_not_compressed(head: bytes):
+    assert detect_compression(head) is None
+
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_decompress_in_chunks(compression: str):
+    compressed = COMPRESSORS[compression](DATA)
+
+    result = b"".join(iter_decompressed(split(compressed), compression))
+
+    assert result == DATA
+
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_decompress_concatenated_streams(compression: str):
+    compress = COMPRESSORS[compression]
+    compressed = compress(b"first\n") + compress(b"second\n")
+
+    result = b"".join(iter_decompressed(split(compressed, 7), compression))
+
+    assert result == b"first\nsecond\n"
+
+
+@pytest.mark.parametrize("compression", COMPRESSORS)
+def test_truncated_data(compression: str):
+    compressed = COMPRESSORS[compression](DATA)
+    truncated = compressed[: len(compressed) // 2]
+
+    with pytest.raises(CompressionError, match="Truncated"):
+        b"".join(iter_decompressed([truncated], compression))
+
+
+def test_invalid_data():
+    with pytest.raises(CompressionError, match="Invalid gzip data"):
+        b"".join(iter_decompressed([b"\x1f\x8bnot really gzip"], "gzip"))
+
+
+def test_zstd_without_zstandard(monkeypatch):
+    # as if the package isn't installed
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+
+    with pytest.raises(CompressionError, match=r"DiffLume\[zstd\]"):
+        b"".join(iter_decompressed([b"\x28\xb5\x2f\xfd"], "zstd"))
+
+
+def test_decompress_zstd():
+    zstandard = pytest.importorskip("zstandard")
+
+    result = b"".join(
+        iter_decompressed([zstandard.ZstdCompressor().compress(DATA)], "zstd")
+    )
+
+    assert result == DATA
+
+
+async def test_async_decompress():
+    chunks = split(gzip.compress(DATA), 3)
+
+    result = b"".join([chunk async for chunk in aiter_decompressed(to_async(chunks))])
+
+    assert result == DATA
+
+
+async def test_async_pass_through_not_compressed():
+    chunks = split(DATA, 3)
+
+    result = b"".join([chunk async for chunk in aiter_decompressed(to_async(chunks))])
+
+    assert result == DATA
+
+
+async def test_async_empty_stream():
+    result = [chunk async for chunk in aiter_decompressed(to_async([]))]
+
+    assert result == []
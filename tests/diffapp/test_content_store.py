@@ -0,0 +1,115 @@
+import copy
+import gc
+
+import httpx
+import pytest
+
+from difflume.diffapp.differ import DiffStats, DiffType, create_diff
+from difflume.diffapp.modules import (
+    Content,
+    ContentStore,
+    TextType,
+    URLModule,
+    parse_content,
+)
+
+
+@pytest.fixture()
+def store() -> ContentStore:
+    return ContentStore()
+
+
+@pytest.fixture()
+async def client() -> httpx.AsyncClient:
+    async with httpx.AsyncClient(timeout=1) as client:
+        yield client
+
+
+def test_equal_content_is_stored_once(store):
+    first = store.intern(Content(text="a\nb", text_type=TextType.PLAIN))
+
+    result = store.intern(Content(text="a\nb", text_type=TextType.PLAIN))
+
+    assert result is first
+    assert len(store) == 1
+
+
+def test_same_text_of_other_type_is_stored_separately(store):
+    plain = store.intern(Content(text="[]", text_type=TextType.PLAIN))
+
+    result = store.intern(Content(text="[]", text_type=TextType.JSON))
+
+    assert result is not plain
+    assert len(store) == 2
+
+
+def test_unused_content_is_dropped(store):
+    store.intern(Content(text="a\nb", text_type=TextType.PLAIN))
+    gc.collect()
+
+    assert len(store) == 0
+
+
+def test_parsed_content_is_shared():
+    text = '{"b": 1, "a": 2}'
+
+    assert parse_content(text) is parse_content(text)
+
+
+def test_content_lines():
+    content = Content(text="a\nb\n", text_type=TextType.PLAIN)
+
+    assert content.lines == ("a", "b")
+    assert list(content.line_starts) == [0, 2, 4]
+
+
+def test_content_is_equal_with_and_without_index():
+    content = Content(text="a\nb", text_type=TextType.PLAIN)
+    indexed = Content(text="a\nb", text_type=TextType.PLAIN)
+
+    indexed.build_index()
+
+    assert indexed == content
+
+
+def test_index_is_built_once():
+    content = Content(text="a\nb", text_type=TextType.PLAIN)
+    content.build_index()
+    lines, starts = content.lines, content.line_starts
+
+    content.build_index()
+
+    assert content.lines is lines
+    assert content.line_starts is starts
+
+
+def test_copied_content_is_indexed_again():
+    content = Content(text="a\nb", text_type=TextType.PLAIN)
+    content.build_index()
+
+    result = copy.deepcopy(content)
+
+    assert result == content
+    assert result.lines == ("a", "b")
+
+
+async def test_same_url_in_both_panels_is_loaded_into_one_content(client, httpserver):
+    httpserver.make_endpoint(content='{"key": "value"}', path="/doc")
+    left = URLModule(httpserver.url_for("/doc"), client=client)
+    right = URLModule(httpserver.url_for("/doc"), client=client)
+
+    await left.load()
+    await right.load()
+
+    assert left.get_content() is right.get_content()
+
+
+@pytest.mark.parametrize("diff_type", list(DiffType))
+def test_diff_of_equal_texts(diff_type):
+    text = "a\nb\nc"
+
+    result = create_diff(text, text, diff_type)
+
+    assert result.stats == DiffStats()
+    assert result.source_lines == ["a", "b", "c"]
+    assert result.lines == create_diff(text, f"{text}\n", diff_type).lines
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+
+import httpx
+import pytest
+
+from difflume.diffapp.couchdb import (
+    ChangesFeed,
+    ChangesFeedError,
+    changes_feed,
+    document_url,
+    split_document_url,
+)
+
+DATABASE_URL = "http://couchdb/collection"
+
+
+class FakeCouchDB:
+    """
+    Long-poll requests hang until a response is pushed.
+    """
+
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+        self.pending = 0
+        self.responses: asyncio.Queue[httpx.Response] = asyncio.Queue()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.pending += 1
+        try:
+            return await self.responses.get()
+        finally:
+            self.pending -= 1
+
+    def push_changes(self, *changes: tuple[str, str], last_seq: str) -> None:
+        self.responses.put_nowait(
+            httpx.Response(
+                200,
+                json={
+                    "results": [
+                        {"id": doc_id, "changes": [{"rev": rev}]}
+                        for doc_id, rev in changes
+                    ],
+                    "last_seq": last_seq,
+                },
+            )
+        )
+
+    async def wait_requests(self, count: int) -> httpx.Request:
+        for _ in range(100):
+            if len(self.requests) >= count:
+                return self.requests[-1]
+            await asyncio.sleep(0.01)
+        raise AssertionError(f"Expected {count} requests, got {len(self.requests)}")
+
+
+async def cancel(task: asyncio.Task) -> None:
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+@pytest.fixture()
+def couchdb() -> FakeCouchDB:
+    return FakeCouchDB()
+
+
+@pytest.fixture()
+async def client(couchdb):
+    transport = httpx.MockTransport(couchdb.handler)
+    async with httpx.AsyncClient(transport=transport, timeout=1) as client:
+        yield client
+
+
+@pytest.fixture()
+def sut(client) -> ChangesFeed:
+    return ChangesFeed(DATABASE_URL, client=client, timeout=1)
+
+
+async def test_follow_document(sut: ChangesFeed, couchdb: FakeCouchDB):
+    follow = sut.follow("my_id")
+    waiter = asyncio.create_task(anext(follow))
+    request = await couchdb.wait_requests(1)
+
+    couchdb.push_changes(("my_id", "8-new"), last_seq="10-x")
+
+    assert await asyncio.wait_for(waiter, timeout=1) == "8-new"
+    assert request.url.params["feed"] == "longpoll"
+    assert request.url.params["filter"] == "_doc_ids"
+    assert request.url.params["since"] == "now"
+    assert json.loads(request.content) == {"doc_ids": ["my_id"]}
+    next_request = await couchdb.wait_requests(2)
+    assert next_request.url.params["since"] == "10-x"
+    await follow.aclose()
+
+
+async def test_share_one_request_between_documents(
+    sut: ChangesFeed, couchdb: FakeCouchDB
+):
+    first, second = sut.follow("first"), sut.follow("second")
+    first_waiter = asyncio.create_task(anext(first))
+    await couchdb.wait_requests(1)
+    second_waiter = asyncio.create_task(anext(second))
+    request = await couchdb.wait_requests(2)
+
+    couchdb.push_changes(("second", "2-b"), last_seq="3")
+
+    assert await asyncio.wait_for(second_waiter, timeout=1) == "2-b"
+    assert not first_waiter.done()
+    assert json.loads(request.content) == {"doc_ids": ["first", "second"]}
+    assert couchdb.pending == 1
+    await cancel(first_waiter)
+    await second.aclose()
+
+
+async def test_stop_polling_without_followers(sut: ChangesFeed, couchdb: FakeCouchDB):
+    follow = sut.follow("my_id")
+    waiter = asyncio.create_task(anext(follow))
+    await couchdb.wait_requests(1)
+
+    await cancel(waiter)
+
+    assert not sut.is_running()
+    assert couchdb.pending == 0
+
+
+async def test_raise_error_if_cant_read_changes(sut: ChangesFeed, couchdb: FakeCouchDB):
+    follow = sut.follow("my_id")
+    waiter = asyncio.create_task(anext(follow))
+    await couchdb.wait_requests(1)
+
+    couchdb.responses.put_nowait(httpx.Response(500))
+
+    with pytest.raises(ChangesFeedError, match="Could not read changes"):
+        await asyncio.wait_for(waiter, timeout=1)
+
+
+def test_one_feed_per_database(client):
+    feed = changes_feed(DATABASE_URL, client=client)
+
+    assert changes_feed(f"{DATABASE_URL}/", client=client) is feed
+    assert changes_feed(f"{DATABASE_URL}_other", client=client) is not feed
+
+
+@pytest.mark.parametrize(
+    "document_url,expected",
+    [
+        ("http://couchdb/collection/my_id", "my_id"),
+        ("http://couchdb/collection/my%2Fid", "my/id"),
+        ("http://couchdb/collection/_design/my_id", "_design/my_id"),
+        ("http://couchdb/collection/_local/my_id?rev=1-a", "_local/my_id"),
+    ],
+)
+def test_split_document_url(document_url: str, expected: str):
+    result = split_document_url(document_url)
+
+    assert result == (DATABASE_URL, expected)
+
+
+@pytest.mark.parametrize("doc_id", ["my_id", "my/id", "_design/my_id", "_local/a b"])
+def test_document_url_is_split_back(doc_id: str):
+    result = split_document_url(document_url(DATABASE_URL, doc_id))
+
+    assert result == (DATABASE_URL, doc_id)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from difflume.diffapp.dbcompare import (
+    DatabaseCompareError,
+    DatabaseComparison,
+    DocumentStatus,
+)
+
+
+@pytest.fixture()
+async def client() -> httpx.AsyncClient:
+    async with httpx.AsyncClient(timeout=1) as client:
+        yield client
+
+
+@pytest.fixture()
+def executor():
+    with ThreadPoolExecutor(2) as executor:
+        yield executor
+
+
+@pytest.fixture()
+def sut(databases_server, client, executor) -> DatabaseComparison:
+    return DatabaseComparison(
+        databases_server.url_for("/db"),
+        databases_server.url_for("/replica"),
+        client=client,
+        page_size=2,
+        executor=executor,
+    )
+
+
+async def compare(comparison: DatabaseComparison) -> list:
+    return [diff async for batch in comparison.run() for diff in batch]
+
+
+async def test_compare_databases(sut, databases_server):
+    databases_server.make_endpoint(
+        content={
+            "results": [
+                {
+                    "id": "c",
+                    "docs": [{"ok": {"_id": "c", "_rev": "1-c", "key": "old"}}],
+                }
+            ]
+        },
+        path="/replica/_bulk_get",
+    )
+
+    diffs = await compare(sut)
+
+    assert [(diff.doc_id, diff.status) for diff in diffs] == [
+        ("b", DocumentStatus.REMOVED),
+        ("c", DocumentStatus.CHANGED),
+        ("e", DocumentStatus.ADDED),
+    ]
+    assert (diffs[1].rev, diffs[1].rev_to_compare) == ("2-c", "1-c")
+    # revisions are not counted as changes
+    assert diffs[1].summary == "+0 -0 ~1 in 1 hunk"
+    assert sut.listed == 6
+
+
+async def test_fetch_with_all_docs_without_bulk_get(sut, databases_server):
+    databases_server.make_endpoint(
+        content={"error": "bad_request"}, path="/replica/_bulk_get", status=400
+    )
+    databases_server.make_endpoint(
+        content={
+            "rows": [
+                {
+                    "id": "c",
+                    "key": "c",
+                    "value": {"rev": "1-c"},
+                    "doc": {"_id": "c", "_rev": "1-c", "key": "new"},
+                }
+            ]
+        },
+        path="/replica/_all_docs",
+        query={"include_docs": "true"},
+    )
+
+    diffs = await compare(sut)
+
+    assert [diff.summary for diff in diffs] == ["removed", "No changes", "added"]
+
+
+async def test_report_document_missing_at_revision(sut, databases_server):
+    # compacted since listing
+    databases_server.make_endpoint(
+        content={
+            "results": [
+                {"id": "c", "docs": [{"error": {"id": "c", "rev": "1-c"}}]},
+            ]
+        },
+        path="/replica/_bulk_get",
+    )
+
+    diffs = await compare(sut)
+
+    assert diffs[1].status == DocumentStatus.MISSING_AT_REVISION
+    assert diffs[1].stats is None
+    assert diffs[1].summary == "missing at revision"
+
+
+async def test_report_document_changed_since_listing(sut, databases_server):
+    databases_server.make_endpoint(
+        content={"error": "bad_request"}, path="/replica/_bulk_get", status=400
+    )
+    databases_server.make_endpoint(
+        content={
+            "rows": [
+                {
+                    "id": "c",
+                    "key": "c",
+                    "value": {"rev": "2-c"},
+                    "doc": {"_id": "c", "_rev": "2-c", "key": "new"},
+                }
+            ]
+        },
+        path="/replica/_all_docs",
+        query={"include_docs": "true"},
+    )
+
+    diffs = await compare(sut)
+
+    assert [diff.summary for diff in diffs] == [
+        "removed",
+        "missing at revision",
+        "added",
+    ]
+
+
+async def test_raise_error_if_cant_read_database(sut, databases_server):
+    databases_server.clear_all_handlers()
+
+    with pytest.raises(DatabaseCompareError, match="Could not read documents"):
+        await compare(sut)
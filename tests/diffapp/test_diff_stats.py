@@ -0,0 +1,107 @@
+import pytest
+
+from difflume.diffapp.differ import (
+    DiffStats,
+    DiffType,
+    create_diff,
+    diff_stats,
+    hunk_starts,
+)
+
+TEXT = "\n".join(f"line {i}" for i in range(20))
+
+
+@pytest.mark.parametrize(
+    "text_to_compare,expected",
+    [
+        (TEXT, DiffStats()),
+        (
+            TEXT.replace("line 5", "line five"),
+            DiffStats(changed=1, hunks=1),
+        ),
+        (
+            TEXT.replace("line 5\n", "").replace("line 15", "line 15\nnew line"),
+            DiffStats(added=1, removed=1, hunks=2),
+        ),
+        (
+            TEXT.replace("line 1\nline 2\n", "one\n"),
+            DiffStats(removed=1, changed=1, hunks=1),
+        ),
+        ("", DiffStats(removed=20, hunks=1)),
+    ],
+)
+def test_diff_stats(text_to_compare, expected):
+    result = create_diff(TEXT, text_to_compare, DiffType.NDIFF)
+
+    assert result.stats == expected
+
+
+@pytest.mark.parametrize(
+    "stats,expected",
+    [
+        (DiffStats(), "No changes"),
+        (DiffStats(added=2, changed=1, hunks=1), "+2 -0 ~1 in 1 hunk"),
+        (DiffStats(removed=3, hunks=2), "+0 -3 ~0 in 2 hunks"),
+    ],
+)
+def test_diff_stats_str(stats, expected):
+    assert str(stats) == expected
+
+
+def test_hunk_starts():
+    blocks = create_diff(TEXT, TEXT.replace("line 3", "3"), DiffType.NDIFF).blocks
+
+    assert hunk_starts(blocks) == [3]
+
+
+@pytest.mark.parametrize("diff_type", list(DiffType))
+def test_hunks_match_stats_when_replacement_has_unchanged_lines(diff_type):
+    # "}" is popular in the text to compare, so it's junk for the matcher
+    # and is shown unchanged inside the replacement of the first lines
+    tail = [f"line {i}" if i % 2 else "}" for i in range(250)]
+    text = "\n".join(["p", "}", "q", *tail])
+    text_to_compare = "\n".join(["x", "}", "y", *tail])
+
+    result = create_diff(text, text_to_compare, diff_type)
+
+    assert result.hunks == [0]
+    assert result.stats.hunks == 1
+
+
+def test_hunks_point_to_changed_lines():
+    text_to_compare = TEXT.replace("line 3", "3").replace("line 17\n", "")
+
+    result = create_diff(TEXT, text_to_compare, DiffType.NDIFF_COLLAPSED)
+
+    assert [result.lines[i][0] for i in result.hunks] == ["-", "-"]
+    assert len(result.hunks) == result.stats.hunks
+
+
+def test_stats_pass_never_formats_diff(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the diff must not be formatted")
+
+    monkeypatch.setattr("difflume.diffapp.differ._BlockDiffer.compare_blocks", fail)
+    text_to_compare = TEXT.replace("line 5", "line five") + "\nnew line"
+
+    stats = diff_stats(TEXT.splitlines(), text_to_compare.splitlines())
+
+    assert stats == DiffStats(added=1, changed=1, hunks=2)
+
+
+def test_stats_are_reported_before_formatting(monkeypatch):
+    calls = []
+
+    def record_formatting(*args, **kwargs):
+        calls.append("format")
+        return []
+
+    monkeypatch.setattr(
+        "difflume.diffapp.differ._BlockDiffer.compare_blocks", record_formatting
+    )
+
+    create_diff(
+        TEXT, TEXT.replace("line 5", "line five"), DiffType.NDIFF, on_stats=calls.append
+    )
+
+    assert calls == [DiffStats(changed=1, hunks=1), "format"]
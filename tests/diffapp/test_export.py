@@ -0,0 +1,88 @@
+import difflib
+
+import pytest
+
+from difflume.diffapp.differ import DiffType, create_diff
+from difflume.diffapp.export import export_diff, group_opcodes, iter_html, iter_unified
+
+TEXT = "\n".join(f"line {i}" for i in range(40))
+
+
+@pytest.mark.parametrize(
+    "text_to_compare",
+    [
+        TEXT,
+        TEXT.replace("line 1\n", "line one\n"),
+        TEXT.replace("line 5\n", "").replace("line 30", "line 30\nnew line"),
+        TEXT.replace("line 10\nline 11\n", "line 11\nline 10\n"),
+        f"{TEXT}\nappended",
+        "",
+    ],
+)
+def test_unified_diff_is_same_as_difflib(text_to_compare):
+    result = create_diff(TEXT, text_to_compare, DiffType.NDIFF)
+
+    unified = list(iter_unified(result, fromfile="a.txt", tofile="b.txt"))
+
+    expected = difflib.unified_diff(
+        TEXT.splitlines(),
+        text_to_compare.splitlines(),
+        fromfile="a.txt",
+        tofile="b.txt",
+        lineterm="",
+    )
+    assert unified == [f"{line}\n" for line in expected]
+
+
+def test_unified_diff_of_empty_texts():
+    result = create_diff("", "", DiffType.NDIFF)
+
+    assert list(iter_unified(result, fromfile="a", tofile="b")) == []
+
+
+def test_group_opcodes_merges_adjacent_equal_opcodes():
+    opcodes = [
+        ("equal", 0, 10, 0, 10),
+        ("equal", 10, 20, 10, 20),
+        ("replace", 20, 21, 20, 21),
+        ("equal", 21, 30, 21, 30),
+    ]
+
+    assert list(group_opcodes(opcodes, context=2)) == [
+        [
+            ("equal", 18, 20, 18, 20),
+            ("replace", 20, 21, 20, 21),
+            ("equal", 21, 23, 21, 23),
+        ]
+    ]
+
+
+def test_html():
+    lines = ["  same", "- <old>", "? ^", "+ new & improved", "[...]"]
+
+    result = "".join(iter_html(lines, title="a → b"))
+
+    assert result.startswith("<!DOCTYPE html>")
+    assert "<title>a → b</title>" in result
+    assert "<div>  same</div>" in result
+    assert '<div class="removed">- &lt;old&gt;</div>' in result
+    assert '<div class="explanation">? ^</div>' in result
+    assert '<div class="added">+ new &amp; improved</div>' in result
+    assert '<div class="explanation">[...]</div>' in result
+    assert result.endswith("</html>\n")
+
+
+@pytest.mark.parametrize(
+    "filename,expected_start",
+    [
+        ("diff.patch", "--- left\n+++ right\n@@"),
+        ("diff.HTML", "<!DOCTYPE html>"),
+    ],
+)
+def test_export_diff(tmp_path, filename, expected_start):
+    result = create_diff(TEXT, TEXT.replace("line 3", "3"), DiffType.NDIFF_COLLAPSED)
+    path = tmp_path / filename
+
+    export_diff(result, path, fromfile="left", tofile="right")
+
+    assert path.read_text().startswith(expected_start)
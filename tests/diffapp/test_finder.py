@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from difflume.diffapp.finder import (
+    FileIndex,
+    FileSearch,
+    fuzzy_filter,
+    fuzzy_score,
+    rank_matches,
+    scan_files,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_files(root: Path, *paths: str) -> None:
+    for path in paths:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text("")
+
+
+@pytest.fixture()
+def tree(tmp_path) -> Path:
+    root = tmp_path / "tree"
+    make_files(
+        root,
+        "README.md",
+        "app.log",
+        "keep.log",
+        "build/out.json",
+        "src/build.py",
+        "src/data/build/cache.json",
+        "src/data/config.json",
+        "src/data/local.json",
+        ".git/config",
+    )
+    (root / ".gitignore").write_text("# logs\n*.log\n!keep.log\n/build/\n")
+    (root / "src" / "data" / ".ignore").write_text("local.json\nbuild\n")
+    return root
+
+
+def scanned(root: Path) -> list[str]:
+    return [path for batch in scan_files(str(root)) for path in batch]
+
+
+def test_scan_respects_ignore_files(tree):
+    assert scanned(tree) == [
+        ".gitignore",
+        "README.md",
+        "keep.log",
+        "src/build.py",
+        "src/data/.ignore",
+        "src/data/config.json",
+    ]
+
+
+def test_index_is_cached_between_sessions(tree, tmp_path):
+    index = FileIndex(str(tree), cache_dir=str(tmp_path / "cache"))
+    index.scan()
+    make_files(tree, "new.json")
+
+    cached = FileIndex(str(tree), cache_dir=str(tmp_path / "cache"))
+
+    assert cached.load_cache()
+    assert cached.paths == index.paths
+    assert not cached.complete
+
+
+def test_scan_shows_paths_as_found_without_cache(tree, tmp_path):
+    index = FileIndex(str(tree), cache_dir=str(tmp_path / "cache"))
+    sizes = []
+
+    index.scan(on_batch=lambda: sizes.append(len(index.paths)))
+
+    assert sizes[-1] == len(index.paths) == 6
+    assert index.complete
+
+
+def test_fuzzy_score():
+    assert fuzzy_score("cjz", "src/config.json") is None
+    assert fuzzy_score("cnf", "src/config.json") > fuzzy_score("cnf", "src/cache/nf")
+
+
+def test_fuzzy_filter():
+    paths = ["src/Config.json", "src/cache/nf", "x/y"]
+
+    assert fuzzy_filter(paths, "cnf") == ["src/Config.json", "src/cache/nf"]
+
+
+def test_fuzzy_filter_without_match_is_linear():
+    path = "e" * 32 + "/" + "x" * 77
+
+    # a backtracking regex takes seconds on this
+    assert fuzzy_filter([path] * 1000, "e" * 16 + "q") == []
+
+
+def test_rank_matches():
+    paths = ["docs/build_config.md", "src/config.json", "conf/main.json", "x/y"]
+
+    assert rank_matches(paths, "config") == [
+        "src/config.json",
+        "docs/build_config.md",
+    ]
+
+
+def test_narrowed_search_gives_same_matches(tree, tmp_path):
+    index = FileIndex(str(tree), cache_dir=str(tmp_path / "cache"))
+    index.scan()
+    file_search = FileSearch(index)
+
+    file_search.search("s")
+    narrowed = file_search.search("sjs")
+
+    assert narrowed == FileSearch(index).search("sjs") == ["src/data/config.json"]
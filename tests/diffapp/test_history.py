@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from difflume.diffapp.history import (
+    HistoryIndex,
+    bisect_revisions,
+    changed_paths,
+    compare_revisions,
+    find_value_introduced,
+    json_pointer_get,
+    scan_history,
+)
+from difflume.diffapp.modules import Content, Module, TextType, parse_content
+
+
+class InMemoryModule(Module):
+    def __init__(self, texts: dict[str, str]) -> None:
+        super().__init__()
+        # newest first
+        self._texts = texts
+        self.loaded: list[str] = []
+
+    async def _read_text(self) -> str:
+        return next(iter(self._texts.values()))
+
+    async def read_revisions(self) -> list[str]:
+        return list(self._texts)
+
+    async def load_revision(self, revision: str) -> None:
+        if revision not in self.revisions_content:
+            self.loaded.append(revision)
+            self.revisions_content[revision] = parse_content(self._texts[revision])
+
+
+def json_revisions(*docs: dict) -> dict[str, str]:
+    return {f"{len(docs) - i}-rev": json.dumps(doc) for i, doc in enumerate(docs)}
+
+
+@pytest.fixture()
+async def module() -> InMemoryModule:
+    module = InMemoryModule(
+        json_revisions(
+            {"name": "new", "tags": ["a", "b"], "nested": {"key": 2}},
+            {"name": "new", "tags": ["a"], "nested": {"key": 1}},
+            {"name": "old", "tags": ["a"], "nested": {"key": 1}},
+            {"name": "old", "nested": {"key": 1}},
+        )
+    )
+    await module.load()
+    return module
+
+
+@pytest.mark.parametrize(
+    "old,new,expected",
+    [
+        ({"a": 1}, {"a": 1}, []),
+        ({"a": 1}, {"a": 2}, ["/a"]),
+        ({"a": 1}, {"a": 1.0}, ["/a"]),
+        ({"a": {"b": 1}}, {"a": {"b": 1, "c": 2}}, ["/a/c"]),
+        ({"a": {"b": 1}}, {}, ["/a"]),
+        ({"a/b": 1, "c~": 1}, {}, ["/a~1b", "/c~0"]),
+        ([1, 2], [1, 3, 4], ["/1", "/2"]),
+        ({"a": [1]}, {"a": {"0": 1}}, ["/a"]),
+        (1, 2, [""]),
+    ],
+)
+def test_changed_paths(old, new, expected):
+    assert list(changed_paths(old, new)) == expected
+
+
+def test_json_pointer_get():
+    data = {"a/b": [{"c": 1}]}
+
+    assert json_pointer_get(data, "/a~1b/0/c") == 1
+    assert json_pointer_get(data, "") == data
+    with pytest.raises(KeyError):
+        json_pointer_get(data, "/a~1b/1")
+
+
+def test_compare_text_revisions():
+    old = Content(text="one\ntwo\nthree", text_type=TextType.PLAIN)
+    new = Content(text="one\n2\nthree\nfour", text_type=TextType.PLAIN)
+
+    result = compare_revisions("2-b", "1-a", old, new)
+
+    assert result.added == ("2", "four")
+    assert result.removed == ("two",)
+    assert result.paths == frozenset()
+    assert result.touches_text("fo")
+    assert not result.touches_text("one")
+
+
+def test_compare_first_revision():
+    new = parse_content('{"a": {"b": 1}}')
+
+    result = compare_revisions("1-a", None, None, new)
+
+    assert result.paths == frozenset({"", "/a", "/a/b"})
+    assert result.touches_path("/a/b")
+    assert not result.touches_path("/unknown")
+
+
+def test_compare_revisions_with_replaced_subtree():
+    old = parse_content('{"a": {"b": 1}}')
+    new = parse_content('{"a": [2]}')
+
+    result = compare_revisions("2-b", "1-a", old, new)
+
+    assert result.paths == frozenset({"/a", "/a/b", "/a/0"})
+    assert not result.touches_path("/a/c")
+
+
+async def test_scan_history(module: InMemoryModule):
+    with ThreadPoolExecutor(2) as executor:
+        history = await scan_history(module, executor=executor)
+
+    assert len(history) == 4
+    assert history.search("/tags") == ["4-rev", "2-rev"]
+    assert history.search("/tags/1") == ["4-rev"]
+    assert history.search("/nested") == ["4-rev", "1-rev"]
+    assert history.search('"old"') == ["3-rev", "1-rev"]
+    assert history.search("/name") == ["3-rev", "1-rev"]
+    assert history.search("/unknown") == []
+    assert history.search("unknown text") == []
+
+
+async def test_scan_history_in_worker_processes(module: InMemoryModule):
+    history = await scan_history(module)
+
+    assert history.search("/nested/key") == ["4-rev", "1-rev"]
+
+
+async def test_scan_history_with_equal_revisions():
+    module = InMemoryModule(json_revisions({"a": 2}, {"a": 1}, {"a": 1}))
+    await module.load()
+
+    history = await scan_history(module)
+
+    assert [len(changes.added) for changes in history.changes] == [1, 0, 3]
+    assert history.search("/a") == ["3-rev", "1-rev"]
+
+
+async def test_bisect_revisions_loads_few_revisions():
+    module = InMemoryModule(
+        {f"{i}-rev": json.dumps({"flag": i > 70}) for i in range(100, 0, -1)}
+    )
+    await module.load()
+
+    result = await bisect_revisions(module, lambda content: "true" in content.text)
+
+    assert result == "71-rev"
+    assert len(module.loaded) <= 8
+
+
+async def test_bisect_returns_none_if_predicate_false_for_latest(
+    module: InMemoryModule,
+):
+    result = await bisect_revisions(module, lambda content: False)
+
+    assert result is None
+
+
+async def test_find_value_introduced(module: InMemoryModule):
+    assert await find_value_introduced(module, "/name") == "3-rev"
+    assert await find_value_introduced(module, "/nested/key") == "4-rev"
+    assert await find_value_introduced(module, "/unknown") is None
+
+
+def test_empty_history():
+    history = HistoryIndex([])
+
+    assert history.search("/a") == []
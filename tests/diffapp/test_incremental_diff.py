@@ -0,0 +1,161 @@
+import difflib
+
+import pytest
+
+from difflume.diffapp.differ import (
+    MATCHER_INDEX_CACHE_SIZE,
+    DiffType,
+    SideCache,
+    create_diff,
+    matcher,
+)
+from difflume.diffapp.normalize import Normalization
+
+
+@pytest.fixture()
+def text() -> str:
+    return "\n".join(f"line {i}" for i in range(50))
+
+
+@pytest.fixture()
+def text_to_compare(text) -> str:
+    return text.replace("line 10\n", "line ten\n")
+
+
+@pytest.mark.parametrize("diff_type", list(DiffType))
+def test_incremental_diff_of_appended_text_is_same_as_full_diff(
+    diff_type, text, text_to_compare
+):
+    previous = create_diff(text, text_to_compare, diff_type)
+    appended = f"{text_to_compare}\nnew line\nline 3"
+
+    result = create_diff(text, appended, diff_type, previous=previous)
+
+    assert result.text == create_diff(text, appended, diff_type).text
+
+
+@pytest.mark.parametrize("diff_type", list(DiffType))
+def test_incremental_diff_of_changed_text_is_same_as_full_diff(
+    diff_type, text, text_to_compare
+):
+    previous = create_diff(text, text_to_compare, diff_type)
+    changed = text.replace("line 40", "line forty")
+
+    result = create_diff(changed, text_to_compare, diff_type, previous=previous)
+
+    assert result.text == create_diff(changed, text_to_compare, diff_type).text
+
+
+def test_reuse_blocks_before_changed_lines(text, text_to_compare):
+    previous = create_diff(text, text_to_compare, DiffType.NDIFF)
+
+    result = create_diff(
+        text, f"{text_to_compare}\nnew line", DiffType.NDIFF, previous=previous
+    )
+
+    assert result.blocks[0] is previous.blocks[0]
+    assert result.lines[-1] == "+ new line"
+
+
+def test_incremental_diff_when_nothing_changed(text, text_to_compare):
+    previous = create_diff(text, text_to_compare, DiffType.NDIFF)
+
+    result = create_diff(text, text_to_compare, DiffType.NDIFF, previous=previous)
+
+    assert result.text == previous.text
+
+
+def test_matcher_of_same_second_tuple_is_reused():
+    lines_to_compare = ("a", "b", "c")
+
+    first = matcher(("a", "c"), lines_to_compare)
+    result = matcher(("b", "c"), lines_to_compare)
+
+    assert result.b2j is first.b2j
+    assert result.get_opcodes() == [("insert", 0, 0, 0, 1), ("equal", 0, 2, 1, 3)]
+    # copies sharing the index are matched separately
+    assert first.get_opcodes() == [
+        ("equal", 0, 1, 0, 1),
+        ("insert", 1, 1, 1, 2),
+        ("equal", 1, 2, 2, 3),
+    ]
+
+
+def test_matcher_index_is_reused_when_each_side_changes_in_turn():
+    lines, changed_lines = ("a", "b"), ("a", "c")
+    lines_to_compare, changed_lines_to_compare = ("b", "c"), ("c", "d")
+
+    first = matcher(lines, lines_to_compare)
+    left_changed = matcher(changed_lines, lines_to_compare)
+    right_changed = matcher(changed_lines, changed_lines_to_compare)
+    right_changed_back = matcher(changed_lines, lines_to_compare)
+
+    assert left_changed.b2j is first.b2j
+    assert right_changed.b2j is not first.b2j
+    assert right_changed_back.b2j is first.b2j
+    assert (
+        right_changed_back.get_opcodes()
+        == difflib.SequenceMatcher(None, changed_lines, lines_to_compare).get_opcodes()
+    )
+
+
+def test_matcher_index_cache_is_bounded():
+    sides = [(str(i),) for i in range(MATCHER_INDEX_CACHE_SIZE + 1)]
+    first = matcher(("a",), sides[0])
+    for side in sides[1:]:
+        matcher(("a",), side)
+
+    assert matcher(("a",), sides[0]).b2j is not first.b2j
+
+
+def test_matcher_of_list_is_not_reused():
+    lines_to_compare = ["a", "b"]
+
+    first = matcher(["a"], lines_to_compare)
+
+    assert matcher(["b"], lines_to_compare).b2j is not first.b2j
+
+
+def test_side_cache_builds_state_once_per_tuple():
+    calls = []
+
+    def count(lines) -> int:
+        calls.append(lines)
+        return len(lines)
+
+    cache = SideCache(count)
+    lines = ("a", "b")
+
+    assert cache.get(lines) == 2
+    assert cache.get(lines) == 2
+    assert cache.get(["a"]) == 1
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("diff_type", list(DiffType))
+@pytest.mark.parametrize("normalization", [None, Normalization(ignore_case=True)])
+def test_diff_against_fixed_side_is_same_as_full_diff(
+    diff_type, normalization, text, text_to_compare
+):
+    lines_to_compare = tuple(text_to_compare.splitlines())
+    changed = text.replace("line 30", "LINE 30").replace("line 40\n", "")
+    create_diff(
+        text,
+        text_to_compare,
+        diff_type,
+        normalization=normalization,
+        lines_to_compare=lines_to_compare,
+    )
+
+    result = create_diff(
+        changed,
+        text_to_compare,
+        diff_type,
+        normalization=normalization,
+        lines_to_compare=lines_to_compare,
+    )
+
+    expected = create_diff(
+        changed, text_to_compare, diff_type, normalization=normalization
+    )
+    assert result.text == expected.text
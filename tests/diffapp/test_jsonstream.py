@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from difflume.diffapp.jsonstream import iter_canonical_lines
+from difflume.diffapp.modules import TextType, parse_content
+
+
+def canonical(text: str) -> list[str]:
+    return json.dumps(
+        json.loads(text), indent=2, sort_keys=True, ensure_ascii=False
+    ).splitlines()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "{}",
+        " [ ] ",
+        '{"b": 1, "a": {"d": [], "c": {}}}',
+        '[1, -0, 1E3, 0.10, 1e-7, true, false, null, "str"]',
+        '[[1, [2, [3]]], {"k": [{"x": 1}, {"y": 2}]}]',
+        '{"unicode": "Привіт \\u0436", "escaped": "a\\"b\\\\c\\nd"}',
+        '{"a": 1, "a": 2}',
+        '{"z": NaN, "y": Infinity, "x": -Infinity}',
+        '"scalar"',
+    ],
+)
+def test_same_lines_as_json_dumps(text: str):
+    result = list(iter_canonical_lines(text))
+
+    assert result == canonical(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "[1,]",
+        "[1 2]",
+        "[}",
+        '{"a" 1}',
+        '{"a": 1}}',
+        '{"a": [1, }',
+        '{"a": "unterminated}',
+        "{",
+    ],
+)
+def test_raise_error_on_invalid_json(text: str):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_canonical_lines(text))
+
+
+def test_parse_content_stream_big_json(monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_STREAM_JSON_THRESHOLD", "1")
+    text = '{"key": "value", "another_key": ["another_value"]}'
+
+    result = parse_content(text)
+
+    assert result.text == "\n".join(canonical(text))
+    assert result.text_type == TextType.JSON
+
+
+def test_parse_content_fallback_to_plain_if_streamed_json_is_invalid(monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_STREAM_JSON_THRESHOLD", "1")
+
+    result = parse_content('{"key": "value",]')
+
+    assert result.text == '{"key": "value",]'
+    assert result.text_type == TextType.PLAIN
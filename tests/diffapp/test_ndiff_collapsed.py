@@ -1,6 +1,15 @@
 import pytest
 
-from difflume.diffapp.differ import NdiffCollapsed
+from difflume.diffapp.differ import (
+    DiffType,
+    Ndiff,
+    NdiffCollapsed,
+    create_diff,
+    expand_hidden,
+    full_diff_lines,
+    hunk_starts,
+    recollapse,
+)
 
 
 @pytest.fixture()
@@ -120,3 +129,71 @@ def test_empty_text(sut):
     result = sut(text, text_to_compare)
 
     assert result == ""
+
+
+@pytest.fixture()
+def long_text() -> str:
+    return "\n".join(f"line {i}" for i in range(30))
+
+
+@pytest.fixture()
+def collapsed_result(long_text):
+    text_to_compare = long_text.replace("line 10", "line ten").replace(
+        "line 20", "line twenty"
+    )
+    return create_diff(long_text, text_to_compare, DiffType.NDIFF_COLLAPSED)
+
+
+def test_hidden_lines_are_behind_delimiters(collapsed_result):
+    full_lines = Ndiff().from_blocks(collapsed_result.blocks)
+
+    assert [h.line for h in collapsed_result.hidden] == [
+        i for i, line in enumerate(collapsed_result.lines) if line == "[...]"
+    ]
+    assert [(h.start, h.end) for h in collapsed_result.hidden] == [
+        (0, 8),
+        (14, 19),
+        (25, 32),
+    ]
+    assert full_diff_lines(collapsed_result.blocks, 14, 19) == full_lines[14:19]
+
+
+def test_expand_hidden_lines(collapsed_result):
+    result = expand_hidden(collapsed_result, 1)
+
+    assert result.lines[5:12] == [
+        "  line 11",
+        "  line 12",
+        "  line 13",
+        "  line 14",
+        "  line 15",
+        "  line 16",
+        "  line 17",
+    ]
+    assert [result.lines[h.line] for h in result.hidden] == ["[...]", "[...]"]
+    assert [result.lines[hunk] for hunk in result.hunks] == [
+        "- line 10",
+        "- line 20",
+    ]
+    assert result.text == "\n".join(result.lines)
+
+
+def test_expand_all_hidden_lines_gives_full_diff(collapsed_result):
+    result = collapsed_result
+    while result.hidden:
+        result = expand_hidden(result, 0)
+
+    full_lines = Ndiff().from_blocks(collapsed_result.blocks)
+    assert result.lines == full_lines
+    assert result.hunks == hunk_starts(collapsed_result.blocks)
+
+
+@pytest.mark.parametrize("preserve_rows", [0, 1, 4])
+def test_recollapse(collapsed_result, preserve_rows):
+    result = recollapse(expand_hidden(collapsed_result, 0), preserve_rows)
+
+    differ = NdiffCollapsed(preserve_rows=preserve_rows)
+    assert result.lines == differ.from_blocks(collapsed_result.blocks)
+    assert len(result.hunks) == result.stats.hunks
+    assert all(result.lines[hunk][0] in "+-" for hunk in result.hunks)
+    assert [result.lines[h.line] for h in result.hidden] == ["[...]"] * 3
@@ -0,0 +1,123 @@
+import pytest
+
+from difflume.diffapp.differ import DiffType, create_diff
+from difflume.diffapp.normalize import (
+    CUSTOM_PATTERN,
+    Normalization,
+    available_rules,
+    default_rules,
+    normalized_lines,
+)
+
+
+@pytest.mark.parametrize(
+    "rules,line,expected",
+    [
+        ([], " Some  Line ", " Some  Line "),
+        (["whitespace"], " Some \tLine ", "SomeLine"),
+        (["case"], "Some Line", "some line"),
+        (["timestamps"], '"at": "2023-10-01T12:30:00.123Z"', '"at": "<masked>"'),
+        (["timestamps"], "at 2023-10-01 12:30", "at <masked>"),
+        (
+            ["uuids"],
+            "id=123e4567-E89B-12d3-a456-426614174000;",
+            "id=<masked>;",
+        ),
+        (["couchdb revisions"], '  "_rev": "12-abc123",', '  "_rev": "<masked>",'),
+        (["whitespace", "case"], "Some Line", "someline"),
+    ],
+)
+def test_normalize(rules, line, expected):
+    normalization = Normalization.from_rules(rules)
+
+    assert normalization.normalize(line) == expected
+
+
+def test_custom_pattern(monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_IGNORE_PATTERN", r"v\d+")
+
+    normalization = Normalization.from_rules([CUSTOM_PATTERN])
+
+    assert CUSTOM_PATTERN in available_rules()
+    assert normalization.normalize("app v12") == "app <masked>"
+
+
+def test_custom_pattern_is_not_available_without_env():
+    assert CUSTOM_PATTERN not in available_rules()
+    assert not Normalization.from_rules([CUSTOM_PATTERN])
+
+
+def test_default_rules(monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_IGNORE", "whitespace, uuids")
+
+    assert default_rules() == ["whitespace", "uuids"]
+
+
+def test_default_rules_unknown(monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_IGNORE", "whitespace,unknown")
+
+    with pytest.raises(ValueError, match="unknown"):
+        default_rules()
+
+
+def test_normalized_lines_are_cached():
+    text = "A\nB\nA"
+    normalization = Normalization(ignore_case=True)
+
+    result = normalized_lines(text, normalization)
+
+    assert result == ("a", "b", "a")
+    assert normalized_lines(text, normalization) is result
+
+
+OLD = """{
+  "_id": "doc",
+  "_rev": "1-aaa",
+  "updated": "2023-10-01T12:30:00Z",
+  "Name": "value",
+  "other": 1
+}"""
+NEW = """{
+  "_id": "doc",
+  "_rev": "2-bbb",
+  "updated": "2023-10-02T08:00:00Z",
+  "name":  "value",
+  "added": true,
+  "other": 1
+}"""
+
+
+@pytest.mark.parametrize("diff_type", list(DiffType))
+def test_diff_ignores_normalized_differences(diff_type):
+    normalization = Normalization.from_rules(
+        ["whitespace", "case", "timestamps", "couchdb revisions"]
+    )
+
+    result = create_diff(OLD, NEW, diff_type, normalization=normalization)
+
+    assert [line for line in result.lines if line[0] in "+-?"] == ['+   "added": true,']
+    assert result.stats.added == 1
+    assert result.stats.hunks == 1
+
+
+def test_diff_shows_original_lines():
+    normalization = Normalization.from_rules(["timestamps"])
+
+    result = create_diff(OLD, NEW, DiffType.NDIFF, normalization=normalization)
+
+    assert '    "updated": "2023-10-01T12:30:00Z",' in result.lines
+
+
+def test_incremental_diff_with_other_rules_is_full_diff():
+    previous = create_diff(OLD, NEW, DiffType.NDIFF)
+    normalization = Normalization.from_rules(["couchdb revisions"])
+
+    result = create_diff(
+        OLD, NEW, DiffType.NDIFF, previous=previous, normalization=normalization
+    )
+
+    assert (
+        result.text
+        == create_diff(OLD, NEW, DiffType.NDIFF, normalization=normalization).text
+    )
+    assert result.text != previous.text
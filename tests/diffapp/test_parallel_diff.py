@@ -0,0 +1,145 @@
+import difflib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from difflume.diffapp.differ import (
+    DiffStats,
+    DiffType,
+    create_diff,
+    diff_blocks,
+    parallel_diff_blocks,
+    split_on_anchors,
+    unique_anchors,
+)
+
+
+@pytest.fixture()
+def lines() -> list[str]:
+    return [f"line {i % 50}" if i % 3 else f"unique {i}" for i in range(3000)]
+
+
+@pytest.fixture()
+def lines_to_compare(lines) -> list[str]:
+    result = list(lines)
+    for i in range(len(result) - 1, 0, -97):
+        if i % 3 == 0:
+            result.insert(i, f"inserted {i}")
+        elif i % 3 == 1:
+            del result[i]
+        else:
+            result[i] = f"{result[i]} changed"
+    return result
+
+
+@pytest.fixture()
+def executor():
+    with ThreadPoolExecutor(4) as executor:
+        yield executor
+
+
+def ndiff_lines(blocks) -> list[str]:
+    return [line for block in blocks for line in block.lines]
+
+
+def test_unique_anchors():
+    lines = ["a", "x", "b", "c", "x", "d"]
+    lines_to_compare = ["c", "a", "b", "y", "d"]
+
+    assert unique_anchors(lines, lines_to_compare) == [(0, 1), (2, 2), (5, 4)]
+
+
+def test_unique_anchors_without_common_lines():
+    assert unique_anchors(["a", "a"], ["b"]) == []
+
+
+def test_split_on_anchors():
+    anchors = [(1, 1), (5, 4), (6, 9), (12, 12)]
+
+    segments = split_on_anchors(15, 14, anchors, segment_lines=5)
+
+    assert segments == [(0, 5, 0, 4), (5, 12, 4, 12), (12, 15, 12, 14)]
+
+
+def test_parallel_diff_is_valid_diff(lines, lines_to_compare, executor):
+    blocks = parallel_diff_blocks(
+        lines, lines_to_compare, executor=executor, segment_lines=200
+    )
+
+    result = ndiff_lines(blocks)
+    assert list(difflib.restore(result, 1)) == lines
+    assert list(difflib.restore(result, 2)) == lines_to_compare
+
+
+def test_parallel_diff_blocks_cover_both_texts(lines, lines_to_compare, executor):
+    blocks = parallel_diff_blocks(
+        lines, lines_to_compare, executor=executor, segment_lines=200
+    )
+
+    assert len(blocks) > 1
+    for block, next_block in zip(blocks, blocks[1:]):
+        assert block.hi == next_block.lo
+        assert block.hi_to_compare == next_block.lo_to_compare
+    assert (blocks[-1].hi, blocks[-1].hi_to_compare) == (
+        len(lines),
+        len(lines_to_compare),
+    )
+
+
+def test_parallel_diff_with_offsets(lines, lines_to_compare, executor):
+    blocks = parallel_diff_blocks(
+        lines,
+        lines_to_compare,
+        offset=10,
+        offset_to_compare=20,
+        executor=executor,
+        segment_lines=200,
+    )
+
+    assert (blocks[0].lo, blocks[0].lo_to_compare) == (10, 20)
+    assert blocks[-1].hi == len(lines) + 10
+
+
+def test_parallel_diff_reports_stats_of_all_segments(lines, lines_to_compare, executor):
+    reported = []
+
+    blocks = parallel_diff_blocks(
+        lines,
+        lines_to_compare,
+        executor=executor,
+        segment_lines=200,
+        on_stats=reported.append,
+    )
+
+    assert reported == [
+        DiffStats.from_opcodes(
+            (b.tag, b.lo, b.hi, b.lo_to_compare, b.hi_to_compare) for b in blocks
+        )
+    ]
+    assert reported[0].hunks > 1
+
+
+def test_parallel_diff_in_worker_processes(lines, lines_to_compare):
+    blocks = parallel_diff_blocks(lines, lines_to_compare, segment_lines=1000)
+
+    assert list(difflib.restore(ndiff_lines(blocks), 2)) == lines_to_compare
+
+
+def test_big_texts_are_diffed_in_parallel(monkeypatch, lines, lines_to_compare):
+    monkeypatch.setenv("DIFF_LUME_PARALLEL_DIFF_THRESHOLD", "100")
+
+    blocks = diff_blocks(lines, lines_to_compare)
+
+    assert list(difflib.restore(ndiff_lines(blocks), 1)) == lines
+
+
+@pytest.mark.parametrize("diff_type", list(DiffType))
+def test_create_diff_of_big_texts(monkeypatch, diff_type, lines, lines_to_compare):
+    text, text_to_compare = "\n".join(lines), "\n".join(lines_to_compare)
+    expected = create_diff(text, text_to_compare, diff_type)
+    monkeypatch.setenv("DIFF_LUME_PARALLEL_DIFF_THRESHOLD", "100")
+
+    result = create_diff(text, text_to_compare, diff_type)
+
+    assert result.stats.added + result.stats.changed > 0
+    assert result.lines[:10] == expected.lines[:10]
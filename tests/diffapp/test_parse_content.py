@@ -1,6 +1,17 @@
+import json
+
 import pytest
 
-from difflume.diffapp.modules import TextType, parse_content
+from difflume.diffapp.modules import (
+    LARGE_TEXT_SIZE,
+    PARSE_IN_THREAD_SIZE,
+    TextType,
+    looks_like_json,
+    parse_content,
+    parse_content_async,
+    text_type_from_mime,
+    text_type_from_path,
+)
 
 
 @pytest.mark.parametrize("text", ["", " ", "  ", '{"key": "value"', "some\ntext"])
@@ -34,3 +45,84 @@ def test_sort_keys_and_indent_when_parsing_json():
 
     assert result.text == expected
     assert result.text_type == TextType.JSON
+
+
+@pytest.mark.parametrize("text", ["123", '"string"', "null", "true"])
+def test_dont_parse_json_scalars(text: str):
+    result = parse_content(text)
+
+    assert result.text == text
+    assert result.text_type == TextType.PLAIN
+
+
+def test_dont_parse_large_text_without_closing_bracket():
+    text = "[INFO] " + "log line\n" * LARGE_TEXT_SIZE
+
+    assert looks_like_json(text) is False
+
+
+def test_parse_large_json():
+    text = json.dumps(["item"] * LARGE_TEXT_SIZE)
+
+    result = parse_content(text)
+
+    assert result.text_type == TextType.JSON
+
+
+def test_dont_parse_if_hint_is_plain():
+    result = parse_content('{"key": "value"}', text_type=TextType.PLAIN)
+
+    assert result.text == '{"key": "value"}'
+    assert result.text_type == TextType.PLAIN
+
+
+def test_fallback_to_plain_if_hint_is_json_but_text_is_not():
+    result = parse_content("not json", text_type=TextType.JSON)
+
+    assert result.text == "not json"
+    assert result.text_type == TextType.PLAIN
+
+
+@pytest.mark.parametrize(
+    "content_type,expected",
+    [
+        ("application/json", TextType.JSON),
+        ("application/json; charset=utf-8", TextType.JSON),
+        ("application/vnd.api+json", TextType.JSON),
+        ("text/html; charset=utf-8", TextType.PLAIN),
+        ("text/plain", None),
+        (None, None),
+    ],
+)
+def test_text_type_from_mime(content_type, expected):
+    assert text_type_from_mime(content_type) == expected
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("/data/doc.json", TextType.JSON),
+        ("/data/DOC.JSON", TextType.JSON),
+        ("/var/log/app.log", TextType.PLAIN),
+        ("/data/events.jsonl", TextType.PLAIN),
+        ("/data/file", None),
+    ],
+)
+def test_text_type_from_path(path, expected):
+    assert text_type_from_path(path) == expected
+
+
+async def test_parse_content_async_in_thread(monkeypatch):
+    text = json.dumps({"key": "value" * PARSE_IN_THREAD_SIZE})
+    called_in_thread = []
+
+    async def to_thread(func, *args, **kwargs):
+        called_in_thread.append(func)
+        return func(*args, **kwargs)
+
+    monkeypatch.setattr("asyncio.to_thread", to_thread)
+
+    result = await parse_content_async(text)
+
+    assert result.text_type == TextType.JSON
+    assert called_in_thread == [parse_content]
@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from difflume.diffapp.differ import DiffType, create_diff
+from difflume.diffapp.modules import Content, TextType
+from difflume.diffapp.normalize import Normalization
+from difflume.diffapp.prefetch import DiffCache, diff_key, pairs_ahead
+
+REVISIONS = ["5-e", "4-d", "3-c", "2-b", "1-a"]
+
+
+@pytest.fixture()
+def executor():
+    with ThreadPoolExecutor(2) as executor:
+        yield executor
+
+
+def content(text: str) -> Content:
+    return Content(text=text, text_type=TextType.PLAIN)
+
+
+def key(text: str, text_to_compare: str):
+    return diff_key(
+        content(text), content(text_to_compare), DiffType.NDIFF, Normalization()
+    )
+
+
+@pytest.mark.parametrize(
+    "index,index_to_compare,step,expected",
+    [
+        (1, 0, 1, [("3-c", "4-d"), ("2-b", "3-c"), ("1-a", "2-b")]),
+        (3, 2, -1, [("3-c", "4-d"), ("4-d", "5-e")]),
+        (4, 3, 1, []),
+    ],
+)
+def test_pairs_ahead(index, index_to_compare, step, expected):
+    result = pairs_ahead(
+        REVISIONS, index, REVISIONS, index_to_compare, step=step, count=3
+    )
+
+    assert result == expected
+
+
+def test_pairs_ahead_are_limited_by_count():
+    result = pairs_ahead(REVISIONS, 1, REVISIONS, 0, step=1, count=1)
+
+    assert result == [("3-c", "4-d")]
+
+
+def test_least_recently_used_diffs_are_evicted():
+    cache = DiffCache(max_size=2)
+    result = create_diff("a", "b", DiffType.NDIFF)
+    cache.put(key("a", "b"), result)
+    cache.put(key("b", "c"), result)
+    cache.get(key("a", "b"))
+
+    cache.put(key("c", "d"), result)
+
+    assert cache.get(key("a", "b")) is result
+    assert cache.get(key("b", "c")) is None
+    assert len(cache) == 2
+
+
+async def test_prefetch(executor):
+    cache = DiffCache()
+    pairs = [(content("a\nb"), content("a\nc")), (content("b"), content("c"))]
+
+    await cache.prefetch(
+        pairs, DiffType.NDIFF, Normalization(ignore_case=True), executor=executor
+    )
+
+    result = cache.get(
+        diff_key(*pairs[0], DiffType.NDIFF, Normalization(ignore_case=True))
+    )
+    assert result is not None
+    assert result.lines == ["  a", "- b", "+ c"]
+    assert len(cache) == 2
+
+
+async def test_prefetch_skips_cached_diffs(executor):
+    cache = DiffCache()
+    cached = create_diff("a", "b", DiffType.NDIFF)
+    cache.put(key("a", "b"), cached)
+
+    await cache.prefetch(
+        [(content("a"), content("b"))],
+        DiffType.NDIFF,
+        Normalization(),
+        executor=executor,
+    )
+
+    assert cache.get(key("a", "b")) is cached
+
+
+async def test_prefetch_in_worker_processes():
+    cache = DiffCache()
+
+    await cache.prefetch(
+        [(content("a\nb"), content("a"))], DiffType.NDIFF_COLLAPSED, Normalization()
+    )
+
+    result = cache.get(
+        diff_key(
+            content("a\nb"), content("a"), DiffType.NDIFF_COLLAPSED, Normalization()
+        )
+    )
+    assert result is not None
+    assert result.stats.removed == 1
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import lzma
+from typing import TYPE_CHECKING
+
+import pytest
+
+from difflume.diffapp.compression import CompressionError
+from difflume.diffapp.readers import (
+    BinaryFile,
+    FileText,
+    MappedFile,
+    read_file,
+    read_file_from,
+)
+from difflume.diffapp.sniff import SNIFF_SIZE
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture()
+def file(tmp_path) -> Path:
+    return tmp_path / "test_readers.txt"
+
+
+def test_mapped_file_read_text_with_universal_newlines(file: Path):
+    file.write_bytes(b"first\r\nsecond\rthird\n")
+
+    with MappedFile(str(file)) as sut:
+        result = sut.read_text("utf-8")
+
+    assert result == "first\nsecond\nthird\n"
+
+
+def test_mapped_file_read_empty_file(file: Path):
+    file.write_bytes(b"")
+
+    with MappedFile(str(file)) as sut:
+        assert sut.read_text("utf-8") == ""
+
+
+@pytest.mark.parametrize("threshold", ["1", "1000000"])
+def test_read_file_same_for_small_and_big_files(
+    file: Path, monkeypatch, threshold: str
+):
+    monkeypatch.setenv("DIFF_LUME_MMAP_THRESHOLD", threshold)
+    file.write_bytes(b"first\r\nsecond\nthird")
+
+    result = read_file(str(file))
+
+    assert result == FileText(
+        text="first\nsecond\nthird", encoding="utf-8", position=19
+    )
+
+
+@pytest.mark.parametrize("threshold", ["1", "1000000"])
+@pytest.mark.parametrize("encoding", ["utf-8-sig", "utf-16", "utf-32"])
+def test_read_file_with_bom(file: Path, monkeypatch, threshold: str, encoding: str):
+    monkeypatch.setenv("DIFF_LUME_MMAP_THRESHOLD", threshold)
+    file.write_text("Привіт\nсвіт", encoding=encoding)
+
+    result = read_file(str(file))
+
+    assert isinstance(result, FileText)
+    assert result.text == "Привіт\nсвіт"
+
+
+def test_read_file_use_fallback_encoding_for_non_utf8_text(file: Path):
+    file.write_bytes("café".encode("latin-1"))
+
+    result = read_file(str(file))
+
+    assert result == FileText(text="café", encoding="latin-1", position=4)
+
+
+def test_read_file_use_fallback_encoding_when_non_utf8_after_sniffed_part(
+    file: Path,
+):
+    file.write_bytes(b"a" * SNIFF_SIZE + "café".encode("latin-1"))
+
+    result = read_file(str(file))
+
+    assert isinstance(result, FileText)
+    assert result.encoding == "latin-1"
+    assert result.text.endswith("café")
+
+
+def test_read_binary_file(file: Path):
+    data = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+    file.write_bytes(data)
+
+    result = read_file(str(file))
+
+    assert result == BinaryFile(size=len(data), sha256=hashlib.sha256(data).hexdigest())
+
+
+def test_dont_hash_big_binary_files(file: Path, monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_BINARY_HASH_LIMIT", "10")
+    file.write_bytes(b"\x00" * 11)
+
+    result = read_file(str(file))
+
+    assert result == BinaryFile(size=11, sha256=None)
+
+
+def test_read_file_from_position(file: Path):
+    file.write_bytes("first\nсвіт".encode())
+
+    result = read_file_from(str(file), position=6, encoding="utf-8")
+
+    assert result == FileText(text="світ", encoding="utf-8", position=14)
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, lzma.compress])
+def test_read_compressed_file(file: Path, compress):
+    data = "first\r\nсвіт\n" * 5000
+    compressed = compress(data.encode())
+    file.write_bytes(compressed)
+
+    result = read_file(str(file))
+
+    assert isinstance(result, FileText)
+    assert result.text == data.replace("\r\n", "\n")
+    assert result.position == len(compressed)
+    assert result.compression is not None
+
+
+def test_read_compressed_file_with_bom(file: Path):
+    file.write_bytes(gzip.compress("світ".encode("utf-16")))
+
+    result = read_file(str(file))
+
+    assert isinstance(result, FileText)
+    assert result.text == "світ"
+
+
+def test_read_compressed_non_utf8_file(file: Path):
+    file.write_bytes(gzip.compress(b"a" * SNIFF_SIZE + "café".encode("latin-1")))
+
+    result = read_file(str(file))
+
+    assert isinstance(result, FileText)
+    assert result.encoding == "latin-1"
+    assert result.text.endswith("café")
+
+
+def test_read_compressed_binary_file(file: Path):
+    data = b"\x00\x01" * SNIFF_SIZE
+    file.write_bytes(gzip.compress(data))
+
+    result = read_file(str(file))
+
+    assert result == BinaryFile(size=len(data), sha256=hashlib.sha256(data).hexdigest())
+
+
+@pytest.mark.parametrize("limit", [10, 2 * SNIFF_SIZE - 1])
+def test_dont_hash_big_compressed_binary_files(file: Path, monkeypatch, limit):
+    monkeypatch.setenv("DIFF_LUME_BINARY_HASH_LIMIT", str(limit))
+    data = b"\x00\x01" * SNIFF_SIZE
+    file.write_bytes(gzip.compress(data))
+
+    result = read_file(str(file))
+
+    assert result == BinaryFile(size=len(data), sha256=None)
+
+
+def test_read_corrupted_compressed_file(file: Path):
+    file.write_bytes(gzip.compress(b"test")[:-10])
+
+    with pytest.raises(CompressionError):
+        read_file(str(file))
+
+
+def test_read_text_file_that_starts_like_bzip2(file: Path):
+    file.write_bytes(b"BZh is not a block size")
+
+    result = read_file(str(file))
+
+    assert isinstance(result, FileText)
+    assert result.text == "BZh is not a block size"
+    assert result.compression is None
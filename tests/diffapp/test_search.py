@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from difflume.diffapp.search import Match, TextIndex, line_starts, text_index
+
+TEXT = "\n".join(
+    [
+        "first line with Key",
+        "",
+        "key: value, key: other",
+        "nothing here",
+        "last KEY",
+    ]
+)
+
+
+def all_matches(text: str, query: str, flags: int = re.IGNORECASE) -> list[int]:
+    return [m.start() for m in re.finditer(re.escape(query), text, flags)]
+
+
+def expected_order(
+    text: str, query: str, offset: int, *, backwards: bool = False, flags=re.I
+) -> list[int]:
+    starts = all_matches(text, query, flags)
+    if backwards:
+        before = [s for s in starts if s < offset]
+        after = [s for s in starts if s >= offset]
+        return [*reversed(before), *reversed(after)]
+    return [s for s in starts if s >= offset] + [s for s in starts if s < offset]
+
+
+@pytest.fixture(params=[False, True], ids=["scan", "trigrams"])
+def sut(request) -> TextIndex:
+    index = TextIndex.build(TEXT)
+    if request.param:
+        index.build_trigrams()
+    return index
+
+
+def test_lines(sut: TextIndex):
+    assert len(sut) == 5
+    assert sut.line(0) == "first line with Key"
+    assert sut.line(1) == ""
+    assert sut.line(4) == "last KEY"
+    assert sut.line_of(TEXT.index("nothing")) == 3
+
+
+def test_search_from_beginning(sut: TextIndex):
+    result = list(sut.search("key"))
+
+    assert [m.start for m in result] == all_matches(TEXT, "key")
+    assert result[0] == Match(line=0, start=16, end=19)
+    assert [m.line for m in result] == [0, 2, 2, 4]
+
+
+@pytest.mark.parametrize("backwards", [False, True])
+@pytest.mark.parametrize("offset", [0, 16, 17, 25, 30, len(TEXT)])
+def test_search_wraps_around(sut: TextIndex, offset: int, backwards: bool):
+    result = sut.search("key", offset=offset, backwards=backwards)
+
+    assert [m.start for m in result] == expected_order(
+        TEXT, "key", offset, backwards=backwards
+    )
+
+
+def test_smart_case(sut: TextIndex):
+    result = sut.search("KEY")
+
+    assert [m.line for m in result] == [4]
+
+
+def test_no_matches(sut: TextIndex):
+    assert list(sut.search("missing")) == []
+    assert list(sut.search("")) == []
+
+
+def test_search_is_lazy():
+    index = TextIndex.build("match\n" * 100_000)
+
+    result = index.search("match", offset=6)
+
+    assert next(result) == Match(line=1, start=6, end=11)
+
+
+def test_backward_search_across_windows():
+    text = "\n".join(f"line {i}" for i in range(10_000))
+    index = TextIndex.build(text)
+
+    result = index.search("line 1", offset=len(text), backwards=True)
+
+    assert [m.start for m in result] == expected_order(
+        text, "line 1", len(text), backwards=True
+    )
+
+
+def test_cache_index_by_text():
+    text = "some text\n" * 10
+
+    assert text_index(text) is text_index(text)
+    assert text_index(text) is not text_index(text + "more")
+
+
+def test_index_from_known_line_starts():
+    text = "known starts\nof the text"
+
+    index = text_index(text, starts=line_starts(text))
+
+    assert index.line(1) == "of the text"
+    assert index.line_of(14) == 1
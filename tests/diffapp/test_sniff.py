@@ -0,0 +1,42 @@
+import codecs
+
+import pytest
+
+from difflume.diffapp.sniff import SniffResult, sniff
+
+
+@pytest.mark.parametrize(
+    "head,expected",
+    [
+        (b"", SniffResult(is_binary=False, encoding="utf-8")),
+        (b"plain text\n", SniffResult(is_binary=False, encoding="utf-8")),
+        ("текст".encode(), SniffResult(is_binary=False, encoding="utf-8")),
+        (
+            codecs.BOM_UTF8 + b"text",
+            SniffResult(is_binary=False, encoding="utf-8", bom_length=3),
+        ),
+        (
+            "text".encode("utf-16"),
+            SniffResult(is_binary=False, encoding="utf-16-le", bom_length=2),
+        ),
+        (
+            "text".encode("utf-32"),
+            SniffResult(is_binary=False, encoding="utf-32-le", bom_length=4),
+        ),
+        ("café".encode("latin-1"), SniffResult(is_binary=False, encoding="cp1252")),
+        (b"\x7fELF\x02\x01\x01\x00", SniffResult(is_binary=True, encoding=None)),
+        (b"\x01\x02\x03\x04text", SniffResult(is_binary=True, encoding=None)),
+    ],
+)
+def test_sniff(head: bytes, expected: SniffResult):
+    result = sniff(head, complete=True, fallback_encoding="cp1252")
+
+    assert result == expected
+
+
+def test_head_can_end_in_the_middle_of_multibyte_character():
+    head = "текст".encode()[:-1]
+
+    result = sniff(head, fallback_encoding="cp1252")
+
+    assert result == SniffResult(is_binary=False, encoding="utf-8")
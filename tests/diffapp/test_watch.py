@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+
+from difflume.diffapp.watch import (
+    FileWatcher,
+    InotifyFileWatcher,
+    PollingFileWatcher,
+    _Inotify,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture()
+def file(tmp_path) -> Path:
+    path = tmp_path / "watched.log"
+    path.write_text("first line\n")
+    return path
+
+
+def polling_watcher(path: str) -> FileWatcher:
+    return PollingFileWatcher(path, debounce=0.05, interval=0.01)
+
+
+def inotify_watcher(path: str) -> FileWatcher:
+    if not _Inotify.available():
+        pytest.skip("inotify is not available")
+    return InotifyFileWatcher(path, debounce=0.05)
+
+
+@pytest.fixture(params=[polling_watcher, inotify_watcher])
+def sut(request, file) -> FileWatcher:
+    return request.param(str(file))
+
+
+async def next_change(changes) -> None:
+    await asyncio.wait_for(anext(changes), timeout=2)
+
+
+async def test_notify_when_file_changed(sut: FileWatcher, file: Path):
+    changes = sut.changes()
+    waiter = asyncio.create_task(next_change(changes))
+    await asyncio.sleep(0.05)
+
+    with file.open("a") as f:
+        f.write("second line\n")
+
+    await waiter
+    await changes.aclose()
+
+
+async def test_notify_when_file_replaced(sut: FileWatcher, file: Path):
+    changes = sut.changes()
+    waiter = asyncio.create_task(next_change(changes))
+    await asyncio.sleep(0.05)
+
+    new_file = file.with_suffix(".tmp")
+    new_file.write_text("new content\n")
+    new_file.replace(file)
+
+    await waiter
+    await changes.aclose()
+
+
+async def test_debounce_burst_of_changes(sut: FileWatcher, file: Path):
+    changes = sut.changes()
+    waiter = asyncio.create_task(next_change(changes))
+    await asyncio.sleep(0.05)
+
+    for i in range(5):
+        with file.open("a") as f:
+            f.write(f"line {i}\n")
+        await asyncio.sleep(0.01)
+    await waiter
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(anext(changes), timeout=0.2)
+    await changes.aclose()
@@ -0,0 +1,80 @@
+import asyncio
+
+import httpx
+import pytest
+
+from difflume.http.client import HTTPSettings, PerHostLimitTransport, create_client
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_HTTP_MAX_CONNECTIONS", "50")
+    monkeypatch.setenv("DIFF_LUME_HTTP_MAX_CONNECTIONS_PER_HOST", "3")
+    monkeypatch.setenv("DIFF_LUME_HTTP_CONNECT_TIMEOUT", "1.5")
+    monkeypatch.setenv("DIFF_LUME_HTTP_READ_TIMEOUT", "30")
+    monkeypatch.setenv("DIFF_LUME_HTTP2", "yes")
+
+    result = HTTPSettings.from_env()
+
+    assert result == HTTPSettings(
+        max_connections=50,
+        max_connections_per_host=3,
+        connect_timeout=1.5,
+        read_timeout=30.0,
+        http2=True,
+    )
+
+
+def test_settings_from_env_use_defaults_for_missing_values():
+    result = HTTPSettings.from_env()
+
+    assert result == HTTPSettings()
+
+
+def test_settings_from_env_raise_error_on_invalid_value(monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_HTTP2", "maybe")
+
+    with pytest.raises(ValueError, match="DIFF_LUME_HTTP2"):
+        HTTPSettings.from_env()
+
+
+async def test_create_client_with_separate_timeouts():
+    client = create_client(HTTPSettings(connect_timeout=2, read_timeout=20))
+
+    assert client.timeout == httpx.Timeout(20, connect=2)
+    await client.aclose()
+
+
+async def test_limit_concurrent_requests_per_host():
+    in_flight: dict[str, int] = {"a": 0, "b": 0}
+    max_in_flight: dict[str, int] = {"a": 0, "b": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight[host] += 1
+        max_in_flight[host] = max(max_in_flight[host], in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, text="ok")
+
+    transport = PerHostLimitTransport(httpx.MockTransport(handler), max_per_host=2)
+    async with httpx.AsyncClient(transport=transport) as client:
+        await asyncio.gather(
+            *[client.get(f"http://{host}/") for host in ("a", "b") for _ in range(6)]
+        )
+
+    assert max_in_flight == {"a": 2, "b": 2}
+
+
+async def test_release_host_slot_after_streamed_response_is_closed():
+    async def handler(request: httpx.Request) -> httpx.Response:  # noqa: U100
+        return httpx.Response(200, text="ok")
+
+    transport = PerHostLimitTransport(httpx.MockTransport(handler), max_per_host=1)
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(3):
+            async with client.stream("GET", "http://a/") as response:
+                await response.aread()
+
+        result = await asyncio.wait_for(client.get("http://a/"), timeout=1)
+
+    assert result.text == "ok"
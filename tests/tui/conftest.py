@@ -21,6 +21,11 @@ def _set_home_dir_for_directory_tree(monkeypatch, project_path):
     )
 
 
+@pytest.fixture(autouse=True)
+def _set_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("DIFF_LUME_CACHE_DIR", str(tmp_path / "cache"))
+
+
 @pytest.fixture()
 def snap_compare(snap_compare, app_path):
     return partial(snap_compare, app_path=str(app_path), terminal_size=(160, 40))
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from textual.widgets import OptionList
+
+from difflume.diffapp.sources import parse_source
+from difflume.tui.app import DiffLume
+from difflume.tui.screens import DatabasesScreen, DocumentDiffScreen
+from difflume.tui.widgets import PanelType
+
+pytestmark = pytest.mark.usefixtures("executor")
+
+
+@pytest.fixture()
+def executor(monkeypatch):
+    # worker processes can't be spawned from the test app
+    with ThreadPoolExecutor(2) as executor:
+        monkeypatch.setattr("difflume.diffapp.dbcompare.process_pool", lambda: executor)
+        yield executor
+
+
+@pytest.fixture()
+def app(databases_server, monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_COUCHDB_PAGE_SIZE", "2")
+    databases_server.make_endpoint(
+        content={
+            "results": [
+                {
+                    "id": "c",
+                    "docs": [{"ok": {"_id": "c", "_rev": "1-c", "key": "old"}}],
+                }
+            ]
+        },
+        path="/replica/_bulk_get",
+    )
+    for path, rev, value in (("/db/c", "2-c", "new"), ("/replica/c", "1-c", "old")):
+        databases_server.make_endpoint(
+            content={
+                "_id": "c",
+                "_rev": rev,
+                "key": value,
+                "_revs_info": [{"rev": rev, "status": "available"}],
+            },
+            path=path,
+        )
+    url = databases_server.url_for("/").removeprefix("http://")
+    return DiffLume(
+        left=parse_source(f"couchdb://{url}db"),
+        right=parse_source(f"couchdb://{url}replica"),
+        databases=True,
+    )
+
+
+async def test_list_differing_documents(app):
+    async with app.run_test() as pilot:
+        await pilot.pause(1)
+        screen = app.screen
+        option_list = screen.query_one(OptionList)
+
+        assert isinstance(screen, DatabasesScreen)
+        assert [diff.doc_id for diff in screen.diffs] == ["b", "c", "e"]
+        assert option_list.option_count == 3
+        assert str(option_list.get_option_at_index(1).prompt) == "c  +0 -0 ~1 in 1 hunk"
+
+
+async def test_open_diff_of_document(app):
+    async with app.run_test() as pilot:
+        await pilot.pause(1)
+        app.screen.query_one(OptionList).highlighted = 1
+        await pilot.press("enter")
+        await pilot.pause(0.5)
+        screen = app.screen
+
+        assert isinstance(screen, DocumentDiffScreen)
+        assert screen.query_panel(PanelType.LEFT).current_revision == "2-c"
+        assert screen.query_panel(PanelType.RIGHT).current_revision == "1-c"
+
+        await pilot.press("escape")
+
+        assert isinstance(app.screen, DatabasesScreen)
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from difflume.diffapp import differ
+from difflume.diffapp.sources import parse_source
+from difflume.tui.app import DiffLume
+from difflume.tui.screens import HelpScreen
+
+
+@pytest.fixture()
+def diff_started(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_create_diff(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return differ.create_diff(*args, **kwargs)
+
+    monkeypatch.setattr("difflume.tui.screens.create_diff", slow_create_diff)
+    yield started
+    release.set()
+
+
+@pytest.fixture()
+def app(project_path):
+    fixtures = project_path / "tests" / "tui" / "fixtures"
+    return DiffLume(
+        left=parse_source(str(fixtures / "1_test_data.json")),
+        right=parse_source(str(fixtures / "2_test_data.json")),
+    )
+
+
+async def test_ui_responds_while_diffing(app, diff_started):
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+        screen = app.screen
+
+        assert diff_started.is_set()
+        assert screen.rendered_diff is None
+
+        await pilot.press("question_mark")
+
+        assert isinstance(app.screen, HelpScreen)
+
+
+async def test_header_shows_stats_while_diff_is_formatted(app, monkeypatch):
+    release = threading.Event()
+    compare_blocks = differ._BlockDiffer.compare_blocks
+
+    def slow_formatting(*args, **kwargs):
+        release.wait(5)
+        return compare_blocks(*args, **kwargs)
+
+    monkeypatch.setattr(
+        "difflume.diffapp.differ._BlockDiffer.compare_blocks", slow_formatting
+    )
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+        screen = app.screen
+        sub_title, formatted = screen.sub_title, screen.rendered_diff
+        release.set()
+        await pilot.pause(0.5)
+
+        assert formatted is None
+        assert screen.rendered_diff is not None
+        assert sub_title == str(screen.rendered_diff.result.stats)
+
+
+async def test_show_diff_made_in_thread(app):
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+
+        assert app.screen.rendered_diff is not None
+        assert app.screen.sub_title
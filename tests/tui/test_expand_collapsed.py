@@ -0,0 +1,61 @@
+import pytest
+
+from difflume.diffapp.sources import parse_source
+from difflume.tui.app import DiffLume
+from difflume.tui.widgets import PanelType
+
+
+@pytest.fixture()
+def app(project_path):
+    fixtures = project_path / "tests" / "tui" / "fixtures"
+    return DiffLume(
+        left=parse_source(str(fixtures / "1_test_data.json")),
+        right=parse_source(str(fixtures / "2_test_data.json")),
+    )
+
+
+async def test_expand_collapsed_lines_in_view(app):
+    async with app.run_test(size=(200, 60)) as pilot:
+        await pilot.pause(0.5)
+        screen = app.screen
+        screen.query_panel(PanelType.MIDDLE).focus()
+        diff_cache_size = len(screen.diff_cache)
+        await pilot.press("x")
+        await pilot.pause()
+
+        assert screen.rendered_diff.result.hidden == []
+        assert "[...]" not in screen.query_panel(PanelType.MIDDLE).text.plain
+        assert len(screen.diff_cache) == diff_cache_size
+
+
+async def test_expand_collapsed_lines_on_click(app):
+    async with app.run_test(size=(200, 60)) as pilot:
+        await pilot.pause(0.5)
+        screen = app.screen
+        delimiter = screen.rendered_diff.result.hidden[0].line
+        # the first row is the border of the panel
+        await pilot.click("MiddlePanel", offset=(2, delimiter))
+        await pilot.pause()
+        hidden_after_miss = len(screen.rendered_diff.result.hidden)
+        await pilot.click("MiddlePanel", offset=(2, delimiter + 1))
+        await pilot.pause()
+
+        assert hidden_after_miss == 1
+        assert screen.rendered_diff.result.hidden == []
+
+
+async def test_change_context_rows(app):
+    async with app.run_test(size=(200, 60)) as pilot:
+        await pilot.pause(0.5)
+        screen = app.screen
+        screen.query_panel(PanelType.MIDDLE).focus()
+        lines_count = len(screen.rendered_diff.result.lines)
+        await pilot.press("minus")
+        await pilot.pause()
+        fewer_lines_count = len(screen.rendered_diff.result.lines)
+        await pilot.press("plus", "plus")
+        await pilot.pause()
+
+        assert fewer_lines_count < lines_count
+        assert len(screen.rendered_diff.result.lines) > lines_count
+        assert len(screen.diff_cache) == 1
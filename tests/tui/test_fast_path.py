@@ -43,6 +43,10 @@ def test_select_diff_type_dialog(snap_compare):
     assert snap_compare(press=["tab", "d"])
 
 
+def test_select_ignore_rules_dialog(snap_compare):
+    assert snap_compare(press=["tab", "i", "space"])
+
+
 def test_compare_files_with_default_diff_type(snap_compare):
     assert snap_compare(
         press=[
@@ -77,3 +81,23 @@ def test_compare_files_and_change_diff_type(snap_compare):
             "enter",  # select ndiff
         ]
     )
+
+
+def test_search_in_focused_panel(snap_compare):
+    assert snap_compare(
+        press=[
+            "f1",
+            "2",
+            "down",
+            "enter",  # open file in the left panel
+            "f2",
+            "2",
+            "down",
+            "down",
+            "enter",  # open file in the right panel
+            "ctrl+f",
+            *list("another"),
+            "enter",  # highlight the first match
+            "n",  # next match
+        ]
+    )
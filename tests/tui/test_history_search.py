@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from difflume.diffapp.sources import parse_source
+from difflume.tui.app import DiffLume
+from difflume.tui.modals import RevisionList
+from difflume.tui.widgets import PanelType
+
+
+@pytest.fixture(autouse=True)
+def _executor(monkeypatch):
+    # worker processes can't be spawned from the test app
+    with ThreadPoolExecutor(2) as executor:
+        monkeypatch.setattr("difflume.diffapp.history.process_pool", lambda: executor)
+        yield
+
+
+async def test_path_query_highlights_revision_with_current_value(
+    couchdb_server, document_url
+):
+    url = couchdb_server.url_for(document_url).removeprefix("http://")
+    app = DiffLume(left=parse_source(f"couchdb://{url}@6-def"))
+
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+        app.screen.query_panel(PanelType.LEFT).focus()
+        await pilot.press("h", *"/_rev", "enter")
+        await pilot.pause(0.5)
+        revision_list = app.screen.query_one(RevisionList)
+
+        assert revision_list.revisions == ["7-abc", "6-def"]
+        assert revision_list.current == "6-def"
+        assert revision_list.revisions[revision_list.highlighted] == "7-abc"
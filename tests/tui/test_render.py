@@ -0,0 +1,48 @@
+import pytest
+
+from difflume.diffapp.differ import DiffType, create_diff
+from difflume.tui.screens import (
+    RenderedDiff,
+    expand_rendered_diff,
+    highlight_diff,
+    render_diff,
+)
+
+
+@pytest.fixture()
+def text() -> str:
+    return "\n".join(f"line {i}" for i in range(20))
+
+
+@pytest.mark.parametrize(
+    "new_text_to_compare",
+    [
+        "line 0\nline X",
+        "line 0\nline 1",
+        "\n".join(f"line {i}" for i in range(25)),
+        "",
+    ],
+)
+def test_render_diff_incrementally(text, new_text_to_compare):
+    result = create_diff(text, text.replace("line 5", "line five"), DiffType.NDIFF)
+    previous = RenderedDiff(result=result, text=render_diff(result))
+    new_result = create_diff(text, new_text_to_compare, DiffType.NDIFF)
+
+    rendered = render_diff(new_result, previous)
+
+    expected = highlight_diff(new_result.text, new_result)
+    assert rendered.plain == expected.plain
+    assert sorted(rendered.spans) == sorted(expected.spans)
+
+
+@pytest.mark.parametrize("index", [0, 1, 2])
+def test_expand_rendered_diff(text, index):
+    text_to_compare = text.replace("line 5", "line five").replace("line 12", "12")
+    result = create_diff(text, text_to_compare, DiffType.NDIFF_COLLAPSED)
+    rendered = RenderedDiff(result=result, text=render_diff(result))
+
+    expanded = expand_rendered_diff(rendered, index)
+
+    expected = highlight_diff(expanded.result.text, expanded.result)
+    assert expanded.text.plain == expected.plain
+    assert sorted(expanded.text.spans) == sorted(expected.spans)
@@ -0,0 +1,68 @@
+from rich.console import Console
+from rich.text import Text
+
+from difflume.tui.render import CachedText, RenderCache
+
+
+def test_text_is_highlighted_once():
+    cache = RenderCache(max_size=100)
+    calls = []
+
+    def highlight() -> Text:
+        calls.append(1)
+        return Text("text")
+
+    first = cache.text("key", highlight)
+    second = cache.text("key", highlight)
+
+    assert second is first
+    assert len(calls) == 1
+
+
+def test_least_recently_used_texts_are_evicted():
+    cache = RenderCache(max_size=10)
+    cache.text("a", lambda: Text("aaaa"))
+    cache.text("b", lambda: Text("bbbb"))
+    cache.text("a", lambda: Text("new"))
+
+    cache.text("c", lambda: Text("cccc"))
+
+    assert ("text", "a") in cache
+    assert ("text", "b") not in cache
+    assert cache.size == 8
+
+
+def test_texts_bigger_than_cache_are_not_cached():
+    cache = RenderCache(max_size=3)
+
+    cache.text("a", lambda: Text("aaaa"))
+
+    assert len(cache) == 0
+
+
+def test_max_size_from_env(monkeypatch):
+    monkeypatch.setenv("DIFF_LUME_RENDER_CACHE_SIZE", "5")
+
+    assert RenderCache().max_size == 5
+
+
+def test_cached_text_renders_same_lines():
+    cache = RenderCache(max_size=1000)
+    text = Text("a long line that is wrapped\nshort", style="bold")
+    console = Console(width=10)
+
+    result = console.render_lines(CachedText(text, key="key", cache=cache))
+
+    assert result == console.render_lines(text)
+    assert len(cache) == 1
+
+
+def test_segments_are_cached_per_width():
+    cache = RenderCache(max_size=1000)
+    text = Text("a long line that is wrapped")
+    renderable = CachedText(text, key="key", cache=cache)
+
+    for width in (10, 20, 10):
+        Console(width=width).render_lines(renderable)
+
+    assert len(cache) == 2
@@ -0,0 +1,43 @@
+from textual.app import App
+
+from difflume.tui.modals import RevisionList, RevisionsModal
+
+REVISIONS = [f"{i}-{i:032x}" for i in range(10_000, 0, -1)]
+
+
+async def test_select_revision_from_filtered_list():
+    app = App()
+    selected = []
+    loaded = []
+    info = {}
+
+    async def load_info(revisions):
+        loaded.append(list(revisions))
+        info.update({revision: "description" for revision in revisions})
+
+    async with app.run_test(size=(120, 30)) as pilot:
+        await app.push_screen(
+            RevisionsModal(
+                "Select a revision",
+                current=REVISIONS[5000],
+                revisions=REVISIONS,
+                info=info,
+                load_info=load_info,
+            ),
+            selected.append,
+        )
+        await pilot.pause(0.3)
+        revision_list = app.screen.query_one(RevisionList)
+        visible = revision_list.visible_revisions()
+        height = revision_list.size.height
+        await pilot.press("1", "2", "3", "4")
+        await pilot.pause()
+        shown = revision_list.shown
+        await pilot.press("down", "enter")
+        await pilot.pause()
+
+    assert REVISIONS[5000] in visible
+    assert len(info) < 1_000
+    assert all(len(revisions) <= height for revisions in loaded)
+    assert shown == ["4660-00000000000000000000000000001234", REVISIONS[-1234]]
+    assert selected == [REVISIONS[-1234]]
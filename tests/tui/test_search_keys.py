@@ -0,0 +1,31 @@
+import pytest
+
+from difflume.diffapp.sources import parse_source
+from difflume.tui.app import DiffLume
+from difflume.tui.screens import HelpScreen
+from difflume.tui.widgets import SearchBar
+
+
+@pytest.fixture()
+def app(project_path):
+    fixtures = project_path / "tests" / "tui" / "fixtures"
+    return DiffLume(
+        left=parse_source(str(fixtures / "1_test_data.json")),
+        right=parse_source(str(fixtures / "2_test_data.json")),
+    )
+
+
+async def test_slash_opens_help(app):
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+        await pilot.press("slash")
+
+        assert isinstance(app.screen, HelpScreen)
+
+
+async def test_ctrl_f_opens_search(app):
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+        await pilot.press("ctrl+f")
+
+        assert not app.screen.query_one(SearchBar).has_class("disabled")
@@ -0,0 +1,61 @@
+import pytest
+
+from difflume.diffapp.sources import parse_source
+from difflume.main import parse_args
+from difflume.tui.app import DiffLume
+from difflume.tui.widgets import PanelType
+
+
+def test_parse_args():
+    args = parse_args(["left.json", "couchdb://host/db/doc@3-abc"])
+
+    assert args.left == parse_source("left.json")
+    assert args.right == parse_source("couchdb://host/db/doc@3-abc")
+
+
+def test_parse_args_without_sources():
+    args = parse_args([])
+
+    assert args.left is None
+    assert args.right is None
+
+
+def test_parse_args_with_databases():
+    args = parse_args(["--databases", "couchdb://host/db", "couchdb://host/replica"])
+
+    assert args.databases
+    assert args.right == parse_source("couchdb://host/replica")
+
+
+def test_databases_must_be_couchdb(capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["--databases", "left.json", "couchdb://host/replica"])
+
+    assert "--databases needs two CouchDB databases" in capsys.readouterr().err
+
+
+async def test_first_screen_shows_diff_of_sources(couchdb_server, document_url):
+    url = couchdb_server.url_for(document_url).removeprefix("http://")
+    app = DiffLume(
+        left=parse_source(f"couchdb://{url}@6-def"),
+        right=parse_source(f"couchdb://{url}"),
+    )
+
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+        screen = app.screen
+
+        assert screen.query_panel(PanelType.LEFT).current_revision == "6-def"
+        assert screen.query_panel(PanelType.RIGHT).current_revision == "7-abc"
+        assert screen.rendered_diff is not None
+        assert screen.sub_title == "+0 -0 ~1 in 1 hunk"
+
+
+async def test_unknown_revision_falls_back_to_latest(couchdb_server, document_url):
+    url = couchdb_server.url_for(document_url).removeprefix("http://")
+    app = DiffLume(left=parse_source(f"couchdb://{url}@9-xyz"))
+
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+
+        assert app.screen.query_panel(PanelType.LEFT).current_revision == "7-abc"
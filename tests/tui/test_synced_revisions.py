@@ -0,0 +1,23 @@
+from difflume.diffapp.sources import parse_source
+from difflume.tui.app import DiffLume
+from difflume.tui.widgets import PanelType
+
+
+async def test_stepping_back_reuses_diff(couchdb_server, document_url):
+    url = couchdb_server.url_for(document_url).removeprefix("http://")
+    app = DiffLume(
+        left=parse_source(f"couchdb://{url}"), right=parse_source(f"couchdb://{url}")
+    )
+
+    async with app.run_test() as pilot:
+        await pilot.pause(0.5)
+        await pilot.press("{")
+        await pilot.pause(0.5)
+        await pilot.press("}")
+        await pilot.pause(0.5)
+        screen = app.screen
+
+        assert screen.query_panel(PanelType.LEFT).current_revision == "7-abc"
+        assert screen.query_panel(PanelType.RIGHT).current_revision == "7-abc"
+        assert len(screen.diff_cache) == 2
+        assert screen.sub_title == "No changes"